@@ -2,18 +2,16 @@ import * as React from 'react';
 import { useContext, useEffect, useState, useMemo, useRef } from 'react';
 import {
     View, Text, ScrollView, TouchableOpacity,
-    Dimensions, ActivityIndicator, Animated,
+    ActivityIndicator, Animated,
 } from 'react-native';
 import { Image } from 'expo-image';
-import axios from 'axios';
-import RenderHtml from 'react-native-render-html';
 import { LineChart } from 'react-native-wagmi-charts';
 
 import { TickersContext, checkRateLimit, capitalizeFLetter, getStyles } from './utils';
 import { useNavigation } from '@react-navigation/native';
 import ThemeContext from './themes/ThemeContext';
+import { BACKEND_URL } from './constants';
 
-const { width } = Dimensions.get('window');
 const SECTIONS   = ['News', 'Winners', 'Losers', 'Movers'];
 const TAB_HEIGHT = 44;
 
@@ -27,9 +25,10 @@ const TickerCard = ({ ticker, getLogoFilename, navigation }) => {
     const C         = theme._colors;
 
     useEffect(() => {
-        fetch(`https://api-pub.bitfinex.com/v2/candles/trade:1h:${ticker.ticker}/hist?limit=24`)
+        fetch(`${BACKEND_URL}/candles?symbols=${ticker.ticker}&tf=1h&limit=24`)
             .then(checkRateLimit).then(r => r.json())
-            .then(data => {
+            .then(({ candles }) => {
+                const data = candles?.[ticker.ticker] ?? [];
                 const pts = data
                     .map(c => ({ timestamp: c[0], value: c[2] }))
                     .sort((a, b) => a.timestamp - b.timestamp);
@@ -95,8 +94,8 @@ const NewsCard = ({ news, navigation, styles, C }) => (
             <Text style={{ color: C.accent, fontSize: 10, fontWeight: '700', fontFamily: 'Inter', letterSpacing: 0.8, marginBottom: 6, textTransform: 'uppercase' }}>
                 Bitfinex News
             </Text>
-            <Text style={styles.titleNews} numberOfLines={2}>{news[3]}</Text>
-            <RenderHtml contentWidth={width - 64} source={{ html: news[4]?.substring(0, 100) ?? '' }} tagsStyles={styles.snippet} />
+            <Text style={styles.titleNews} numberOfLines={2}>{news.title}</Text>
+            <Text style={styles.snippet.p} numberOfLines={3}>{news.summary}</Text>
         </View>
     </TouchableOpacity>
 );
@@ -150,6 +149,9 @@ const SORT_FNS = {
     Movers:  (a, b) => b.absPercMove - a.absPercMove,
 };
 
+// Section → ranking in the backend's /market/summary
+const SUMMARY_KEYS = { Winners: 'gainers', Losers: 'losers', Movers: 'movers' };
+
 const Frame = () => {
     const { tickers, getLogoFilename, walletData } = useContext(TickersContext);
     const navigation = useNavigation();
@@ -171,23 +173,36 @@ const Frame = () => {
     const [newsData,    setNewsData]    = useState([]);
     const [newsLoading, setNewsLoading] = useState(true);
     useEffect(() => {
-        axios.get('https://api-pub.bitfinex.com/v2/posts/hist?limit=20&type=1')
-            .then(r => { setNewsData(r.data); setNewsLoading(false); })
+        fetch(`${BACKEND_URL}/news?limit=20`)
+            .then(r => r.ok ? r.json() : { posts: [] })
+            .then(d => { setNewsData(d.posts); setNewsLoading(false); })
             .catch(() => setNewsLoading(false));
     }, []);
 
+    // ── Market summary (rankings precomputed server-side per ticker refresh) ──
+    const [summary, setSummary] = useState(null);
+    useEffect(() => {
+        fetch(`${BACKEND_URL}/market/summary?n=20`)
+            .then(r => r.ok ? r.json() : null)
+            .then(setSummary)
+            .catch(() => setSummary(null));
+    }, [tickers]);
+
     // ── Top-5 horizontal cards ────────────────────────────────────────────────
     const topTickers = useMemo(() =>
-        [...tickers].sort((a, b) => b.usdVolume - a.usdVolume).slice(0, 5),
-        [tickers]
+        summary
+            ? summary.volume.slice(0, 5)
+            : [...tickers].sort((a, b) => b.usdVolume - a.usdVolume).slice(0, 5),
+        [summary, tickers]
     );
 
     // ── Section tickers ───────────────────────────────────────────────────────
     const sectionTickers = useMemo(() => {
         const fn = SORT_FNS[selectedSection];
         if (!fn) return [];
+        if (summary) return summary[SUMMARY_KEYS[selectedSection]];
         return [...tickers].sort(fn).slice(0, 20);
-    }, [selectedSection, tickers]);
+    }, [selectedSection, summary, tickers]);
 
     // ── Content items ─────────────────────────────────────────────────────────
     const contentItems = useMemo(() => {
@@ -197,8 +212,8 @@ const Frame = () => {
                     <ActivityIndicator color={C.accent} />
                 </View>
             )];
-            return newsData.map((news, i) => (
-                <NewsCard key={`news-${i}`} news={news} navigation={navigation} styles={styles} C={C} />
+            return newsData.map(news => (
+                <NewsCard key={`news-${news.id}`} news={news} navigation={navigation} styles={styles} C={C} />
             ));
         }
         return sectionTickers.map((ticker, i) => (
@@ -10,6 +10,7 @@ import { TickersContext, checkRateLimit, capitalizeFLetter, getStyles } from './
 import { LineChart } from 'react-native-wagmi-charts';
 import { useNavigation } from '@react-navigation/native';
 import ThemeContext from './themes/ThemeContext';
+import { BACKEND_URL } from './constants';
 
 // ── Compact horizontal card ───────────────────────────────────────────────────
 
@@ -18,9 +19,10 @@ const TickerCard = ({ ticker, getLogoFilename, navigation, C, styles }) => {
     const [chartColor, setChartColor] = useState(null);
 
     useEffect(() => {
-        fetch(`https://api-pub.bitfinex.com/v2/candles/trade:1h:${ticker.ticker}/hist?limit=24`)
+        fetch(`${BACKEND_URL}/candles?symbols=${ticker.ticker}&tf=1h&limit=24`)
             .then(checkRateLimit).then(r => r.json())
-            .then(data => {
+            .then(({ candles }) => {
+                const data = candles?.[ticker.ticker] ?? [];
                 const pts = data.map(c => ({ timestamp: c[0], value: c[2] }))
                     .sort((a, b) => a.timestamp - b.timestamp);
                 if (pts.length) {
@@ -1,13 +1,10 @@
 import React, { useEffect, useState, useContext } from 'react';
-import { View, Text, ScrollView, TouchableOpacity, ActivityIndicator, Dimensions } from 'react-native';
-import axios from 'axios';
+import { View, Text, ScrollView, TouchableOpacity, ActivityIndicator } from 'react-native';
 import { useNavigation } from '@react-navigation/native';
-import RenderHtml from 'react-native-render-html';
 
 import { getStyles } from './utils';
 import ThemeContext from './themes/ThemeContext';
-
-const { width } = Dimensions.get('window');
+import { BACKEND_URL } from './constants';
 
 const NewsComponent = () => {
     const [newsData, setNewsData] = useState([]);
@@ -18,8 +15,10 @@ const NewsComponent = () => {
     const C = theme._colors;
 
     useEffect(() => {
-        axios.get('https://api-pub.bitfinex.com/v2/posts/hist?limit=20&type=1')
-            .then(r => { setNewsData(r.data); setLoading(false); })
+        // Polled once for every device by the backend; summaries come pre-stripped
+        fetch(`${BACKEND_URL}/news?limit=20`)
+            .then(r => r.ok ? r.json() : { posts: [] })
+            .then(d => { setNewsData(d.posts); setLoading(false); })
             .catch(() => setLoading(false));
     }, []);
 
@@ -37,9 +36,9 @@ const NewsComponent = () => {
             showsVerticalScrollIndicator={false}
             contentContainerStyle={{ paddingBottom: 24 }}
         >
-            {newsData.map((news, index) => (
+            {newsData.map(news => (
                 <TouchableOpacity
-                    key={index}
+                    key={news.id}
                     activeOpacity={0.8}
                     onPress={() => navigation.navigate('NewsDetail', { news })}
                 >
@@ -54,14 +53,12 @@ const NewsComponent = () => {
                         </Text>
 
                         <Text style={styles.titleNews} numberOfLines={2}>
-                            {news[3]}
+                            {news.title}
                         </Text>
 
-                        <RenderHtml
-                            contentWidth={width - 60}
-                            source={{ html: news[4]?.substring(0, 100) ?? '' }}
-                            tagsStyles={styles.snippet}
-                        />
+                        <Text style={styles.snippet.p} numberOfLines={3}>
+                            {news.summary}
+                        </Text>
                     </View>
                 </TouchableOpacity>
             ))}
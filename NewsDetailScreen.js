@@ -1,7 +1,8 @@
-import React, { useContext } from 'react';
-import { View, Text, ScrollView, TouchableOpacity, Dimensions, SafeAreaView } from 'react-native';
+import React, { useContext, useEffect, useState } from 'react';
+import { View, Text, ScrollView, TouchableOpacity, Dimensions, SafeAreaView, ActivityIndicator } from 'react-native';
 import RenderHtml from 'react-native-render-html';
 import ThemeContext from './themes/ThemeContext';
+import { BACKEND_URL } from './constants';
 
 const { width } = Dimensions.get('window');
 
@@ -10,6 +11,16 @@ const NewsDetailScreen = ({ route, navigation }) => {
     const { theme } = useContext(ThemeContext);
     const C = theme._colors;
 
+    // The list only carries a summary; the full HTML is fetched for this post alone
+    // (null while loading, false if it could not be fetched)
+    const [body, setBody] = useState(null);
+    useEffect(() => {
+        fetch(`${BACKEND_URL}/news/${news.id}`)
+            .then(r => r.ok ? r.json() : null)
+            .then(d => setBody(d ? d.body : false))
+            .catch(() => setBody(false));
+    }, [news.id]);
+
     return (
         <SafeAreaView style={{ flex: 1, backgroundColor: C.background }}>
             {/* Back button */}
@@ -41,26 +52,34 @@ const NewsDetailScreen = ({ route, navigation }) => {
                     fontSize: 22, fontWeight: '700', color: C.textPrimary,
                     fontFamily: 'Inter', lineHeight: 30, marginBottom: 16,
                 }}>
-                    {news[3]}
+                    {news.title}
                 </Text>
 
                 {/* Divider */}
                 <View style={{ height: 1, backgroundColor: C.accent, width: 40, marginBottom: 20 }} />
 
                 {/* Body */}
-                <RenderHtml
-                    contentWidth={width - 40}
-                    source={{ html: news[4] ?? '' }}
-                    tagsStyles={{
-                        p:    { color: C.textSecondary, fontSize: 15, lineHeight: 25, marginBottom: 12 },
-                        a:    { color: C.accent },
-                        h1:   { color: C.textPrimary, fontSize: 20, fontWeight: '700', marginBottom: 8 },
-                        h2:   { color: C.textPrimary, fontSize: 17, fontWeight: '600', marginBottom: 8 },
-                        h3:   { color: C.textPrimary, fontSize: 15, fontWeight: '600', marginBottom: 6 },
-                        li:   { color: C.textSecondary, fontSize: 15, lineHeight: 24 },
-                        body: { backgroundColor: C.background },
-                    }}
-                />
+                {body === null && <ActivityIndicator color={C.accent} />}
+                {body === false && (
+                    <Text style={{ color: C.textSecondary, fontSize: 15, lineHeight: 25 }}>
+                        {news.summary}
+                    </Text>
+                )}
+                {typeof body === 'string' && (
+                    <RenderHtml
+                        contentWidth={width - 40}
+                        source={{ html: body }}
+                        tagsStyles={{
+                            p:    { color: C.textSecondary, fontSize: 15, lineHeight: 25, marginBottom: 12 },
+                            a:    { color: C.accent },
+                            h1:   { color: C.textPrimary, fontSize: 20, fontWeight: '700', marginBottom: 8 },
+                            h2:   { color: C.textPrimary, fontSize: 17, fontWeight: '600', marginBottom: 8 },
+                            h3:   { color: C.textPrimary, fontSize: 15, fontWeight: '600', marginBottom: 6 },
+                            li:   { color: C.textSecondary, fontSize: 15, lineHeight: 24 },
+                            body: { backgroundColor: C.background },
+                        }}
+                    />
+                )}
             </ScrollView>
         </SafeAreaView>
     );
@@ -8,6 +8,7 @@ import { CandlestickChart } from 'react-native-wagmi-charts';
 
 import { checkRateLimit, capitalizeFLetter, TickersContext } from './utils';
 import ThemeContext from './themes/ThemeContext';
+import { BACKEND_URL } from './constants';
 
 const { width } = Dimensions.get('window');
 
@@ -30,10 +31,11 @@ const TickerDetailScreen = ({ route, navigation }) => {
     useEffect(() => {
         if (!ticker?.ticker) return;
         setLoading(true);
-        const url = `https://api-pub.bitfinex.com/v2/candles/trade:${selectedInterval.tf}:${ticker.ticker}/hist?limit=${selectedInterval.limit}`;
+        const url = `${BACKEND_URL}/candles?symbols=${ticker.ticker}&tf=${selectedInterval.tf}&limit=${selectedInterval.limit}`;
         fetch(url)
             .then(checkRateLimit).then(r => r.json())
-            .then(data => {
+            .then(({ candles }) => {
+                const data = candles?.[ticker.ticker];
                 if (Array.isArray(data)) {
                     const transformed = data
                         .map(c => ({ timestamp: c[0], open: c[1], close: c[2], high: c[3], low: c[4] }))
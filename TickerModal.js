@@ -6,6 +6,7 @@ import {
 import { CandlestickChart } from 'react-native-wagmi-charts';
 import { checkRateLimit, capitalizeFLetter } from './utils';
 import ThemeContext from './themes/ThemeContext';
+import { BACKEND_URL } from './constants';
 
 const { width } = Dimensions.get('window');
 
@@ -19,11 +20,12 @@ const TickerModal = ({ visible, tickerData, onClose, navigation }) => {
     useEffect(() => {
         if (visible && tickerData?.[0]) {
             setLoading(true);
-            const endpoint = `https://api-pub.bitfinex.com/v2/candles/trade:1h:${tickerData[0]}/hist?limit=10`;
+            const endpoint = `${BACKEND_URL}/candles?symbols=${tickerData[0]}&tf=1h&limit=10`;
             fetch(endpoint)
                 .then(checkRateLimit)
                 .then(r => r.json())
-                .then(data => {
+                .then(({ candles }) => {
+                    const data = candles?.[tickerData[0]] ?? [];
                     const transformed = data
                         .map(c => ({ timestamp: c[0], open: c[1], close: c[2], high: c[3], low: c[4] }))
                         .sort((a, b) => a.timestamp - b.timestamp);
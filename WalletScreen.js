@@ -161,7 +161,9 @@ const WalletScreen = () => {
 
                                     {/* Available */}
                                     <Text style={{ fontSize: 13, color: C.textSecondary, fontFamily: 'Inter', width: 90, textAlign: 'right', fontVariant: ['tabular-nums'] }}>
-                                        {wallet.available_balance.toLocaleString(undefined, { maximumFractionDigits: 4 })}
+                                        {wallet.available_balance != null
+                                            ? wallet.available_balance.toLocaleString(undefined, { maximumFractionDigits: 4 })
+                                            : '—'}
                                     </Text>
 
                                     {/* USD value */}
@@ -0,0 +1,46 @@
+"""
+ASGI entry point.
+
+Serves the same Flask app under an ASGI server so connection handling is
+event-driven instead of one blocking dev-server thread per client:
+
+    uvicorn asgi:asgi_app --host 0.0.0.0 --port 8000 --limit-concurrency 256
+
+or simply `python asgi.py`, which reads the limits below from the environment.
+Flask handlers run on a bounded thread pool, and blocking upstream work
+inside a request is fanned out through services.fanout, so independent
+Bitfinex calls still overlap.
+"""
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from main import app, SERVER_HOST, SERVER_PORT
+from services.readiness import WARMUP_ON_START, readiness
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+ASGI_WORKERS           = int(os.environ.get('ASGI_WORKERS', 1))
+# Requests accepted concurrently per worker before the server answers 503.
+ASGI_LIMIT_CONCURRENCY = int(os.environ.get('ASGI_LIMIT_CONCURRENCY', 256))
+# Threads per worker running the (synchronous) Flask handlers.
+ASGI_THREADS           = int(os.environ.get('ASGI_THREADS', 64))
+ASGI_KEEPALIVE_TIMEOUT = int(os.environ.get('ASGI_KEEPALIVE_TIMEOUT', 5))
+
+asgi_app = WSGIMiddleware(app, workers=ASGI_THREADS)
+
+# Schema check and cache warm-up start now; /readyz turns 200 when they finish
+if WARMUP_ON_START:
+    readiness.start(app)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(
+        'asgi:asgi_app',
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=ASGI_WORKERS,
+        limit_concurrency=ASGI_LIMIT_CONCURRENCY,
+        timeout_keep_alive=ASGI_KEEPALIVE_TIMEOUT,
+    )
@@ -0,0 +1,298 @@
+"""
+Local stand-in for the Bitfinex REST (v2) and websocket APIs.
+
+Replays the fixtures in bench/fixtures/ (tickers, conf maps, wallets,
+candles, news posts, order and deposit-address notifications, plus a
+CoinGecko coin list), optionally slowed down or failing on purpose, and
+counts every call it receives so a benchmark can report how much upstream
+traffic each scenario caused.
+
+    python -m bench.fake_bitfinex --latency-ms 80 --error-rate 0.02
+
+then point the backend at it with BFX_PUB_REST_HOST / BFX_REST_HOST,
+MARKET_DATA_WSS_HOST / WALLET_WSS_HOST and COINGECKO_REST_HOST (bench.run
+does this for you).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import websockets
+
+from services.instrumentation import endpoint_of
+
+log = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+_MINUTE = 60 * 1000
+_TIMEFRAMES = {'m': _MINUTE, 'h': 60 * _MINUTE, 'D': 24 * 60 * _MINUTE, 'W': 7 * 24 * 60 * _MINUTE,
+               'M': 30 * 24 * 60 * _MINUTE}
+
+
+def load_fixtures(path: str = FIXTURES_DIR) -> Dict[str, Any]:
+    fixtures = {}
+    for name in os.listdir(path):
+        if name.endswith('.json'):
+            with open(os.path.join(path, name)) as f:
+                fixtures[name[:-5]] = json.load(f)
+    return fixtures
+
+
+def _timeframe_ms(tf: str) -> int:
+    """'1m' → 60000, '12h' → 43200000, '1D' → 86400000."""
+    return int(tf[:-1]) * _TIMEFRAMES[tf[-1]]
+
+
+class FakeBitfinex:
+    """
+    REST on one port, websocket on another, both on 127.0.0.1.
+
+    latency_ms / jitter_ms delay every REST response (uniformly ± jitter);
+    error_rate answers that share of REST calls with a 500 and
+    rate_limit_rate with a 429, both in Bitfinex's ["error", code, msg] shape;
+    429s carry `Retry-After: retry_after` when it is set.
+    """
+
+    def __init__(self, fixtures: Optional[Dict[str, Any]] = None, latency_ms: float = 0,
+                 jitter_ms: float = 0, error_rate: float = 0, rate_limit_rate: float = 0,
+                 retry_after: Optional[float] = None, seed: Optional[int] = None):
+        self.fixtures        = fixtures if fixtures is not None else load_fixtures()
+        self.latency_ms      = latency_ms
+        self.jitter_ms       = jitter_ms
+        self.error_rate      = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after     = retry_after
+
+        self.calls  = Counter()   # '<METHOD> <endpoint>' → count; 'WS connect' for sockets
+        self._lock   = threading.Lock()
+        self._random = random.Random(seed)
+        self._http   = None
+        self._ws_port = None
+        self._ws_loop = None
+        self._ws_stop = None
+        self._ws_open = set()
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    @property
+    def rest_url(self) -> str:
+        return f'http://127.0.0.1:{self._http.server_address[1]}/v2'
+
+    @property
+    def wss_url(self) -> str:
+        return f'ws://127.0.0.1:{self._ws_port}/ws/2'
+
+    def start(self) -> 'FakeBitfinex':
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._http.daemon_threads = True
+        threading.Thread(target=self._http.serve_forever, name='fake-bfx-rest', daemon=True).start()
+
+        ready = threading.Event()
+        threading.Thread(target=self._serve_ws, args=(ready,), name='fake-bfx-ws', daemon=True).start()
+        ready.wait(5)
+        return self
+
+    def stop(self) -> None:
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+        if self._ws_loop is not None:
+            self._ws_loop.call_soon_threadsafe(self._ws_stop.set_result, None)
+
+    def drop_websockets(self, code: int = 1000) -> None:
+        """Close every open websocket from the server side, as a Bitfinex restart would."""
+        async def close_all():
+            await asyncio.gather(*(ws.close(code=code) for ws in list(self._ws_open)),
+                                 return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(close_all(), self._ws_loop).result(5)
+
+    def take_calls(self) -> Dict[str, int]:
+        """Calls counted since the last take, and reset the counter."""
+        with self._lock:
+            calls = dict(self.calls)
+            self.calls.clear()
+        return calls
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.calls[key] += 1
+
+    # ── REST ──────────────────────────────────────────────────────────────────
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._handle('GET', None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body   = self.rfile.read(length) if length else b''
+                self._handle('POST', json.loads(body) if body else {})
+
+            def _handle(self, method: str, body: Optional[dict]):
+                url    = urlsplit(self.path)
+                path   = url.path.split('/v2/', 1)[-1]
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                fake._count(f'{method} {endpoint_of(url.path)}')
+
+                status, payload = fake._respond(path, params, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if status == 429 and fake.retry_after is not None:
+                    self.send_header('Retry-After', str(fake.retry_after))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _respond(self, path: str, params: Dict[str, str], body: Optional[dict]) -> Tuple[int, Any]:
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        roll = self._random.random()
+        if roll < self.error_rate:
+            return 500, ['error', 10001, 'fake: injected server error']
+        if roll < self.error_rate + self.rate_limit_rate:
+            return 429, ['error', 11010, 'ratelimit: error']
+
+        fx = self.fixtures
+        if path == 'tickers':
+            symbols = params.get('symbols', 'ALL').split(',')
+            return 200, [t for t in fx['tickers'] if 'ALL' in symbols or t[0] in symbols]
+        if path.startswith('ticker/'):
+            for t in fx['tickers']:
+                if t[0] == path[7:]:
+                    return 200, t[1:]
+            return 500, ['error', 10020, 'symbol: invalid']
+        if path.startswith('conf/'):
+            if path[5:] in fx['conf']:
+                return 200, fx['conf'][path[5:]]
+            return 500, ['error', 10020, 'conf: invalid']
+        if path.startswith('candles/'):
+            return 200, self._candles(path, params)
+        if path == 'posts/hist':
+            return 200, fx['posts'][:int(params.get('limit') or 20)]
+        if path == 'coins/list':   # CoinGecko, served here too (COINGECKO_REST_HOST)
+            return 200, fx['coins']
+
+        if path == 'auth/r/wallets':
+            return 200, fx['wallets']
+        if path == 'auth/r/info/user':
+            return 200, fx['user_info']
+        if path in ('auth/r/trades/hist', 'auth/r/ledgers/hist'):
+            return 200, []   # portfolio ingestion: bench accounts have no history
+        if path == 'auth/w/order/submit':
+            return 200, self._order(body or {})
+        if path == 'auth/w/deposit/address':
+            return 200, fx['deposit_address']
+        return 404, ['error', 10020, f'fake: no fixture for {path}']
+
+    def _candles(self, path: str, params: Dict[str, str]) -> list:
+        # candles/trade:1h:tBTCUSD/hist — the fixture bars are replayed on
+        # the requested timeframe, ending in the bar forming right now.
+        tf    = path.split('/')[1].split(':')[1]
+        step  = _timeframe_ms(tf)
+        now   = int(time.time() * 1000) // step * step
+        bars  = [[now - i * step] + bar for i, bar in enumerate(self.fixtures['candles'])]  # newest first
+        if params.get('start'):
+            bars = [b for b in bars if b[0] >= int(params['start'])]
+        if params.get('sort') == '1':
+            bars.reverse()
+        return bars[:int(params.get('limit') or 100)]
+
+    def _order(self, body: dict) -> list:
+        notification = json.loads(json.dumps(self.fixtures['order_submit']))
+        order        = notification[4][0]
+        mts          = int(time.time() * 1000)
+        notification[0] = mts
+        order[0]        = mts   # order id
+        order[3]        = body.get('symbol', order[3])
+        order[6] = order[7] = float(body.get('amount', 0))
+        return notification
+
+    # ── Websocket ─────────────────────────────────────────────────────────────
+    def _serve_ws(self, ready: threading.Event) -> None:
+        async def main():
+            self._ws_stop = asyncio.get_running_loop().create_future()
+            async with websockets.serve(self._ws_handler, '127.0.0.1', 0) as server:
+                self._ws_port = next(iter(server.sockets)).getsockname()[1]
+                ready.set()
+                await self._ws_stop
+
+        self._ws_loop = asyncio.new_event_loop()
+        self._ws_loop.run_until_complete(main())
+
+    async def _ws_handler(self, ws, path=None):
+        self._count('WS connect')
+        self._ws_open.add(ws)
+        try:
+            await self._ws_session(ws)
+        finally:
+            self._ws_open.discard(ws)
+
+    async def _ws_session(self, ws) -> None:
+        await ws.send(json.dumps({'event': 'info', 'version': 2, 'platform': {'status': 1}}))
+        channel = 100
+        wallets = {}
+        async for raw in ws:
+            message = json.loads(raw)
+            if isinstance(message, dict) and message.get('event') == 'subscribe':
+                channel += 1
+                self._count('WS subscribe')
+                symbol = message.get('symbol')
+                ticker = next((t for t in self.fixtures['tickers'] if t[0] == symbol), None)
+                await ws.send(json.dumps({'event': 'subscribed', 'channel': 'ticker', 'chanId': channel,
+                                          'symbol': symbol, 'subId': message.get('subId'),
+                                          'pair': symbol[1:] if symbol else None}))
+                if ticker is not None:
+                    await ws.send(json.dumps([channel, ticker[1:]]))
+            elif isinstance(message, dict) and message.get('event') == 'auth':
+                self._count('WS auth')
+                await ws.send(json.dumps({'event': 'auth', 'status': 'OK', 'chanId': 0, 'userId': 1}))
+                wallets = {(w[0], w[1]): w for w in self.fixtures['wallets']}
+                # Like Bitfinex, the snapshot leaves available balance out until calc'd
+                await ws.send(json.dumps([0, 'ws', [w[:4] + [None, None, None] for w in wallets.values()]]))
+            elif isinstance(message, list) and len(message) > 3 and message[1] == 'calc':
+                for (name,) in message[3]:
+                    _, wallet_type, currency = name.split('_', 2)
+                    wallet = wallets.get((wallet_type, currency))
+                    if wallet is not None:
+                        await ws.send(json.dumps([0, 'wu', wallet]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0)
+    args = parser.parse_args()
+
+    fake = FakeBitfinex(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate).start()
+    print(f'BFX_PUB_REST_HOST={fake.rest_url}\nBFX_REST_HOST={fake.rest_url}\n'
+          f'MARKET_DATA_WSS_HOST={fake.wss_url}\nWALLET_WSS_HOST={fake.wss_url}\n'
+          f'COINGECKO_REST_HOST={fake.rest_url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,115 @@
+"""
+Import-time profile of the backend, checked against a cold-start budget.
+
+From backend/:
+
+    python -m bench.import_profile                 # median of 5 fresh interpreters
+    python -m bench.import_profile --budget-ms 500 --top 25 --json
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and
+reports the total import time of `main` (median of --runs), the slowest
+modules by cumulative and by self time, and whether any module that must
+load lazily (bfxapi, bcrypt, Pillow, requests, ...) was imported at startup.
+Exits 1 when the budget is exceeded or a lazy module was loaded eagerly, so
+it can gate CI.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time of `main` in a fresh interpreter, in milliseconds.
+COLD_START_BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', 800))
+
+# Loaded on first use only; importing any of them at startup is a regression.
+LAZY_MODULES = ('bfxapi', 'websockets', 'pyee', 'bcrypt', 'PIL', 'requests', 'urllib3', 'certifi')
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def _profile_once() -> List[Tuple[str, int, int, int]]:
+    """[(module, self µs, cumulative µs, depth)] for one cold `import main`."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                          cwd=BACKEND_DIR, capture_output=True, text=True,
+                          env={**os.environ, 'LOG_LEVEL': 'WARNING'})
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f'import main failed with exit code {proc.returncode}')
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    # Children are listed before their parent: keep only main's subtree, not
+    # what the interpreter imported at startup (site, .pth hooks)
+    end   = next(i for i, row in enumerate(rows) if row[0] == 'main' and row[3] == 0)
+    start = max((i + 1 for i in range(end) if rows[i][3] == 0), default=0)
+    return rows[start:end + 1]
+
+
+def _loaded_lazy_modules() -> List[str]:
+    # Only what `import main` added: the interpreter may preload some (e.g. certifi via .pth)
+    code = ('import json, sys; before = set(sys.modules); import main; '
+            f'print(json.dumps(sorted(m for m in {LAZY_MODULES!r} '
+            'if m in sys.modules and m not in before)))')
+    proc = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, capture_output=True,
+                          text=True, env={**os.environ, 'LOG_LEVEL': 'WARNING'})
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f'import main failed with exit code {proc.returncode}')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Import-time profile of `import main`.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    runs   = [_profile_once() for _ in range(max(1, args.runs))]
+    totals = [next(cum for name, _, cum, _ in rows if name == 'main') / 1000 for rows in runs]
+    median = statistics.median(totals)
+
+    # The run closest to the median stands in for the per-module breakdown
+    rows = runs[min(range(len(runs)), key=lambda i: abs(totals[i] - median))]
+    by_cumulative = sorted(((n, c) for n, _, c, d in rows if d == 1), key=lambda r: -r[1])[:args.top]
+    by_self       = sorted(((n, s) for n, s, _, _ in rows), key=lambda r: -r[1])[:args.top]
+    eager         = _loaded_lazy_modules()
+
+    report = {
+        'total_ms':   round(median, 1),
+        'runs_ms':    [round(t, 1) for t in totals],
+        'budget_ms':  args.budget_ms,
+        'within_budget': median <= args.budget_ms,
+        'eager_lazy_modules': eager,
+        'top_cumulative_ms': {n: round(c / 1000, 1) for n, c in by_cumulative},
+        'top_self_ms':       {n: round(s / 1000, 1) for n, s in by_self},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import main: {report['total_ms']} ms (median of {len(totals)}; "
+              f"budget {args.budget_ms:g} ms) — {'OK' if report['within_budget'] else 'OVER BUDGET'}")
+        print('\nSlowest direct imports of main (cumulative):')
+        for name, ms in report['top_cumulative_ms'].items():
+            print(f'  {ms:>8.1f} ms  {name}')
+        print('\nSlowest modules (self):')
+        for name, ms in report['top_self_ms'].items():
+            print(f'  {ms:>8.1f} ms  {name}')
+        if eager:
+            print(f"\nLoaded at startup but should be lazy: {', '.join(eager)}")
+
+    return 0 if report['within_budget'] and not eager else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
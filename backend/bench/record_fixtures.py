@@ -0,0 +1,49 @@
+"""
+Refresh the public fixtures in bench/fixtures/ from the live Bitfinex API.
+
+    python -m bench.record_fixtures
+
+Records tickers, the conf maps the backend reads, 500 hourly BTCUSD
+candles and the latest news posts.  The authenticated fixtures (wallets,
+user info, order and deposit notifications) are hand-written and left
+untouched.
+"""
+import json
+import os
+
+import requests
+
+from bench.fake_bitfinex import FIXTURES_DIR
+
+PUB_REST_HOST = 'https://api-pub.bitfinex.com/v2'
+CONF_KEYS     = ('pub:list:pair:exchange', 'pub:map:currency:label',
+                 'pub:map:currency:sym', 'pub:map:tx:method')
+
+
+def _get(path: str, **params):
+    response = requests.get(f'{PUB_REST_HOST}/{path}', params=params, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def _write(name: str, data, one_row_per_line: bool = False) -> None:
+    with open(os.path.join(FIXTURES_DIR, f'{name}.json'), 'w') as f:
+        if one_row_per_line:
+            f.write('[\n' + ',\n'.join(json.dumps(row) for row in data) + '\n]\n')
+        else:
+            json.dump(data, f, indent=1)
+            f.write('\n')
+    print(f'{name}.json: {len(data)} entries')
+
+
+def main() -> None:
+    _write('tickers', _get('tickers', symbols='ALL'), one_row_per_line=True)
+    _write('conf', {key: _get(f'conf/{key}') for key in CONF_KEYS})
+    # Timestamps are dropped: the fake re-bases bars onto the current time
+    candles = _get('candles/trade:1h:tBTCUSD/hist', limit=500)
+    _write('candles', [bar[1:] for bar in candles], one_row_per_line=True)
+    _write('posts', _get('posts/hist', limit=50, type=1), one_row_per_line=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+"""
+Load-test the real Flask app against the local Bitfinex stand-in.
+
+From backend/:
+
+    python -m bench.run                                   # default profile, every scenario
+    python -m bench.run --profile smoke --scenarios tickers,wallet
+    python -m bench.run --latency-ms 120 --jitter-ms 40 --error-rate 0.01
+    python -m bench.run --compare bench/results/<earlier>.json
+    python -m bench.run --env UPSTREAM_PUBLIC_RATE=0 --env WALLET_SESSIONS_ENABLED=1
+
+Each scenario hammers one route from N concurrent clients for a fixed time
+and reports throughput, p50/p95/p99 latency, non-2xx responses and the
+upstream calls (REST per endpoint, websocket connects) it caused.  Results
+are written as JSON under bench/results/, named by time and git commit, so
+runs from different commits can be compared with --compare.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+from bench.fake_bitfinex import FakeBitfinex
+
+BENCH_DIR   = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+
+@dataclass(frozen=True)
+class Scenario:
+    method: str
+    path:   str                       # {user} is replaced per request
+    body:   Optional[dict] = None
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    'tickers': Scenario('GET',  '/get-tickers'),
+    'wallet':  Scenario('GET',  '/wallet/balances?user_id={user}'),
+    'price':   Scenario('GET',  '/trade/price?symbol=BTC&quote_currency=USD'),
+    'order':   Scenario('POST', '/trade/order',
+                        body={'user_id': '{user}', 'symbol': 'BTC', 'side': 'buy',
+                              'amount_usd': 25, 'quote_currency': 'USD'}),
+    'deposit': Scenario('GET',  '/deposit/methods?currency=USDT'),
+    'news':    Scenario('GET',  '/news?limit=20'),
+    'coins':   Scenario('GET',  '/coins/index'),
+    'history': Scenario('GET',  '/tickers/history?tf=1m&limit=60&format=columnar&fields=close'),
+}
+
+
+@dataclass(frozen=True)
+class Profile:
+    concurrency: int
+    duration:    float      # seconds per scenario
+    warmup:      int        # unmeasured requests per scenario first
+
+
+PROFILES: Dict[str, Profile] = {
+    'smoke':   Profile(concurrency=2,  duration=2,  warmup=2),
+    'default': Profile(concurrency=16, duration=10, warmup=10),
+    'burst':   Profile(concurrency=64, duration=10, warmup=10),
+}
+
+
+@dataclass
+class Result:
+    latencies: List[float] = field(default_factory=list)   # seconds, successful and failed
+    statuses:  Dict[str, int] = field(default_factory=dict)
+    errors:    int = 0                                      # non-2xx or no response
+    elapsed:   float = 0.0
+    upstream:  Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        lat = sorted(self.latencies)
+        n   = len(lat)
+
+        def pct(p: float) -> Optional[float]:
+            return round(lat[max(0, math.ceil(p / 100 * n) - 1)] * 1000, 2) if n else None
+
+        return {
+            'requests':   n,
+            'errors':     self.errors,
+            'statuses':   self.statuses,
+            'throughput': round(n / self.elapsed, 1) if self.elapsed else 0.0,
+            'latency_ms': {
+                'mean': round(sum(lat) / n * 1000, 2) if n else None,
+                'p50':  pct(50),
+                'p95':  pct(95),
+                'p99':  pct(99),
+                'max':  round(lat[-1] * 1000, 2) if n else None,
+            },
+            'upstream': {
+                'total':        sum(v for k, v in self.upstream.items() if not k.startswith('WS')),
+                'per_request':  round(sum(v for k, v in self.upstream.items()
+                                          if not k.startswith('WS')) / n, 3) if n else None,
+                'calls':        dict(sorted(self.upstream.items())),
+            },
+        }
+
+
+# ── Environment ───────────────────────────────────────────────────────────────
+def _prepare_env(fake: FakeBitfinex, workdir: str, overrides: List[str]) -> None:
+    """Point the app at the fake and a throwaway DB/cache; must run before `import main`."""
+    os.environ.update({
+        'BFX_PUB_REST_HOST':    fake.rest_url,
+        'BFX_REST_HOST':        fake.rest_url,
+        'MARKET_DATA_WSS_HOST': fake.wss_url,
+        'WALLET_WSS_HOST':      fake.wss_url,
+        'COINGECKO_REST_HOST':  fake.rest_url,
+        'DATABASE_URL':         f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'CACHE_DIR':            os.path.join(workdir, 'cache'),
+        'LOG_LEVEL':            os.environ.get('LOG_LEVEL', 'WARNING'),
+        'FLASK_ENV':            'production',
+    })
+    for item in overrides:
+        key, _, value = item.partition('=')
+        os.environ[key] = value
+
+
+def _serve(app):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-app', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ── Load generation ───────────────────────────────────────────────────────────
+def _request(session: requests.Session, base_url: str, scenario: Scenario, user: str):
+    url  = base_url + scenario.path.replace('{user}', user)
+    body = None
+    if scenario.body is not None:
+        body = {k: (v.replace('{user}', user) if isinstance(v, str) else v)
+                for k, v in scenario.body.items()}
+    return session.request(scenario.method, url, json=body, timeout=60)
+
+
+def run_scenario(base_url: str, scenario: Scenario, profile: Profile, users: List[str],
+                 fake: FakeBitfinex) -> Result:
+    result = Result()
+    lock   = threading.Lock()
+
+    def client(index: int, deadline: Optional[float], count: Optional[int]) -> None:
+        session = requests.Session()
+        user    = users[index % len(users)]
+        done    = 0
+        while (deadline is None or time.perf_counter() < deadline) and (count is None or done < count):
+            started = time.perf_counter()
+            try:
+                status = str(_request(session, base_url, scenario, user).status_code)
+            except requests.RequestException:
+                status = 'error'
+            elapsed = time.perf_counter() - started
+            done += 1
+            if deadline is None:
+                continue   # warm-up
+            with lock:
+                result.latencies.append(elapsed)
+                result.statuses[status] = result.statuses.get(status, 0) + 1
+                if not status.startswith('2'):
+                    result.errors += 1
+
+    with ThreadPoolExecutor(max_workers=profile.concurrency) as pool:
+        list(pool.map(lambda i: client(i, None, 1), range(profile.warmup)))
+
+    fake.take_calls()
+    started  = time.perf_counter()
+    deadline = started + profile.duration
+    with ThreadPoolExecutor(max_workers=profile.concurrency) as pool:
+        list(pool.map(lambda i: client(i, deadline, None), range(profile.concurrency)))
+    result.elapsed  = time.perf_counter() - started
+    result.upstream = fake.take_calls()
+    return result
+
+
+# ── Reporting ─────────────────────────────────────────────────────────────────
+def _print_table(results: Dict[str, dict], baseline: Optional[dict]) -> None:
+    header = f"{'scenario':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'upstream':>9}"
+    print(header)
+    print('─' * len(header))
+    for name, s in results.items():
+        lat = s['latency_ms']
+        print(f"{name:<10} {s['throughput']:>9} {lat['p50']!s:>9} {lat['p95']!s:>9} {lat['p99']!s:>9} "
+              f"{s['errors']:>7} {s['upstream']['total']:>9}")
+        before = (baseline or {}).get('scenarios', {}).get(name)
+        if before:
+            def delta(now, then):
+                if not now or not then:
+                    return '—'
+                return f'{(now - then) / then * 100:+.0f}%'
+            print(f"{'  vs base':<10} {delta(s['throughput'], before['throughput']):>9} "
+                  f"{delta(lat['p50'], before['latency_ms']['p50']):>9} "
+                  f"{delta(lat['p95'], before['latency_ms']['p95']):>9} "
+                  f"{delta(lat['p99'], before['latency_ms']['p99']):>9} "
+                  f"{'':>7} {delta(s['upstream']['total'], before['upstream']['total']):>9}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the backend against a fake Bitfinex.')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='default')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'comma-separated subset of: {", ".join(SCENARIOS)}')
+    parser.add_argument('--concurrency', type=int, help='override the profile')
+    parser.add_argument('--duration', type=float, help='seconds per scenario; overrides the profile')
+    parser.add_argument('--users', type=int, default=4, help='distinct users with saved keys')
+    parser.add_argument('--latency-ms', type=float, default=50, help='fake Bitfinex response delay')
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of REST calls answered 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='share answered 429')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='extra backend configuration, e.g. UPSTREAM_PUBLIC_RATE=0')
+    parser.add_argument('--out', default=RESULTS_DIR, help='directory for the JSON results')
+    parser.add_argument('--compare', help='earlier results file to print deltas against')
+    args = parser.parse_args(argv)
+
+    names = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(unknown)}')
+    base    = PROFILES[args.profile]
+    profile = Profile(concurrency=args.concurrency or base.concurrency,
+                      duration=args.duration or base.duration, warmup=base.warmup)
+
+    fake = FakeBitfinex(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='bfxapp-bench-')
+    _prepare_env(fake, workdir, args.env)
+
+    import database
+    from main import app
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    with app.app_context():
+        database.migrate()
+    server, base_url = _serve(app)
+
+    users = [f'bench-{i}' for i in range(max(1, args.users))]
+    with requests.Session() as session:
+        for i, user in enumerate(users):
+            session.post(f'{base_url}/auth/keys', json={
+                'user_id': user, 'api_key': f'bench-key-{i}', 'api_secret': f'bench-secret-{i}',
+            }, timeout=30).raise_for_status()
+
+    results = {}
+    for name in names:
+        print(f'… {name} ({profile.concurrency} clients, {profile.duration:g}s)', file=sys.stderr)
+        results[name] = run_scenario(base_url, SCENARIOS[name], profile, users, fake).summary()
+
+    server.shutdown()
+    fake.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    _print_table(results, baseline)
+
+    commit = _git_commit()
+    report = {
+        'commit':    commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python':    platform.python_version(),
+        'profile':   {'name': args.profile, **asdict(profile)},
+        'fake':      {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+                      'error_rate': args.error_rate, 'rate_limit_rate': args.rate_limit_rate,
+                      'seed': args.seed},
+        'users':     len(users),
+        'env':       args.env,
+        'scenarios': results,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}-{args.profile}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nResults written to {path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Storage backend configuration and schema migrations.
+
+DATABASE_URL picks the backend (SQLite file next to main.py by default):
+
+    sqlite:////abs/path/bfxapp.db                WAL, synchronous=NORMAL, busy timeout
+    postgresql+psycopg2://user:pw@host/bfxapp    pooled, pre-ping, statement timeout
+
+The schema is created and upgraded by `flask --app main init-db`, not on
+process start, so workers never race each other on DDL.
+"""
+import logging
+import os
+import sqlite3
+from typing import Callable, List, Tuple
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Connection, make_url
+
+from extensions import db
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+BASE_DIR     = os.path.abspath(os.path.dirname(__file__))
+DATABASE_URL = os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(BASE_DIR, 'bfxapp.db')}")
+
+# SQLite: how long a writer waits for the lock before "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+# Postgres: connections kept per process, burst headroom above that, and the
+# longest any single statement may run.
+DB_POOL_SIZE            = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW         = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT         = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE         = int(os.environ.get('DB_POOL_RECYCLE', 30 * 60))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+
+
+def engine_options(url: str) -> dict:
+    """SQLAlchemy create_engine() options for the configured backend."""
+    backend = make_url(url).get_backend_name()
+    if backend == 'sqlite':
+        return {'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    if backend == 'postgresql':
+        return {
+            'pool_size':     DB_POOL_SIZE,
+            'max_overflow':  DB_MAX_OVERFLOW,
+            'pool_timeout':  DB_POOL_TIMEOUT,
+            'pool_recycle':  DB_POOL_RECYCLE,
+            'pool_pre_ping': True,
+            'connect_args':  {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'},
+        }
+    return {'pool_pre_ping': True}
+
+
+def _sqlite_pragmas(dbapi_connection, _record) -> None:
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while one writer commits; NORMAL only fsyncs
+    # at checkpoints, which is still crash-safe in WAL mode.
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def init_app(app: Flask) -> None:
+    """Point Flask-SQLAlchemy at DATABASE_URL with tuned engine options."""
+    app.config['SQLALCHEMY_DATABASE_URI']        = DATABASE_URL
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']      = engine_options(DATABASE_URL)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _sqlite_pragmas)
+
+    app.cli.add_command(init_db_command)
+
+
+# ── Migrations ────────────────────────────────────────────────────────────────
+# Append-only: (version, description, fn(connection)).  Never edit or reorder
+# an entry once it has shipped; add a new one instead.
+def _create_user_keys(conn: Connection) -> None:
+    from models.user_keys import UserKeys
+    UserKeys.__table__.create(conn, checkfirst=True)
+
+
+def _create_portfolio(conn: Connection) -> None:
+    from models.portfolio import PortfolioCursor, PortfolioDaily, PortfolioPosition, PortfolioSnapshot
+    for model in (PortfolioCursor, PortfolioPosition, PortfolioSnapshot, PortfolioDaily):
+        model.__table__.create(conn, checkfirst=True)
+
+
+def _add_user_keys_status(conn: Connection) -> None:
+    # Fresh databases already got these columns from the model in migration 1
+    columns = {c['name'] for c in inspect(conn).get_columns('user_keys')}
+    if 'status' not in columns:
+        conn.execute(text("ALTER TABLE user_keys ADD COLUMN status VARCHAR(16) NOT NULL DEFAULT 'valid'"))
+    if 'validated_at' not in columns:
+        conn.execute(text('ALTER TABLE user_keys ADD COLUMN validated_at TIMESTAMP'))
+
+
+_MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, 'create user_keys', _create_user_keys),
+    (2, 'create portfolio cursors, positions, snapshots and daily rollups', _create_portfolio),
+    (3, 'add user_keys status and validated_at', _add_user_keys_status),
+]
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table('schema_migrations'):
+        return 0
+    return conn.execute(text('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')).scalar()
+
+
+def latest_version() -> int:
+    return max(version for version, _, _ in _MIGRATIONS)
+
+
+def migrate() -> List[int]:
+    """Apply pending migrations, each in its own transaction; returns the versions applied."""
+    applied = []
+    with db.engine.begin() as conn:
+        conn.execute(text('CREATE TABLE IF NOT EXISTS schema_migrations ('
+                          'version INTEGER PRIMARY KEY, description VARCHAR(200) NOT NULL, '
+                          'applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'))
+    for version, description, fn in _MIGRATIONS:
+        with db.engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            log.info('Applying migration %d: %s', version, description)
+            fn(conn)
+            conn.execute(text('INSERT INTO schema_migrations (version, description) VALUES (:v, :d)'),
+                         {'v': version, 'd': description})
+            applied.append(version)
+    return applied
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command() -> None:
+    """Create or upgrade the database schema."""
+    applied = migrate()
+    if applied:
+        click.echo(f'Applied migrations: {", ".join(map(str, applied))}')
+    else:
+        click.echo('Database schema is up to date.')
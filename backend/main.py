@@ -8,13 +8,24 @@ from dotenv import load_dotenv
 # Load .env from the same directory as this file — before anything else
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
-from extensions import db
+import database
+from services import instrumentation
+from services.key_validation import key_validator
+from services.portfolio import portfolio
+from services.readiness import readiness
 from routes.bitfinex import bitfinex
 from routes.images import images
 from routes.auth import auth
 from routes.wallet import wallet
 from routes.trade import trade
 from routes.deposit import deposit
+from routes.candles import candles
+from routes.market import market
+from routes.metrics import metrics
+from routes.health import health
+from routes.news import news
+from routes.coins import coins
+from routes.history import history
 
 # ── Configuration ─────────────────────────────────────────────────────────────
 SERVER_HOST = '0.0.0.0'
@@ -22,15 +33,15 @@ SERVER_PORT = int(os.environ.get('PORT', 8000))
 
 app = Flask(__name__)
 
-# SQLite database stored next to main.py
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(BASE_DIR, 'bfxapp.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-change-in-production')
 app.config['DEBUG'] = os.environ.get('FLASK_ENV', 'development') == 'development'
 
 # ── Extensions ────────────────────────────────────────────────────────────────
-db.init_app(app)
+database.init_app(app)   # DATABASE_URL; schema via `flask --app main init-db`
+instrumentation.init_app(app)   # /metrics histograms, opt-in Server-Timing
+readiness.init_app(app)         # warm-up on first request; /readyz reports it
+portfolio.init_app(app)         # background trades/ledgers ingestion for /wallet/history
+key_validator.init_app(app)     # saved API keys are checked against Bitfinex off the request path
 CORS(app)
 
 login_manager = LoginManager(app)
@@ -42,14 +53,20 @@ app.register_blueprint(auth)
 app.register_blueprint(wallet)
 app.register_blueprint(trade)
 app.register_blueprint(deposit)
+app.register_blueprint(candles)
+app.register_blueprint(market)
+app.register_blueprint(metrics)
+app.register_blueprint(health)
+app.register_blueprint(news)
+app.register_blueprint(coins)
+app.register_blueprint(history)
 
 # ── Bootstrap ─────────────────────────────────────────────────────────────────
-logging.basicConfig(level=logging.DEBUG)
-
-with app.app_context():
-    db.create_all()
-    logging.info('Database tables created / verified.')
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'DEBUG').upper())
 
 # ── Run ───────────────────────────────────────────────────────────────────────
 if __name__ == '__main__':
+    # The dev server keeps its zero-setup start; deployments run init-db once
+    with app.app_context():
+        database.migrate()
     app.run(debug=True, host=SERVER_HOST, port=SERVER_PORT)
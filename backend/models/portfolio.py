@@ -0,0 +1,65 @@
+from extensions import db
+
+
+class PortfolioCursor(db.Model):
+    """Per-user ingestion state: how far trades and ledgers have been read, and when to run next.
+
+    `*_mts` is inclusive: every entry up to that time has been applied, so
+    the next request starts just after it and nothing is downloaded twice.
+    """
+    __tablename__ = 'portfolio_cursors'
+
+    id                = db.Column(db.Integer, primary_key=True)
+    user_id           = db.Column(db.String(36), unique=True, nullable=False, index=True)
+    trades_mts        = db.Column(db.BigInteger, nullable=False)
+    trades_window_ms  = db.Column(db.BigInteger, nullable=False)
+    ledgers_mts       = db.Column(db.BigInteger, nullable=False)
+    ledgers_window_ms = db.Column(db.BigInteger, nullable=False)
+    cum_flow_usd      = db.Column(db.Float, nullable=False, default=0.0)   # deposits − withdrawals so far
+    snapshot_mts      = db.Column(db.BigInteger, nullable=False, default=0)
+    next_run_mts      = db.Column(db.BigInteger, nullable=False, default=0, index=True)
+    lease_until_mts   = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class PortfolioPosition(db.Model):
+    """Average-cost basis of one currency, as of the user's trades and ledgers cursors."""
+    __tablename__ = 'portfolio_positions'
+    __table_args__ = (db.UniqueConstraint('user_id', 'currency'),)
+
+    id           = db.Column(db.Integer, primary_key=True)
+    user_id      = db.Column(db.String(36), nullable=False, index=True)
+    currency     = db.Column(db.String(16), nullable=False)
+    amount       = db.Column(db.Float, nullable=False, default=0.0)
+    cost_usd     = db.Column(db.Float, nullable=False, default=0.0)
+    realized_usd = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class PortfolioSnapshot(db.Model):
+    """One valuation of a user's wallets; kept for the short history ranges only."""
+    __tablename__ = 'portfolio_snapshots'
+    __table_args__ = (db.Index('ix_portfolio_snapshots_user_mts', 'user_id', 'mts'),)
+
+    id           = db.Column(db.Integer, primary_key=True)
+    user_id      = db.Column(db.String(36), nullable=False)
+    mts          = db.Column(db.BigInteger, nullable=False)
+    value_usd    = db.Column(db.Float, nullable=False)
+    cum_flow_usd = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class PortfolioDaily(db.Model):
+    """Per-user daily rollup (UTC): value open/high/low/close and external flows.
+
+    A day with flows but no valuation yet has NULL value columns.
+    """
+    __tablename__ = 'portfolio_daily'
+    __table_args__ = (db.UniqueConstraint('user_id', 'day_mts'),)
+
+    id           = db.Column(db.Integer, primary_key=True)
+    user_id      = db.Column(db.String(36), nullable=False, index=True)
+    day_mts      = db.Column(db.BigInteger, nullable=False)
+    open_usd     = db.Column(db.Float)
+    high_usd     = db.Column(db.Float)
+    low_usd      = db.Column(db.Float)
+    close_usd    = db.Column(db.Float)
+    net_flow_usd = db.Column(db.Float, nullable=False, default=0.0)
+    cum_flow_usd = db.Column(db.Float, nullable=False, default=0.0)   # through the end of this day
@@ -11,15 +11,20 @@ class UserKeys(db.Model):
     """
     __tablename__ = 'user_keys'
 
-    id         = db.Column(db.Integer, primary_key=True)
-    user_id    = db.Column(db.String(36), unique=True, nullable=False, index=True)
-    api_key    = db.Column(db.String(256), nullable=False)
-    api_secret = db.Column(db.String(256), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id           = db.Column(db.Integer, primary_key=True)
+    user_id      = db.Column(db.String(36), unique=True, nullable=False, index=True)
+    api_key      = db.Column(db.String(256), nullable=False)
+    api_secret   = db.Column(db.String(256), nullable=False)
+    # pending → valid | invalid once Bitfinex has been asked in the background.
+    # Rows saved before validation moved off the request path were checked on save.
+    status       = db.Column(db.String(16), nullable=False, default='pending', server_default='valid')
+    validated_at = db.Column(db.DateTime)
+    created_at   = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at   = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
         return {
             'user_id':    self.user_id,
+            'status':     self.status,
             'created_at': self.created_at.isoformat(),
         }
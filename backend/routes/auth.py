@@ -1,28 +1,26 @@
 import logging
 from flask import Blueprint, request, jsonify
-from bfxapi import Client
 
 from extensions import db
 from models.user_keys import UserKeys
+from services import clients, credentials
+from services.key_validation import INVALID, PENDING, VALID, key_validator
+from services.portfolio import portfolio
+from services.wallet_sessions import wallet_sessions
 
 auth = Blueprint('auth', __name__)
 log  = logging.getLogger(__name__)
 
 
-def _validate_keys(api_key: str, api_secret: str) -> bool:
-    """Returns True when the key pair can authenticate against Bitfinex."""
-    try:
-        bfx = Client(api_key=api_key, api_secret=api_secret)
-        bfx.rest.auth.get_user_info()
-        return True
-    except Exception as e:
-        log.warning('Key validation failed: %s', e)
-        return False
-
-
 # ── POST /auth/keys ───────────────────────────────────────────────────────────
 @auth.route('/auth/keys', methods=['POST'])
 def save_keys():
+    """
+    Store the user's key pair and have it checked against Bitfinex in the
+    background: 202 with status `pending` (poll /auth/status), or 200 when
+    this pair was already validated.  A pair Bitfinex rejected recently is
+    refused with 401 straight away.
+    """
     data       = request.get_json(force=True)
     user_id    = data.get('user_id', '').strip()
     api_key    = data.get('api_key', '').strip()
@@ -31,18 +29,31 @@ def save_keys():
     if not all([user_id, api_key, api_secret]):
         return jsonify({'error': 'user_id, api_key and api_secret are required'}), 400
 
-    if not _validate_keys(api_key, api_secret):
+    existing = UserKeys.query.filter_by(user_id=user_id).first()
+    same     = existing is not None and (existing.api_key, existing.api_secret) == (api_key, api_secret)
+    status   = key_validator.cached(api_key, api_secret) or (VALID if same and existing.status == VALID else PENDING)
+
+    if status == INVALID:
         return jsonify({'error': 'Invalid API keys — Bitfinex rejected the credentials'}), 401
 
-    existing = UserKeys.query.filter_by(user_id=user_id).first()
+    if existing and existing.api_key != api_key:
+        portfolio.reset(user_id)   # possibly another account: its history starts over
     if existing:
         existing.api_key    = api_key
         existing.api_secret = api_secret
+        existing.status     = status
     else:
-        db.session.add(UserKeys(user_id=user_id, api_key=api_key, api_secret=api_secret))
+        db.session.add(UserKeys(user_id=user_id, api_key=api_key, api_secret=api_secret, status=status))
 
     db.session.commit()
-    return jsonify({'message': 'API keys saved successfully'}), 200
+    credentials.invalidate(user_id)
+    if not same:
+        wallet_sessions.close(user_id)
+
+    if status == VALID:
+        return jsonify({'message': 'API keys saved successfully', 'status': status}), 200
+    key_validator.submit(user_id, api_key, api_secret)
+    return jsonify({'message': 'API keys saved; checking them with Bitfinex', 'status': status}), 202
 
 
 # ── DELETE /auth/keys ─────────────────────────────────────────────────────────
@@ -56,6 +67,10 @@ def delete_keys():
 
     deleted = UserKeys.query.filter_by(user_id=user_id).delete()
     db.session.commit()
+    portfolio.reset(user_id)
+    credentials.invalidate(user_id)
+    clients.invalidate(user_id)
+    wallet_sessions.close(user_id)
 
     if deleted:
         return jsonify({'message': 'API keys removed'}), 200
@@ -70,7 +85,8 @@ def get_status():
     if not user_id:
         return jsonify({'error': 'user_id is required'}), 400
 
-    record = UserKeys.query.filter_by(user_id=user_id).first()
-    if record:
-        return jsonify({'connected': True, 'since': record.created_at.isoformat()}), 200
-    return jsonify({'connected': False}), 200
+    creds = credentials.credential_cache.get(user_id)
+    if creds is None:
+        return jsonify({'connected': False}), 200
+    return jsonify({'connected': creds.usable, 'status': creds.status,
+                    'since': creds.created_at.isoformat()}), 200
@@ -1,14 +1,114 @@
-from flask import Blueprint, jsonify
-from utils.helpers import transform_data
-from services.bitfinex_service import fetch_tickers_data
+import os
+import threading
+
+from flask import Blueprint, Response, jsonify, request
+from services.ticker_feed import ticker_feed
+from services.ticker_payloads import ticker_payloads
+from services.ticker_snapshot import ticker_store
+from utils.encoding import EncodedPayload, negotiate, not_acceptable
 
 bitfinex = Blueprint('bitfinex', __name__)
 
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Each open stream holds a server thread; keep this below ASGI_THREADS.
+TICKER_STREAM_MAX_CLIENTS = int(os.environ.get('TICKER_STREAM_MAX_CLIENTS', 32))
+# Seconds between keep-alive comments on an idle stream.
+TICKER_STREAM_HEARTBEAT   = float(os.environ.get('TICKER_STREAM_HEARTBEAT', 15))
+
+_streams = threading.BoundedSemaphore(TICKER_STREAM_MAX_CLIENTS)
+
+
+def _cache_headers(response: Response, snapshot) -> Response:
+    response.headers['Age'] = str(int(snapshot.age))
+    response.headers['Cache-Control'] = (
+        f'public, max-age={max(0, int(ticker_store.refresh_interval - snapshot.age))}, '
+        f'stale-while-revalidate={int(ticker_store.stale_while_revalidate)}'
+    )
+    response.headers['X-Ticker-Seq']   = str(snapshot.seq)
+    response.headers['X-Ticker-Epoch'] = ticker_feed.epoch
+    return response
+
 
 @bitfinex.route('/get-tickers', methods=['GET'])
 def get_tickers():
-    tickers_data = fetch_tickers_data()  # This function is from bitfinex_service.py
-    if not tickers_data:
-        return jsonify({"error": "No tickers data available"}), 400
-    data = transform_data(tickers_data)
-    return jsonify(data)
+    """
+    Full ticker list, or with ?since=<seq>[&epoch=<epoch>] only the pairs that
+    changed after that refresh: {seq, epoch, full: false, changed, removed}.
+    Clients too far behind get {seq, epoch, full: true, tickers} instead.
+
+    Both are negotiated (?format= or Accept): json rows (default), columnar
+    JSON, or columnar msgpack, with `changed`/`tickers` as the columns;
+    bodies are pre-compressed once per refresh.
+    """
+    snapshot = ticker_store.get()  # served from the shared in-memory snapshot
+    if snapshot is None:
+        return jsonify({"error": "No tickers data available"}), 503
+    fmt = negotiate(request)
+    if fmt is None:
+        return not_acceptable()
+
+    since = request.args.get('since')
+    if since is None:
+        payload = ticker_payloads.get(snapshot)
+    else:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({'error': 'since must be an integer sequence number'}), 400
+        delta   = ticker_feed.catch_up(since, request.args.get('epoch'))
+        payload = delta[1] if delta else ticker_feed.full(snapshot)
+
+    response = payload.respond(request, fmt)
+    return _cache_headers(response, snapshot).make_conditional(request)
+
+
+@bitfinex.route('/get-tickers/stream', methods=['GET'])
+def stream_tickers():
+    """
+    Server-sent events: one `snapshot` event, then a `delta` event per refresh
+    (same payloads as /get-tickers?since=).  Reconnecting clients resume from
+    Last-Event-ID ("<epoch>:<seq>") without a full re-download.
+    """
+    snapshot = ticker_store.get()
+    if snapshot is None:
+        return jsonify({"error": "No tickers data available"}), 503
+    if not _streams.acquire(blocking=False):
+        return jsonify({'error': 'Too many open ticker streams, poll /get-tickers?since= instead'}), 503
+
+    epoch, _, seq = request.headers.get('Last-Event-ID', '').partition(':')
+    resume = int(seq) if seq.isdigit() and epoch == ticker_feed.epoch else None
+
+    def events():
+        yield 'retry: 5000\n\n'
+        delta = ticker_feed.catch_up(resume) if resume is not None else None
+        if delta is None:
+            seq = snapshot.seq
+            yield _event('snapshot', seq, ticker_feed.full(snapshot))
+        else:
+            seq = delta[0]
+            yield _event('delta', seq, delta[1])
+
+        while True:
+            if ticker_feed.wait(seq, TICKER_STREAM_HEARTBEAT) <= seq:
+                yield ': keep-alive\n\n'
+                continue
+            delta = ticker_feed.catch_up(seq)
+            if delta is None:
+                latest = ticker_store.snapshot
+                seq    = latest.seq
+                yield _event('snapshot', seq, ticker_feed.full(latest))
+            else:
+                seq = delta[0]
+                yield _event('delta', seq, delta[1])
+
+    response = Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control':     'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    response.call_on_close(_streams.release)
+    return response
+
+
+def _event(name: str, seq: int, payload: EncodedPayload) -> str:
+    body = payload.json_body.decode('utf-8')
+    return f'id: {ticker_feed.epoch}:{seq}\nevent: {name}\ndata: {body}\n\n'
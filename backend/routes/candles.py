@@ -0,0 +1,64 @@
+import logging
+
+from flask import Blueprint, request, jsonify
+
+from services.candle_cache import CANDLE_MAX_BARS, FIELDS, TIMEFRAME_MS, candle_cache, to_columns
+from utils.encoding import negotiate, not_acceptable, respond
+
+candles = Blueprint('candles', __name__)
+log     = logging.getLogger(__name__)
+
+# Symbols accepted in one batch request (a full markets screen)
+MAX_SYMBOLS = 250
+
+
+# ── GET /candles ──────────────────────────────────────────────────────────────
+@candles.route('/candles', methods=['GET'])
+def get_candles():
+    """
+    OHLC bars for one or many symbols from the shared candle cache.
+
+    Query params:
+        symbols – comma-separated t-symbols, e.g. tBTCUSD,tETHUSD
+        tf      – Bitfinex timeframe (1m … 1M), default 1h
+        limit   – bars per symbol, default 24
+        format  – json (default, Bitfinex [mts, open, close, high, low, volume]
+                  rows, oldest first), columnar (one array per field) or
+                  msgpack (columnar as MessagePack); or the Accept header
+        fields  – columnar/msgpack only: subset of mts,open,close,high,low,volume,
+                  e.g. fields=close for sparklines
+
+    A cold batch fetches only a few series per request: symbols listed in
+    `pending` have no bars yet and should be requested again shortly.
+    """
+    symbols = [s.strip() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    tf      = request.args.get('tf', '1h').strip()
+    fmt     = negotiate(request)
+    fields  = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+
+    if not symbols:
+        return jsonify({'error': 'symbols is required'}), 400
+    if len(symbols) > MAX_SYMBOLS:
+        return jsonify({'error': f'At most {MAX_SYMBOLS} symbols per request'}), 400
+    if tf not in TIMEFRAME_MS:
+        return jsonify({'error': f'tf must be one of {", ".join(TIMEFRAME_MS)}'}), 400
+    if fmt is None:
+        return not_acceptable()
+    if any(f not in FIELDS for f in fields):
+        return jsonify({'error': f'fields must be a subset of {",".join(FIELDS)}'}), 400
+
+    try:
+        limit = int(request.args.get('limit', 24))
+        if not 1 <= limit <= CANDLE_MAX_BARS:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'limit must be between 1 and {CANDLE_MAX_BARS}'}), 400
+
+    bars, errors, pending = candle_cache.get_many(list(dict.fromkeys(symbols)), tf, limit)
+    for symbol, error in errors.items():
+        log.warning('Candle fetch failed for %s %s: %s', symbol, tf, error)
+
+    payload = {'tf': tf, 'limit': limit, 'format': fmt, 'candles': bars, 'errors': errors,
+               'pending': pending}
+    return respond(fmt, payload, lambda p: {
+        **p, 'candles': {symbol: to_columns(rows, fields) for symbol, rows in p['candles'].items()}}), 200
@@ -0,0 +1,37 @@
+from flask import Blueprint, Response, jsonify, redirect, request, url_for
+
+from services.coingecko_index import coingecko_index
+
+coins = Blueprint('coins', __name__)
+
+# A versioned URL (?v=<version>) never changes meaning
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# The unversioned URL; clients revalidate with If-None-Match after this
+MUTABLE_MAX_AGE   = 60 * 60
+
+
+# ── GET /coins/index ──────────────────────────────────────────────────────────
+@coins.route('/coins/index', methods=['GET'])
+def get_index():
+    """
+    CoinGecko coin for each currency we list: {"version": "…", "coins": {"BTC": ["bitcoin", "Bitcoin"], …}}.
+
+    Keyed by Bitfinex currency code (a ticker's baseCurrency).  The ETag is
+    the version; ?v=<version> asks for one specific version, cacheable
+    forever, and redirects to the current one once it has moved on.
+    """
+    index = coingecko_index.get()
+    if not index.coins:
+        return jsonify({'error': 'CoinGecko index not available yet'}), 503
+
+    requested = request.args.get('v')
+    if requested and requested != index.version:
+        return redirect(url_for('coins.get_index', v=index.version))
+
+    response = Response(index.body, mimetype='application/json')
+    response.set_etag(index.version)
+    response.cache_control.public  = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE if requested else MUTABLE_MAX_AGE
+    if requested:
+        response.cache_control.immutable = True
+    return response.make_conditional(request)
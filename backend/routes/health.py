@@ -0,0 +1,21 @@
+from flask import Blueprint, current_app, jsonify
+
+from services.readiness import readiness
+
+health = Blueprint('health', __name__)
+
+
+# ── GET /healthz ──────────────────────────────────────────────────────────────
+@health.route('/healthz', methods=['GET'])
+def liveness():
+    """The process is up and answering; never touches the DB or Bitfinex."""
+    return jsonify({'status': 'ok'}), 200
+
+
+# ── GET /readyz ───────────────────────────────────────────────────────────────
+@health.route('/readyz', methods=['GET'])
+def get_readiness():
+    """200 once schema, pair index and ticker snapshot are warm; 503 with per-step status until then."""
+    readiness.start(current_app._get_current_object())
+    report = readiness.report()
+    return jsonify(report), 200 if report['ready'] else 503
@@ -0,0 +1,90 @@
+from flask import Blueprint, jsonify, request
+
+from services.ticker_history import FIELDS, RESOLUTIONS, ticker_history
+from utils.encoding import negotiate, not_acceptable, respond
+
+history = Blueprint('history', __name__)
+
+# Longest change window accepted, in hours (a week, what 1h bars hold by default)
+MAX_WINDOW_HOURS = 7 * 24
+
+
+def _symbols():
+    """?symbols=tBTCUSD,… (deduplicated), or every symbol with history when omitted."""
+    symbols = [s.strip() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    return list(dict.fromkeys(symbols)) or ticker_history.symbols()
+
+
+def _optional_int(name: str):
+    value = request.args.get(name, '').strip()
+    return int(value) if value else None
+
+
+# ── GET /tickers/history ──────────────────────────────────────────────────────
+@history.route('/tickers/history', methods=['GET'])
+def get_history():
+    """
+    Price bars recorded locally from the ticker snapshots; no upstream call.
+
+    Query params:
+        symbols – comma-separated t-symbols (default: every symbol with history)
+        tf      – 1m, 1h or 1D (default 1h)
+        limit   – newest bars per symbol (default 24, at most what tf retains)
+        start   – only bars from this mts on (ms)
+        end     – only bars up to this mts (ms)
+        format  – json (default, [mts, open, close, high, low, volume] rows,
+                  oldest first), columnar or msgpack, negotiated as for /candles
+        fields  – columnar/msgpack only: subset of mts,open,close,high,low,volume,
+                  e.g. fields=close for sparklines
+
+    `volume` is the rolling 24h volume as last seen in each bar.  History
+    starts when the server does: use /candles for anything older.
+    """
+    tf     = request.args.get('tf', '1h').strip()
+    fmt    = negotiate(request)
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+
+    if tf not in RESOLUTIONS:
+        return jsonify({'error': f'tf must be one of {", ".join(RESOLUTIONS)}'}), 400
+    if fmt is None:
+        return not_acceptable()
+    if any(f not in FIELDS for f in fields):
+        return jsonify({'error': f'fields must be a subset of {",".join(FIELDS)}'}), 400
+
+    max_bars = ticker_history.capacities[tf]
+    try:
+        limit = int(request.args.get('limit', 24))
+        start = _optional_int('start')
+        end   = _optional_int('end')
+        if not 1 <= limit <= max_bars:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'limit must be between 1 and {max_bars}; start/end must be mts'}), 400
+
+    # The history reads straight into the layout asked for: no conversion afterwards
+    columnar = fmt != 'json'
+    bars = ticker_history.query(_symbols(), tf, limit, start=start, end=end,
+                                fields=(fields or list(FIELDS)) if columnar else None)
+    payload = {'tf': tf, 'limit': limit, 'format': fmt, 'candles': bars}
+    return respond(fmt, payload, lambda p: p), 200
+
+
+# ── GET /tickers/change ───────────────────────────────────────────────────────
+@history.route('/tickers/change', methods=['GET'])
+def get_change():
+    """
+    Price change per symbol over the last ?hours= (default 24), from local history.
+
+    Each entry has the current price, the absolute and relative change and
+    `from_mts`, the time of the price compared against (later than asked
+    for when the server has not been up that long).
+    """
+    try:
+        hours = float(request.args.get('hours', 24))
+        if not 0 < hours <= MAX_WINDOW_HOURS:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'hours must be between 0 and {MAX_WINDOW_HOURS}'}), 400
+
+    changes = ticker_history.change(_symbols(), window_ms=int(hours * 60 * 60 * 1000))
+    return jsonify({'hours': hours, 'changes': changes}), 200
@@ -1,27 +1,145 @@
-
-from flask import Blueprint, send_from_directory
+import base64
+import hashlib
 import logging
+from typing import Optional
+
+from flask import Blueprint, abort, jsonify, redirect, request, send_file, url_for
+
+from services.logo_index import LOGO_SIZES, MIMETYPES, VARIANT_FORMATS, Logo, logo_index
 
 images = Blueprint('images', __name__)
+log    = logging.getLogger(__name__)
+
+# Content-hashed URLs never change meaning
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Unversioned URLs (legacy filenames, /logos/<symbol> redirects)
+MUTABLE_MAX_AGE   = 24 * 60 * 60
+# Symbols accepted in one manifest/bulk request (a full markets screen)
+MAX_SYMBOLS       = 250
+
+
+def _variant_args():
+    """(size, fmt, error) from ?size=&format=; size None means the original."""
+    fmt  = request.args.get('format', 'webp').strip().lower()
+    size = request.args.get('size', '').strip()
+    if fmt not in VARIANT_FORMATS:
+        return None, None, (jsonify({'error': f'format must be one of {", ".join(VARIANT_FORMATS)}'}), 400)
+    if not size:
+        return None, fmt, None
+    if not size.isdigit() or int(size) not in LOGO_SIZES:
+        return None, None, (jsonify({'error': f'size must be one of {", ".join(map(str, LOGO_SIZES))}'}), 400)
+    return int(size), fmt, None
 
-logging.basicConfig(level=logging.DEBUG)
 
+def _symbols():
+    return list(dict.fromkeys(s.strip().upper() for s in request.args.get('symbols', '').split(',')
+                              if s.strip()))
 
+
+def _url(logo: Logo, size: Optional[int], fmt: str) -> str:
+    return url_for('images.logo_variant', digest=logo.digest,
+                   name=logo_index.variant_name(logo, size, fmt))
+
+
+# ── Legacy filenames ──────────────────────────────────────────────────────────
 @images.route('/backend/logos/<filename>', methods=['GET'])
 def serve_logo(filename):
-    """Serves an image from the temp_images directory."""
-    try:
-        # Try to serve the file using the original filename format
-        return send_from_directory("logos", filename)
-    except:
-        # If the original filename format doesn't exist, serve using the fallback filename format
-        # Split by "-" and get the word before "logo"
-
-        base_name = filename.split("-")[-2].upper()
-        if base_name == 'BORG':
-            base_name = 'CHSB'
-        fallback_filename = f"{base_name}.png"
-        logging.debug(f'filename: {fallback_filename}')
-        # Check if fallback file exists
-
-        return send_from_directory("logos", fallback_filename)
+    """Serves an original logo by filename, or by the symbol in `<name>-<sym>-logo.png`."""
+    logo = logo_index.find_file(filename)
+    if logo is None:
+        abort(404)
+    return send_file(logo.path, mimetype=MIMETYPES[logo.ext], max_age=MUTABLE_MAX_AGE)
+
+
+# ── Content-hashed variants ───────────────────────────────────────────────────
+@images.route('/logos/<symbol>', methods=['GET'])
+def logo_for_symbol(symbol):
+    """Redirects to the immutable URL of a symbol's logo (?size=32|64|128, ?format=webp|png)."""
+    size, fmt, error = _variant_args()
+    if error:
+        return error
+    logo = logo_index.find(symbol)
+    if logo is None:
+        abort(404)
+    response = redirect(_url(logo, size, fmt))
+    response.cache_control.public  = True
+    response.cache_control.max_age = MUTABLE_MAX_AGE
+    return response
+
+
+@images.route('/logos/v/<digest>/<name>', methods=['GET'])
+def logo_variant(digest, name):
+    stem, _, fmt = name.rpartition('.')
+    symbol, _, size = stem.partition('-')
+    logo = logo_index.find(symbol)
+    if logo is None or fmt not in MIMETYPES or (size and (not size.isdigit() or int(size) not in LOGO_SIZES)):
+        abort(404)
+    size = int(size) if size else None
+    if logo.digest != digest or name != logo_index.variant_name(logo, size, fmt):
+        # The logo changed (or cannot be resized): point at what we serve now
+        return redirect(_url(logo, size, fmt))
+
+    response = send_file(logo_index.variant_path(logo, size, fmt), mimetype=MIMETYPES[fmt],
+                         etag=f'{digest}-{name}', max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public    = True
+    response.cache_control.immutable = True
+    return response
+
+
+# ── Bulk ──────────────────────────────────────────────────────────────────────
+@images.route('/logos/manifest', methods=['GET'])
+def logo_manifest():
+    """{symbol: immutable URL} for ?symbols=BTC,ETH,…; unknown symbols are listed in `missing`."""
+    size, fmt, error = _variant_args()
+    if error:
+        return error
+    symbols = _symbols()
+    if not symbols or len(symbols) > MAX_SYMBOLS:
+        return jsonify({'error': f'symbols is required (at most {MAX_SYMBOLS})'}), 400
+
+    found    = logo_index.many(symbols)
+    response = jsonify({
+        'logos':   {symbol: _url(logo, size, fmt) for symbol, logo in found.items()},
+        'missing': [s for s in symbols if s not in found],
+    })
+    response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+    response.cache_control.public  = True
+    response.cache_control.max_age = MUTABLE_MAX_AGE
+    return response.make_conditional(request)
+
+
+@images.route('/logos/bulk', methods=['GET'])
+def logo_bulk():
+    """
+    Every requested logo inlined as a data URI, so a markets screen fetches
+    all visible icons in one request: {symbol: "data:image/webp;base64,…"}.
+    Requires ?size= (the originals are far too large to inline).
+    """
+    size, fmt, error = _variant_args()
+    if error:
+        return error
+    if size is None:
+        return jsonify({'error': f'size is required, one of {", ".join(map(str, LOGO_SIZES))}'}), 400
+    symbols = _symbols()
+    if not symbols or len(symbols) > MAX_SYMBOLS:
+        return jsonify({'error': f'symbols is required (at most {MAX_SYMBOLS})'}), 400
+
+    found = logo_index.many(symbols)
+    logos = {}
+    for symbol, logo in found.items():
+        name = logo_index.variant_name(logo, size, fmt)
+        try:
+            with open(logo_index.variant_path(logo, size, fmt), 'rb') as f:
+                data = base64.b64encode(f.read()).decode('ascii')
+        except Exception as e:
+            log.warning('Could not inline logo %s: %s', logo.filename, e)
+            continue
+        logos[symbol] = f'data:{MIMETYPES[name.rsplit(".", 1)[1]]};base64,{data}'
+
+    response = jsonify({'logos': logos, 'missing': [s for s in symbols if s not in logos]})
+    response.set_etag(hashlib.blake2b(
+        ','.join(f'{s}:{l.digest}' for s, l in found.items()).encode() + f'|{size}|{fmt}'.encode(),
+        digest_size=16).hexdigest())
+    response.cache_control.public  = True
+    response.cache_control.max_age = MUTABLE_MAX_AGE
+    return response.make_conditional(request)
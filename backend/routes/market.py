@@ -0,0 +1,45 @@
+import json
+import time
+
+from flask import Blueprint, Response, jsonify, request
+
+from services.market_summary import market_summary
+from services.ticker_snapshot import ticker_store
+
+market = Blueprint('market', __name__)
+
+
+# ── GET /market/summary ───────────────────────────────────────────────────────
+@market.route('/market/summary', methods=['GET'])
+def get_summary():
+    """
+    Precomputed top gainers, losers, movers (by absolute % move) and volume
+    leaders, plus total USD volume, from the current ticker snapshot.
+
+    Query params:
+        n – rows per ranking, 1 … MARKET_SUMMARY_TOP_N (default: all kept)
+    """
+    summary = market_summary.get()
+    if summary is None:
+        return jsonify({"error": "No tickers data available"}), 503
+
+    try:
+        n = int(request.args.get('n', market_summary.top_n))
+        if not 1 <= n <= market_summary.top_n:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'n must be between 1 and {market_summary.top_n}'}), 400
+
+    if n == market_summary.top_n:
+        body = summary.body
+    else:
+        body = json.dumps(market_summary.truncated(summary, n), separators=(',', ':'))
+
+    age      = time.time() - summary.fetched_at
+    response = Response(body, mimetype='application/json')
+    response.set_etag(f'{summary.etag}-{n}')
+    response.headers['Cache-Control'] = (
+        f'public, max-age={max(0, int(ticker_store.refresh_interval - age))}, '
+        f'stale-while-revalidate={int(ticker_store.stale_while_revalidate)}'
+    )
+    return response.make_conditional(request)
@@ -0,0 +1,12 @@
+from flask import Blueprint, Response
+
+from services.instrumentation import registry
+
+metrics = Blueprint('metrics', __name__)
+
+
+# ── GET /metrics ──────────────────────────────────────────────────────────────
+@metrics.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, upstream, cache, DB and order-stage metrics in Prometheus text format."""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,77 @@
+import time
+
+from flask import Blueprint, jsonify, request
+
+from services.news_feed import news_store
+
+news = Blueprint('news', __name__)
+
+# Posts per page when ?limit= is not given, and the most one page may hold.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE     = 100
+
+
+def _int_arg(name: str):
+    value = request.args.get(name)
+    return int(value) if value not in (None, '') else None
+
+
+def _cache_control() -> str:
+    age = time.time() - news_store.fetched_at
+    return f'public, max-age={max(0, int(news_store.refresh_interval - age))}'
+
+
+# ── GET /news ─────────────────────────────────────────────────────────────────
+@news.route('/news', methods=['GET'])
+def get_news():
+    """
+    Bitfinex news headlines, newest first, from the shared polled store.
+
+    Query params:
+        limit     – posts per page, 1 … 100 (default 20)
+        before_id – only posts older than this id (next page: `next_before_id`)
+        since_id  – only posts newer than this id (what arrived since the last poll)
+
+    Each post carries a plain-text `summary`; the full HTML is at /news/<id>.
+    Send If-None-Match with the last ETag to get a 304 until a post changes.
+    """
+    try:
+        limit     = _int_arg('limit')
+        before_id = _int_arg('before_id')
+        since_id  = _int_arg('since_id')
+        if limit is None:
+            limit = DEFAULT_PAGE_SIZE
+        elif not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}; ids must be integers'}), 400
+
+    if not news_store.ensure():
+        return jsonify({'error': 'No news available'}), 503
+
+    posts, next_before_id = news_store.page(limit, before_id=before_id, since_id=since_id)
+    response = jsonify({
+        'posts':          [p.item() for p in posts],
+        'next_before_id': next_before_id,
+        'fetchedAt':      news_store.fetched_at,
+    })
+    response.set_etag(f'{news_store.etag}-{limit}-{before_id}-{since_id}')
+    response.headers['Cache-Control'] = _cache_control()
+    return response.make_conditional(request)
+
+
+# ── GET /news/<id> ────────────────────────────────────────────────────────────
+@news.route('/news/<int:post_id>', methods=['GET'])
+def get_post(post_id: int):
+    """One post with its full HTML body, for the detail screen."""
+    if not news_store.ensure():
+        return jsonify({'error': 'No news available'}), 503
+
+    post = news_store.get(post_id)
+    if post is None:
+        return jsonify({'error': f'Post {post_id} not found'}), 404
+
+    response = jsonify(post.detail())
+    response.set_etag(post.digest)
+    response.headers['Cache-Control'] = _cache_control()
+    return response.make_conditional(request)
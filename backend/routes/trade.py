@@ -2,9 +2,10 @@ import logging
 from typing import Optional
 
 from flask import Blueprint, request, jsonify
-from bfxapi import Client, PUB_REST_HOST
-
-from models.user_keys import UserKeys
+from services.credentials import get_credentials
+from services.market_data import market_data
+from services.order_pipeline import OrderContext, OrderRejected, order_pipeline
+from services.pair_index import pair_index
 
 trade = Blueprint('trade', __name__)
 log   = logging.getLogger(__name__)
@@ -15,15 +16,17 @@ log   = logging.getLogger(__name__)
 QUOTE_TO_BFX = {'USD': 'USD', 'USDT': 'UST'}
 
 
+def _bfx_symbol(base: str, bfx_quote: str) -> str:
+    """Listed symbol for base/quote (handles 'tTESTBTC:TESTUSD' style pairs)."""
+    return pair_index.symbol_for(base, bfx_quote) or f't{base}{bfx_quote}'
+
+
 def _get_current_price(symbol: str) -> Optional[float]:
-    """Fetch the latest traded price for a t-prefixed Bitfinex symbol."""
-    try:
-        pub    = Client(rest_host=PUB_REST_HOST)
-        ticker = pub.rest.public.get_t_ticker(symbol)
-        return float(ticker.last_price)
-    except Exception as e:
-        log.warning('Price fetch failed for %s: %s', symbol, e)
-        return None
+    """Latest traded price for a t-prefixed Bitfinex symbol from the live price table."""
+    price = market_data.get_price(symbol, allow_stale=False)
+    if price is None:
+        log.warning('Price fetch failed for %s', symbol)
+    return price
 
 
 # ── GET /trade/price ──────────────────────────────────────────────────────────
@@ -40,7 +43,7 @@ def get_price():
         return jsonify({'error': 'quote_currency must be USD or USDT'}), 400
 
     bfx_quote  = QUOTE_TO_BFX[quote_display]
-    bfx_symbol = f't{base}{bfx_quote}'
+    bfx_symbol = _bfx_symbol(base, bfx_quote)
 
     price = _get_current_price(bfx_symbol)
     if price is None:
@@ -87,102 +90,31 @@ def submit_order():
         return jsonify({'error': 'amount_usd must be a positive number'}), 400
 
     # ── Look up credentials ───────────────────────────────────────────────────
-    record = UserKeys.query.filter_by(user_id=user_id).first()
-    if not record:
+    creds = get_credentials(user_id)
+    if not creds:
         return jsonify({'error': 'No API keys found. Please connect your Bitfinex account first.'}), 404
 
     # ── Build Bitfinex symbol ─────────────────────────────────────────────────
     bfx_quote  = QUOTE_TO_BFX[quote_display]   # 'USD' or 'UST'
-    bfx_symbol = f't{base}{bfx_quote}'          # e.g. 'tBTCUSD' or 'tBTCUST'
+    bfx_symbol = _bfx_symbol(base, bfx_quote)   # e.g. 'tBTCUSD' or 'tBTCUST'
 
-    # ── Fetch current price ───────────────────────────────────────────────────
-    price = _get_current_price(bfx_symbol)
-    if price is None:
-        return jsonify({'error': f'Could not fetch current price for {bfx_symbol}'}), 502
-
-    # ── Calculate base-currency amount ────────────────────────────────────────
-    # Bitfinex: positive amount → buy, negative amount → sell
-    base_amount = round(amount_usd / price, 8)
-    if side == 'sell':
-        base_amount = -base_amount
-
-    # ── Pre-flight balance check ──────────────────────────────────────────────
-    try:
-        check_client = Client(api_key=record.api_key, api_secret=record.api_secret)
-        wallets      = check_client.rest.auth.get_wallets()
-
-        exchange_balances = {
-            w.currency.upper(): w.available_balance or 0.0
-            for w in wallets
-            if w.wallet_type == 'exchange'
-        }
-
-        if side == 'buy':
-            if quote_display == 'USDT':
-                # Only count the USDT (UST) balance
-                available = exchange_balances.get('UST', 0.0)
-                quote_name = 'USDT'
-            else:
-                # Count all USD-pegged currencies for a USD order
-                USD_PEGS = ['USD', 'USDT', 'USDC', 'UST', 'TUSD', 'DAI']
-                available  = sum(exchange_balances.get(c, 0.0) for c in USD_PEGS)
-                quote_name = 'USD'
-
-            if available < amount_usd:
-                return jsonify({
-                    'error': (
-                        f'Insufficient {quote_name} balance. '
-                        f'You need {amount_usd:,.2f} {quote_name} '
-                        f'but only have {available:,.2f} {quote_name} '
-                        f'available in your exchange wallet.'
-                    )
-                }), 422
-
-        else:  # sell — need enough of the base asset
-            available_base = exchange_balances.get(base, 0.0)
-            required_base  = abs(base_amount)
-            if available_base < required_base:
-                return jsonify({
-                    'error': (
-                        f'Insufficient {base} balance. '
-                        f'You need {required_base:.8f} {base} '
-                        f'(≈ {amount_usd:,.2f} {quote_display}) but only have '
-                        f'{available_base:.8f} {base} available.'
-                    )
-                }), 422
-
-    except Exception as e:
-        log.warning('Balance pre-check failed for user %s: %s', user_id, e)
-        # Non-fatal — let Bitfinex surface the rejection if balance is actually low.
-
-    # ── Submit the order ──────────────────────────────────────────────────────
+    # ── Price → pre-trade checks → submit ─────────────────────────────────────
+    ctx = OrderContext(creds, base, side, amount_usd, quote_display, bfx_symbol)
     try:
-        bfx    = Client(api_key=record.api_key, api_secret=record.api_secret)
-        result = bfx.rest.auth.submit_order(
-            type='MARKET',
-            symbol=bfx_symbol,
-            amount=base_amount,
-            price=None,    # ignored for MARKET orders, but required by bfxapi v4
-        )
-
-        # Notification[Order] — the inner Order lives in .data
-        if result.status and result.status.upper() == 'ERROR':
-            return jsonify({'error': f'Bitfinex rejected the order: {result.text}'}), 422
-
-        order = result.data
-
-        return jsonify({
-            'success':         True,
-            'order_id':        getattr(order, 'id',     None),
-            'symbol':          bfx_symbol,
-            'side':            side,
-            'amount_usd':      amount_usd,
-            'quote_currency':  quote_display,
-            'base_amount':     abs(base_amount),
-            'price_at_order':  price,
-            'status':          getattr(order, 'status', 'EXECUTED'),
-        }), 200
-
-    except Exception as e:
-        log.exception('Order submission failed for user %s', user_id)
-        return jsonify({'error': f'Order failed: {str(e)}'}), 500
+        order = order_pipeline.run(ctx)
+    except OrderRejected as e:
+        return jsonify({'error': e.message, 'timings': ctx.timings}), e.status
+
+    return jsonify({
+        'success':         True,
+        'order_id':        getattr(order, 'id',     None),
+        'symbol':          bfx_symbol,
+        'side':            side,
+        'amount_usd':      amount_usd,
+        'quote_currency':  quote_display,
+        'base_amount':     abs(ctx.base_amount),
+        'price_at_order':  ctx.price,
+        'status':          getattr(order, 'status', 'EXECUTED'),
+        'timings':         ctx.timings,
+        'skipped_checks':  ctx.skipped,
+    }), 200
@@ -1,82 +1,65 @@
 import logging
-from typing import Optional
 from flask import Blueprint, request, jsonify
-from bfxapi import Client, PUB_REST_HOST
-
-from models.user_keys import UserKeys
+from services.credentials import get_credentials
+from services.portfolio import RANGES, portfolio
+from services.wallet_sessions import wallet_sessions
+from utils.encoding import negotiate, not_acceptable, respond
 
 wallet = Blueprint('wallet', __name__)
 log    = logging.getLogger(__name__)
 
-# Currencies treated as 1 USD each
-USD_PEGS = {'USD', 'USDT', 'USDC', 'USDT0', 'UST', 'TUSD', 'DAI', 'EURT', 'BUSD', 'LUSD'}
-
-
-def _usd_price(pub_client, currency: str) -> Optional[float]:
-    """Return the USD price of `currency`, or None if unavailable."""
-    if currency in USD_PEGS:
-        return 1.0
-    # Try tCURRENCYUSD, then tCURRENCYUST, then tCURRENCYUSDT
-    for quote in ('USD', 'UST', 'USDT'):
-        try:
-            ticker = pub_client.rest.public.get_t_ticker(f't{currency}{quote}')
-            return float(ticker.last_price)
-        except Exception:
-            continue
-    return None
-
-
-def _get_wallet_data(api_key: str, api_secret: str) -> dict:
-    auth_client = Client(api_key=api_key, api_secret=api_secret)
-    pub_client  = Client(rest_host=PUB_REST_HOST)
-
-    raw_wallets = auth_client.rest.auth.get_wallets()
-
-    wallets_out = []
-    total_usd   = 0.0
-
-    for w in raw_wallets:
-        if w.balance <= 0:
-            continue
-
-        price     = _usd_price(pub_client, w.currency)
-        usd_value = round(w.balance * price, 2) if price is not None else None
-
-        if usd_value is not None:
-            total_usd += usd_value
-
-        wallets_out.append({
-            'wallet_type':       w.wallet_type,
-            'currency':          w.currency,
-            'balance':           round(w.balance, 8),
-            'available_balance': round(w.available_balance or 0, 8),
-            'usd_value':         usd_value,
-        })
 
-    # Sort: exchange wallets first, then by USD value descending
-    wallets_out.sort(key=lambda x: (x['wallet_type'] != 'exchange', -(x['usd_value'] or 0)))
-
-    return {
-        'wallets':   wallets_out,
-        'total_usd': round(total_usd, 2),
-    }
+def _wallet_columns(data: dict) -> dict:
+    """Wallet payload with one array per wallet field instead of one dict per wallet."""
+    fields  = ('wallet_type', 'currency', 'balance', 'available_balance', 'usd_value')
+    columns = {field: [w[field] for w in data['wallets']] for field in fields}
+    return {'wallets': columns, 'total_usd': data['total_usd']}
 
 
 # ── GET /wallet/balances ──────────────────────────────────────────────────────
 @wallet.route('/wallet/balances', methods=['GET'])
 def get_balances():
     user_id = request.args.get('user_id', '').strip()
+    fmt     = negotiate(request)   # json (default), columnar or msgpack
 
     if not user_id:
         return jsonify({'error': 'user_id is required'}), 400
+    if fmt is None:
+        return not_acceptable()
 
-    record = UserKeys.query.filter_by(user_id=user_id).first()
-    if not record:
+    creds = get_credentials(user_id)
+    if not creds:
         return jsonify({'error': 'No API keys found for this user. Please connect your Bitfinex account first.'}), 404
 
     try:
-        data = _get_wallet_data(record.api_key, record.api_secret)
-        return jsonify(data), 200
+        data = wallet_sessions.balances(creds)   # live session, else REST with a short TTL
+        portfolio.observe(user_id, data['total_usd'])   # saves the next snapshot a fetch
+        return respond(fmt, data, _wallet_columns), 200
     except Exception as e:
         log.exception('Error fetching wallet for user %s', user_id)
         return jsonify({'error': f'Failed to fetch wallet: {str(e)}'}), 500
+
+
+# ── GET /wallet/history ───────────────────────────────────────────────────────
+@wallet.route('/wallet/history', methods=['GET'])
+def get_history():
+    """
+    Portfolio value and P&L over ?range= (1D, 1W, 1M, 3M, 1Y or ALL; default 1M).
+
+    `points` are [mts, value_usd, pnl_usd], oldest first: valuation snapshots
+    for 1D/1W, daily closes otherwise.  P&L excludes deposits and withdrawals.
+    `assets` carry each currency's average cost basis and realized/unrealized
+    P&L.  Everything is read from what the background ingestion stored;
+    `synced_to` is how far the user's trades and ledgers have been read.
+    """
+    user_id = request.args.get('user_id', '').strip()
+    range_  = request.args.get('range', '1M').strip().upper()
+
+    if not user_id:
+        return jsonify({'error': 'user_id is required'}), 400
+    if range_ not in RANGES:
+        return jsonify({'error': f'range must be one of {", ".join(RANGES)}'}), 400
+    if not get_credentials(user_id):
+        return jsonify({'error': 'No API keys found for this user. Please connect your Bitfinex account first.'}), 404
+
+    return jsonify(portfolio.history(user_id, range_)), 200
@@ -1,28 +1,24 @@
 # here we will interact with the Bitfinex API
-from bfxapi import Client, PUB_REST_HOST
-from utils.helpers import TradingPairSlicer
+from services.clients import public_client
+from services.pair_index import pair_index
 
 
 def fetch_tickers_data():
-    bfx = Client(rest_host=PUB_REST_HOST)
+    bfx = public_client()
 
     # bfxapi v4: get_t_tickers only accepts `symbols`, no filter_usd param
     tickers = bfx.rest.public.get_t_tickers(symbols='ALL')
 
-    # bfxapi v4: get_verbose_names() is gone; use the conf endpoint instead.
-    # Returns [[symbol, label], ...] e.g. [["BTC", "Bitcoin"], ...]
-    try:
-        verbose_data = bfx.rest.public.conf("pub:map:currency:label")
-        verbose_name_mapping = {entry[0]: entry[1] for entry in verbose_data}
-    except Exception:
-        verbose_name_mapping = {}
+    # Base/quote and verbose labels come from the pre-built pair index
+    # (pub:list:pair:exchange + pub:map:currency:label), not per-request parsing.
+    index = pair_index.get()
 
     # Collect both USD and UST (USDT) spot pairs per base currency.
     # UST is how Bitfinex internally represents USDT (e.g. tBTCUST).
     by_base = {}   # base -> {'USD': (symbol, ticker_data), 'USDT': (symbol, ticker_data)}
 
     for ticker_name, ticker_data in tickers.items():
-        base, quote = TradingPairSlicer(ticker_name[1:])
+        base, quote = pair_index.split(ticker_name)
         if quote == 'USD':
             by_base.setdefault(base, {})['USD'] = (ticker_name, ticker_data)
         elif quote == 'UST':
@@ -31,7 +27,7 @@ def fetch_tickers_data():
     modified_tickers = {}
 
     for base, pairs in by_base.items():
-        verb_name = verbose_name_mapping.get(base, base)
+        verb_name = index.labels.get(base, base)
 
         # Prefer the USD pair for the primary display price; fall back to USDT.
         if 'USD' in pairs:
@@ -0,0 +1,174 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from services import instrumentation
+from services.clients import public_client
+from services.fanout import fan_out
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Bars kept per (symbol, timeframe) series, and series kept in memory overall.
+CANDLE_MAX_BARS   = int(os.environ.get('CANDLE_MAX_BARS', 500))
+CANDLE_MAX_SERIES = int(os.environ.get('CANDLE_MAX_SERIES', 4000))
+# The newest (still forming) bar is re-fetched at most this often.
+CANDLE_MIN_REFRESH = float(os.environ.get('CANDLE_MIN_REFRESH', 30))
+# Upstream fetches one batch request may start.  Bitfinex allows a burst of
+# about 30 candle calls; the rest of a cold batch is answered as pending.
+CANDLE_MAX_FETCHES_PER_REQUEST = int(os.environ.get('CANDLE_MAX_FETCHES_PER_REQUEST', 10))
+
+_MINUTE = 60 * 1000
+TIMEFRAME_MS = {
+    '1m':  _MINUTE,
+    '5m':  5 * _MINUTE,
+    '15m': 15 * _MINUTE,
+    '30m': 30 * _MINUTE,
+    '1h':  60 * _MINUTE,
+    '3h':  3 * 60 * _MINUTE,
+    '6h':  6 * 60 * _MINUTE,
+    '12h': 12 * 60 * _MINUTE,
+    '1D':  24 * 60 * _MINUTE,
+    '1W':  7 * 24 * 60 * _MINUTE,
+    '14D': 14 * 24 * 60 * _MINUTE,
+    '1M':  30 * 24 * 60 * _MINUTE,
+}
+
+# Bar layout, identical to the raw Bitfinex candles array
+FIELDS = ('mts', 'open', 'close', 'high', 'low', 'volume')
+
+Bar = List[float]
+
+
+class _Series:
+    __slots__ = ('bars', 'bucket', 'refreshed_at', 'lock')
+
+    def __init__(self):
+        self.bars: List[Bar] = []      # ascending by mts
+        self.bucket       = -1         # timeframe bucket of the last refresh
+        self.refreshed_at = 0.0
+        self.lock         = threading.Lock()
+
+
+class CandleCache:
+    """
+    Shared OHLC cache for every client, keyed by (symbol, timeframe).
+
+    A series is served from memory while the clock is still inside the
+    timeframe bucket it was refreshed in (re-checking the forming bar at most
+    every `min_refresh` seconds).  Once stale, only bars from the newest
+    cached one onwards are requested and merged in; a full download happens
+    only on a cold series or when a client asks for more history than cached.
+    """
+
+    def __init__(self, max_bars: int, max_series: int, min_refresh: float, max_fetches: int):
+        self.max_bars    = max_bars
+        self.max_series  = max_series
+        self.min_refresh = min_refresh
+        self.max_fetches = max_fetches
+
+        self._series: 'OrderedDict[Tuple[str, str], _Series]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_series(self, key: Tuple[str, str]) -> _Series:
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+                if len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+            self._series.move_to_end(key)
+            return series
+
+    def _is_fresh(self, series: _Series, tf: str, limit: int, now: float) -> bool:
+        bucket = int(now * 1000) // TIMEFRAME_MS[tf]
+        return (len(series.bars) >= limit
+                and series.bucket == bucket
+                and now - series.refreshed_at < self.min_refresh)
+
+    def get(self, symbol: str, tf: str, limit: int) -> List[Bar]:
+        """The newest `limit` bars for symbol/tf, ascending by timestamp."""
+        series = self._get_series((symbol, tf))
+        now    = time.time()
+        fresh  = self._is_fresh(series, tf, limit, now)
+        instrumentation.cache('candles', fresh)
+        if not fresh:
+            with series.lock:
+                # Another request may have refreshed it while we waited
+                if not self._is_fresh(series, tf, limit, time.time()):
+                    self._refresh(series, symbol, tf, limit)
+        return series.bars[-limit:]
+
+    def get_many(self, symbols: List[str], tf: str,
+                 limit: int) -> Tuple[Dict[str, List[Bar]], Dict[str, str], List[str]]:
+        """
+        Batch form of `get`: (candles, errors, pending).
+
+        The first `max_fetches` cache misses are fetched upstream concurrently.
+        Misses past that are served from stale bars when enough are cached,
+        and otherwise listed as pending for the client to ask again.
+        """
+        candles, errors, misses, pending = {}, {}, [], []
+        now = time.time()
+        for symbol in symbols:
+            series = self._get_series((symbol, tf))
+            if self._is_fresh(series, tf, limit, now):
+                instrumentation.cache('candles', True)
+                candles[symbol] = series.bars[-limit:]
+            else:
+                misses.append(symbol)
+
+        fetch, deferred = misses[:self.max_fetches], misses[self.max_fetches:]
+        for symbol in deferred:
+            bars = self._get_series((symbol, tf)).bars
+            if len(bars) >= limit:
+                instrumentation.cache_requests.inc('candles', 'stale')
+                candles[symbol] = bars[-limit:]
+            else:
+                pending.append(symbol)
+
+        outcomes = fan_out({s: (lambda s=s: self.get(s, tf, limit)) for s in fetch})
+        for symbol, outcome in outcomes.items():
+            if outcome.ok:
+                candles[symbol] = outcome.value
+            else:
+                errors[symbol] = str(outcome.error)
+        return candles, errors, pending
+
+    def _refresh(self, series: _Series, symbol: str, tf: str, limit: int) -> None:
+        pub  = public_client().rest.public
+        bars = None
+        if series.bars and len(series.bars) >= limit:
+            # Incremental: everything from the newest cached bar (which may
+            # still have been forming) up to now.
+            fresh = pub.get_candles_hist(symbol, tf, sort=1, start=str(series.bars[-1][0]),
+                                         limit=self.max_bars)
+            if len(fresh) < self.max_bars:   # a full page means the gap is too wide to merge
+                bars = series.bars[:-1] + [_bar(c) for c in fresh if c.mts >= series.bars[-1][0]]
+                if len(bars) < len(series.bars):
+                    bars = series.bars   # upstream returned nothing usable; keep what we had
+        if bars is None:
+            fetch = min(max(limit, len(series.bars)), self.max_bars)
+            fresh = pub.get_candles_hist(symbol, tf, limit=fetch)   # newest first
+            bars  = sorted((_bar(c) for c in fresh), key=lambda b: b[0])
+
+        series.bars         = bars[-self.max_bars:]
+        series.bucket       = int(time.time() * 1000) // TIMEFRAME_MS[tf]
+        series.refreshed_at = time.time()
+
+
+def _bar(candle) -> Bar:
+    return [candle.mts, candle.open, candle.close, candle.high, candle.low, candle.volume]
+
+
+def to_columns(bars: List[Bar], fields: Optional[List[str]] = None) -> Dict[str, list]:
+    """Row bars → one array per field, e.g. {'mts': [...], 'close': [...]}."""
+    fields = fields or list(FIELDS)
+    return {f: [b[i] for b in bars] for f, i in ((f, FIELDS.index(f)) for f in fields)}
+
+
+candle_cache = CandleCache(CANDLE_MAX_BARS, CANDLE_MAX_SERIES, CANDLE_MIN_REFRESH,
+                           CANDLE_MAX_FETCHES_PER_REQUEST)
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from services import upstream
+
+if TYPE_CHECKING:
+    from bfxapi import Client
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Defaults are bfxapi's PUB_REST_HOST / REST_HOST, spelled out so importing
+# this module does not load bfxapi (and its websocket stack) at startup.
+BFX_PUB_REST_HOST = os.environ.get('BFX_PUB_REST_HOST', 'https://api-pub.bitfinex.com/v2')
+BFX_REST_HOST     = os.environ.get('BFX_REST_HOST', 'https://api.bitfinex.com/v2')
+# Authenticated clients kept per process, and how long an unused one survives.
+AUTH_CLIENT_CACHE_SIZE = int(os.environ.get('AUTH_CLIENT_CACHE_SIZE', 256))
+AUTH_CLIENT_IDLE_TTL   = float(os.environ.get('AUTH_CLIENT_IDLE_TTL', 15 * 60))
+
+
+def _client_class():
+    """bfxapi.Client, imported on first use with the pooled REST transport installed."""
+    from bfxapi import Client
+    upstream.install()
+    return Client
+
+
+class _AuthEntry:
+    __slots__ = ('client', 'api_key', 'api_secret', 'last_used')
+
+    def __init__(self, client: 'Client', api_key: str, api_secret: str):
+        self.client     = client
+        self.api_key    = api_key
+        self.api_secret = api_secret
+        self.last_used  = time.monotonic()
+
+
+class ClientRegistry:
+    """
+    One shared public bfxapi client per process plus an LRU of authenticated
+    clients keyed by user_id.
+
+    All clients share the pooled HTTP session from services.upstream, so
+    reusing them skips both client construction and the TLS handshake.
+    """
+
+    def __init__(self, max_auth_clients: int, idle_ttl: float):
+        self.max_auth_clients = max_auth_clients
+        self.idle_ttl         = idle_ttl
+
+        self._public = None
+        self._auth: 'OrderedDict[str, _AuthEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def public(self) -> 'Client':
+        if self._public is None:
+            with self._lock:
+                if self._public is None:
+                    self._public = _client_class()(rest_host=BFX_PUB_REST_HOST)
+        return self._public
+
+    def auth(self, user_id: str, api_key: str, api_secret: str) -> 'Client':
+        Client = _client_class()
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+
+            entry = self._auth.get(user_id)
+            if entry is None or entry.api_key != api_key or entry.api_secret != api_secret:
+                client = Client(api_key=api_key, api_secret=api_secret, rest_host=BFX_REST_HOST)
+                entry  = _AuthEntry(client, api_key, api_secret)
+                self._auth[user_id] = entry
+                if len(self._auth) > self.max_auth_clients:
+                    self._auth.popitem(last=False)
+
+            entry.last_used = now
+            self._auth.move_to_end(user_id)
+            return entry.client
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached client after `user_id`'s credentials change or are deleted."""
+        with self._lock:
+            self._auth.pop(user_id, None)
+
+    def _evict_idle(self, now: float) -> None:
+        # Entries are kept in last-used order, so idle ones sit at the front.
+        while self._auth:
+            user_id, entry = next(iter(self._auth.items()))
+            if now - entry.last_used <= self.idle_ttl:
+                break
+            del self._auth[user_id]
+
+
+registry = ClientRegistry(AUTH_CLIENT_CACHE_SIZE, AUTH_CLIENT_IDLE_TTL)
+
+
+def public_client() -> 'Client':
+    return registry.public()
+
+
+def auth_client(user_id: str, api_key: str, api_secret: str) -> 'Client':
+    return registry.auth(user_id, api_key, api_secret)
+
+
+def invalidate(user_id: Optional[str]) -> None:
+    if user_id:
+        registry.invalidate(user_id)
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from services import instrumentation, upstream
+from services.pair_index import pair_index
+from utils.background import PeriodicTask
+from utils.disk_cache import load_json, save_json
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+COINGECKO_REST_HOST        = os.environ.get('COINGECKO_REST_HOST', 'https://api.coingecko.com/api/v3')
+# /coins/list changes slowly (new listings); one download a day is plenty.
+COINGECKO_REFRESH_INTERVAL = float(os.environ.get('COINGECKO_REFRESH_INTERVAL', 24 * 60 * 60))
+
+CACHE_FILE = 'coingecko_index.json'
+
+# After a failed cold-start fetch, wait this long before trying upstream again
+_COLD_RETRY_DELAY = 5 * 60.0
+
+# Candidates whose name says they are a copy of the real asset on another chain
+_DERIVATIVE = re.compile(r'\b(bridged|wrapped|peg|binance-peg|wormhole|pos)\b', re.IGNORECASE)
+_NON_SLUG   = re.compile(r'[^a-z0-9]+')
+
+
+def slugify(name: str) -> str:
+    """'Curve DAO Token' → 'curve-dao-token', the form CoinGecko ids and logo files use."""
+    return _NON_SLUG.sub('-', name.lower()).strip('-')
+
+
+@dataclass(frozen=True)
+class Coin:
+    id:   str
+    name: str
+
+    @property
+    def slugs(self) -> Tuple[str, str]:
+        return self.id, slugify(self.name)
+
+
+class CoinIndex:
+    """Immutable Bitfinex currency code → CoinGecko coin map, plus its encoded payload."""
+
+    def __init__(self, coins: Dict[str, Coin], fetched_at: float):
+        self.coins      = coins
+        self.fetched_at = fetched_at
+
+        doc = {code: [c.id, c.name] for code, c in sorted(coins.items())}
+        self.version = hashlib.blake2b(json.dumps(doc, separators=(',', ':')).encode('utf-8'),
+                                       digest_size=8).hexdigest()
+        self.body    = json.dumps({'version': self.version, 'coins': doc},
+                                  separators=(',', ':')).encode('utf-8')
+
+    def to_json(self) -> dict:
+        return {'coins': {code: [c.id, c.name] for code, c in self.coins.items()},
+                'fetched_at': self.fetched_at}
+
+    @classmethod
+    def from_json(cls, doc: dict) -> 'CoinIndex':
+        return cls({code: Coin(*entry) for code, entry in doc['coins'].items()}, doc['fetched_at'])
+
+
+_EMPTY = CoinIndex({}, 0.0)
+
+
+def _rank(coin: dict, label: str) -> tuple:
+    """Sort key for CoinGecko coins sharing one ticker symbol (lowest wins)."""
+    name, label_slug = coin.get('name') or '', slugify(label)
+    return (
+        name.lower() != label.lower() and slugify(name) != label_slug,   # same name as Bitfinex's label
+        coin['id'] != label_slug,
+        bool(_DERIVATIVE.search(name) or _DERIVATIVE.search(coin['id'])),
+        len(coin['id']),
+        coin['id'],
+    )
+
+
+def build_index(coins: List[dict], fetched_at: float) -> CoinIndex:
+    """
+    Restrict CoinGecko's full /coins/list (tens of thousands of entries) to
+    the currencies we list, resolving shared ticker symbols with Bitfinex's
+    own label (pub:map:currency:label): 'AMP' is "Amp", not Ampleforth.
+    """
+    meta = pair_index.get()
+    wanted: Dict[str, List[str]] = {}     # lowercase display symbol → Bitfinex codes
+    for code in meta.quotes:
+        if not code.startswith('TEST'):
+            wanted.setdefault(meta.display.get(code, code).lower(), []).append(code)
+
+    candidates: Dict[str, List[dict]] = {}
+    for coin in coins:
+        symbol = (coin.get('symbol') or '').lower()
+        if symbol in wanted and coin.get('id'):
+            candidates.setdefault(symbol, []).append(coin)
+
+    index = {}
+    for symbol, codes in wanted.items():
+        for code in codes:
+            found = candidates.get(symbol)
+            if found:
+                best = min(found, key=lambda c: _rank(c, meta.labels.get(code, code)))
+                index[code] = Coin(best['id'], best.get('name') or best['id'])
+    return CoinIndex(index, fetched_at)
+
+
+def fetch_coins() -> List[dict]:
+    """CoinGecko /coins/list: [{'id', 'symbol', 'name'}, ...]."""
+    url     = f'{COINGECKO_REST_HOST}/coins/list'
+    started = time.perf_counter()
+    response = upstream.session().get(url, params={'include_platform': 'false'},
+                                      headers={'Accept': 'application/json'},
+                                      timeout=(upstream.CONNECT_TIMEOUT, upstream.READ_TIMEOUT))
+    instrumentation.upstream_requests.observe(time.perf_counter() - started, 'coingecko/coins/list',
+                                              'GET', str(response.status_code))
+    if response.status_code != 200:
+        raise RuntimeError(f'CoinGecko /coins/list failed: HTTP {response.status_code}')
+    return response.json()
+
+
+class CoinGeckoIndex:
+    """
+    Which CoinGecko coin each of our currencies is, so clients no longer
+    download and scan the whole /coins/list on device.
+
+    The list is fetched on a schedule and cut down to the currencies in our
+    pair universe; only that compact index is kept in memory and persisted
+    to disk for warm restarts.  `version` is a content hash, so clients
+    holding the current index revalidate with a 304.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+
+        self._index: Optional[CoinIndex] = None
+        self._disk_checked = False
+        self._retry_at     = 0.0
+        self._lock         = threading.Lock()
+        # Ticks at the retry delay so a failed download is retried soon, not a day later
+        self._worker       = PeriodicTask('coingecko-index', _COLD_RETRY_DELAY, self._tick,
+                                          run_immediately=False)
+
+    def refresh(self) -> CoinIndex:
+        index = build_index(fetch_coins(), time.time())
+        if not index.coins:
+            raise RuntimeError('no CoinGecko matches (pair index empty?)')
+        self._index = index
+        log.info('CoinGecko index built: %d currencies, version %s', len(index.coins), index.version)
+        try:
+            save_json(CACHE_FILE, index.to_json())
+        except OSError as e:
+            log.warning('Could not persist CoinGecko index: %s', e)
+        return index
+
+    def _tick(self) -> None:
+        index = self._index
+        if index is None or time.time() - index.fetched_at > self.refresh_interval:
+            self.refresh()
+
+    def get(self) -> CoinIndex:
+        """Current index; loads from disk or, on a cold start, from CoinGecko."""
+        index = self._index
+        instrumentation.cache('coingecko', index is not None)
+        if index is None:
+            with self._lock:
+                self._load_disk()
+                if self._index is None and time.time() >= self._retry_at:
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        log.warning('CoinGecko index load failed: %s', e)
+                        self._retry_at = time.time() + _COLD_RETRY_DELAY
+            self._worker.start()
+            index = self._index or _EMPTY
+        return index
+
+    def peek(self) -> CoinIndex:
+        """Current index without ever waiting on CoinGecko (disk at most); may be empty."""
+        index = self._index
+        if index is None:
+            if not self._disk_checked:
+                with self._lock:
+                    self._load_disk()
+                self._worker.start()
+                if self._index is None:
+                    self._worker.trigger()
+            index = self._index or _EMPTY
+        return index
+
+    def warm(self) -> None:
+        self.peek()
+
+    def coin(self, code: str) -> Optional[Coin]:
+        return self.peek().coins.get(code)
+
+    def _load_disk(self) -> None:
+        if self._disk_checked:
+            return
+        self._disk_checked = True
+        doc = load_json(CACHE_FILE)
+        if doc is not None:
+            self._index = CoinIndex.from_json(doc)
+            if time.time() - self._index.fetched_at > self.refresh_interval:
+                self._worker.start()
+                self._worker.trigger()
+
+
+coingecko_index = CoinGeckoIndex(COINGECKO_REFRESH_INTERVAL)
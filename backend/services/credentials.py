@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from models.user_keys import UserKeys
+from services import clients, instrumentation
+from utils.disk_cache import CACHE_DIR, cache_path
+
+if TYPE_CHECKING:
+    from bfxapi import Client
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+CREDENTIAL_CACHE_SIZE = int(os.environ.get('CREDENTIAL_CACHE_SIZE', 10000))
+CREDENTIAL_CACHE_TTL  = float(os.environ.get('CREDENTIAL_CACHE_TTL', 5 * 60))
+
+# Touched on every save/delete; other worker processes drop their cache when
+# its mtime moves, so a changed key is never served from a stale copy.
+EPOCH_FILE = 'credentials.epoch'
+
+
+@dataclass(frozen=True)
+class Credentials:
+    """Detached copy of a UserKeys row; safe to keep outside a DB session."""
+    user_id:    str
+    api_key:    str
+    api_secret: str
+    created_at: datetime
+    status:     str = 'valid'   # pending until Bitfinex accepted the pair (services.key_validation)
+
+    @property
+    def usable(self) -> bool:
+        """Pending keys are used optimistically; only keys Bitfinex rejected are not."""
+        return self.status != 'invalid'
+
+    def client(self) -> 'Client':
+        """The pooled authenticated client for these keys (no DB or network I/O)."""
+        return clients.auth_client(self.user_id, self.api_key, self.api_secret)
+
+
+class CredentialCache:
+    """
+    Bounded, TTL'd user_id → Credentials cache in front of UserKeys.
+
+    Users without keys are cached too (as None), so polling /auth/status for
+    a disconnected user does not hit the DB either.  Writers call
+    `invalidate()`, which also bumps the shared epoch file for other processes.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl      = ttl
+
+        self._entries: 'OrderedDict[str, Tuple[Optional[Credentials], float]]' = OrderedDict()
+        self._epoch      = self._read_epoch()
+        self._generation = 0   # bumped on invalidation; stale loads are not stored
+        self._lock       = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Credentials]:
+        self._check_epoch()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                instrumentation.cache('credentials', True)
+                return entry[0]
+            generation = self._generation
+
+        instrumentation.cache('credentials', False)
+        creds = self._load(user_id)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (creds, now + self.ttl)
+                self._entries.move_to_end(user_id)
+                if len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return creds
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget `user_id` here and in every other process (after a save or delete)."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generation += 1
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path(EPOCH_FILE), 'a'):
+                os.utime(cache_path(EPOCH_FILE))
+        except OSError as e:
+            log.warning('Could not bump credential epoch: %s', e)
+
+    @staticmethod
+    def _load(user_id: str) -> Optional[Credentials]:
+        record = UserKeys.query.filter_by(user_id=user_id).first()
+        if record is None:
+            return None
+        return Credentials(record.user_id, record.api_key, record.api_secret, record.created_at,
+                           record.status)
+
+    @staticmethod
+    def _read_epoch() -> int:
+        try:
+            return os.stat(cache_path(EPOCH_FILE)).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _check_epoch(self) -> None:
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            with self._lock:
+                self._entries.clear()
+                self._generation += 1
+                self._epoch = epoch
+
+
+credential_cache = CredentialCache(CREDENTIAL_CACHE_SIZE, CREDENTIAL_CACHE_TTL)
+
+
+def get_credentials(user_id: str) -> Optional[Credentials]:
+    """The user's keys, unless there are none or Bitfinex rejected them."""
+    creds = credential_cache.get(user_id)
+    return creds if creds is not None and creds.usable else None
+
+
+def invalidate(user_id: str) -> None:
+    credential_cache.invalidate(user_id)
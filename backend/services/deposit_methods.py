@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from services.clients import public_client
+from utils.background import PeriodicTask
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+DEPOSIT_METHODS_REFRESH_INTERVAL = float(os.environ.get('DEPOSIT_METHODS_REFRESH_INTERVAL', 60 * 60))
+
+# After a failed cold-start fetch, wait this long before trying upstream again
+_COLD_RETRY_DELAY = 30.0
+
+# ── Method display names ──────────────────────────────────────────────────────
+# Maps the Bitfinex internal method name → a human-readable label and network tag.
+METHOD_META = {
+    'BITCOIN':         {'label': 'Bitcoin',          'network': 'BTC'},
+    'LIGHTNING':       {'label': 'Bitcoin Lightning', 'network': 'LN'},
+    'LITECOIN':        {'label': 'Litecoin',          'network': 'LTC'},
+    'ETHEREUM':        {'label': 'Ethereum',          'network': 'ERC-20'},
+    'ETHEREUMC':       {'label': 'Ethereum Classic',  'network': 'ETC'},
+    'TETHERUSE':       {'label': 'Tether',            'network': 'ERC-20'},
+    'TETHERUSX':       {'label': 'Tether',            'network': 'TRC-20'},
+    'TETHERUSDTSOL':   {'label': 'Tether',            'network': 'Solana'},
+    'TETHERUSDTAVAX':  {'label': 'Tether',            'network': 'Avalanche'},
+    'TETHERUSDTTON':   {'label': 'Tether',            'network': 'TON'},
+    'RIPPLE':          {'label': 'Ripple',            'network': 'XRP'},
+    'EOS':             {'label': 'EOS',               'network': 'EOS'},
+    'XLM':             {'label': 'Stellar',           'network': 'XLM'},
+    'SOL':             {'label': 'Solana',            'network': 'SOL'},
+    'ADA':             {'label': 'Cardano',           'network': 'ADA'},
+    'DOT':             {'label': 'Polkadot',          'network': 'DOT'},
+    'TRX':             {'label': 'TRON',              'network': 'TRC-20'},
+    'DOGE':            {'label': 'Dogecoin',          'network': 'DOGE'},
+    'AVAX':            {'label': 'Avalanche',         'network': 'AVAX'},
+    'NEAR':            {'label': 'NEAR Protocol',     'network': 'NEAR'},
+    'TON':             {'label': 'TON',               'network': 'TON'},
+    'LINK':            {'label': 'Chainlink',         'network': 'ERC-20'},
+    'SHIB':            {'label': 'Shiba Inu',         'network': 'ERC-20'},
+    'PEPE':            {'label': 'Pepe',              'network': 'ERC-20'},
+    'ARB':             {'label': 'Arbitrum',          'network': 'ARB'},
+    'MKR':             {'label': 'Maker',             'network': 'ERC-20'},
+    'AAVE':            {'label': 'Aave',              'network': 'ERC-20'},
+    'UNI':             {'label': 'Uniswap',           'network': 'ERC-20'},
+    'POL':             {'label': 'Polygon',           'network': 'POL'},
+    'SUI':             {'label': 'Sui',               'network': 'SUI'},
+    'APT':             {'label': 'Aptos',             'network': 'APT'},
+    'XMR':             {'label': 'Monero',            'network': 'XMR'},
+    'BCH':             {'label': 'Bitcoin Cash',      'network': 'BCH'},
+    'BCHN':            {'label': 'Bitcoin Cash',      'network': 'BCH'},
+    'ZEC':             {'label': 'Zcash',             'network': 'ZEC'},
+    'XTZ':             {'label': 'Tezos',             'network': 'XTZ'},
+}
+
+# Bitfinex currency → list of method names that can deposit it.
+# Built from the pub:map:tx:method endpoint (currency is the value, method is the key).
+# Static snapshot for the most common currencies, used only on a cold start
+# when the live map has never been fetched.
+CURRENCY_TO_METHODS = {
+    'BTC':  ['BITCOIN'],
+    'LTC':  ['LITECOIN'],
+    'ETH':  ['ETHEREUM'],
+    'ETC':  ['ETHEREUMC'],
+    'XMR':  ['MONERO'],
+    'IOT':  ['IOTA'],
+    'XRP':  ['RIPPLE'],
+    'DSH':  ['DASH'],
+    'EOS':  ['EOS'],
+    'NEO':  ['NEO'],
+    'UST':  ['TETHERUSE', 'TETHERUSX', 'TETHERUSDTSOL', 'TETHERUSDTAVAX', 'TETHERUSDTTON'],
+    'TRX':  ['TRX'],
+    'XLM':  ['XLM'],
+    'XTZ':  ['XTZ'],
+    'DOT':  ['DOT'],
+    'ADA':  ['ADA'],
+    'LINK': ['LINK'],
+    'AVAX': ['AVAX'],
+    'SOL':  ['SOL'],
+    'NEAR': ['NEAR'],
+    'DOGE': ['DOGE'],
+    'SHIB': ['SHIB'],
+    'PEPE': ['PEPE'],
+    'ARB':  ['ARB'],
+    'MKR':  ['MKR'],
+    'AAVE': ['AAVE'],
+    'UNI':  ['UNI'],
+    'ZEC':  ['ZCASH'],
+    'SUI':  ['SUI'],
+    'APT':  ['APT'],
+    'TON':  ['TON'],
+}
+
+# Currencies that require a tag / memo alongside the address (pool_address field)
+MEMO_CURRENCIES = {'XRP', 'XLM', 'EOS', 'IOT', 'TON'}
+
+
+def _build_index(currency_to_methods: Dict[str, List[str]]) -> Dict[str, List[dict]]:
+    """currency → ready-to-serve method entries, merged with METHOD_META / MEMO_CURRENCIES."""
+    index = {}
+    for currency, methods in currency_to_methods.items():
+        index[currency] = [
+            {
+                'method':   m,
+                'label':    METHOD_META.get(m, {}).get('label', m.title()),
+                'network':  METHOD_META.get(m, {}).get('network', ''),
+                'has_memo': currency in MEMO_CURRENCIES,
+            }
+            for m in methods
+        ]
+    return index
+
+
+class DepositMethodCache:
+    """
+    Inverted pub:map:tx:method, fetched once and refreshed in the background.
+
+    Bitfinex publishes the map as [method, [currency, ...]] entries; it is
+    inverted into currency → methods a single time per refresh, so a warm
+    /deposit/methods request is one dict lookup with no upstream call.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+
+        self._index: Optional[Dict[str, List[dict]]] = None
+        self._live     = False
+        self._retry_at = 0.0
+        self._lock     = threading.Lock()
+        self._worker   = PeriodicTask('deposit-methods', refresh_interval, self.refresh,
+                                      run_immediately=False)
+
+    def refresh(self) -> None:
+        data = public_client().rest.public.conf('pub:map:tx:method')
+        if not data:
+            raise RuntimeError('empty pub:map:tx:method')
+
+        inverted: Dict[str, List[str]] = {}
+        for method_name, currencies in data:
+            for c in currencies:
+                inverted.setdefault(c.upper(), []).append(method_name.upper())
+
+        self._index = _build_index(inverted)
+        self._live  = True
+
+    def methods_for(self, currency: str) -> List[dict]:
+        """Deposit method entries for a Bitfinex currency code (empty when none)."""
+        if not self._live:
+            self._load()
+        return self._index.get(currency, [])
+
+    def warm(self) -> None:
+        if not self._live:
+            self._load()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._live or time.time() < self._retry_at:
+                return
+            self._worker.start()
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning('Deposit method map fetch failed; using static snapshot: %s', e)
+                self._retry_at = time.time() + _COLD_RETRY_DELAY
+                if self._index is None:
+                    self._index = _build_index(CURRENCY_TO_METHODS)
+
+
+deposit_methods = DepositMethodCache(DEPOSIT_METHODS_REFRESH_INTERVAL)
@@ -0,0 +1,61 @@
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Upper bound on upstream calls in flight from fan-outs, across all requests.
+UPSTREAM_MAX_CONCURRENCY = int(os.environ.get('UPSTREAM_MAX_CONCURRENCY', 32))
+# Wall-clock budget for one fan-out; calls still running after it are abandoned.
+FANOUT_TIMEOUT           = float(os.environ.get('FANOUT_TIMEOUT', 20))
+
+_executor = ThreadPoolExecutor(max_workers=UPSTREAM_MAX_CONCURRENCY,
+                               thread_name_prefix='upstream')
+
+
+class Outcome:
+    """Result of one fanned-out call: either a value or the error it raised."""
+    __slots__ = ('value', 'error')
+
+    def __init__(self, value: Any = None, error: Optional[BaseException] = None):
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def result(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def fan_out(calls: Dict[str, Callable[[], Any]], timeout: Optional[float] = None) -> Dict[str, Outcome]:
+    """
+    Run independent blocking upstream calls concurrently and wait for all of them.
+
+    Returns one Outcome per name; a call that raised or missed the deadline
+    carries its exception instead of a value, so callers decide per call
+    whether a failure is fatal.
+    """
+    timeout = FANOUT_TIMEOUT if timeout is None else timeout
+    # Each call runs in a copy of the caller's context, so per-request state
+    # (e.g. the Server-Timing breakdown) follows it onto the worker thread.
+    futures = {name: _executor.submit(contextvars.copy_context().run, fn)
+               for name, fn in calls.items()}
+    wait(futures.values(), timeout=timeout)
+
+    outcomes = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            outcomes[name] = Outcome(error=FutureTimeout(f'{name} exceeded {timeout:.1f}s'))
+        elif future.exception() is not None:
+            outcomes[name] = Outcome(error=future.exception())
+        else:
+            outcomes[name] = Outcome(value=future.result())
+    return outcomes
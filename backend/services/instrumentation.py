@@ -0,0 +1,245 @@
+import bisect
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from flask import Flask, g, request
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+# Add a Server-Timing breakdown (app, db, upstream, order stages) to every
+# response.  A single request can opt in with `X-Server-Timing: 1` instead.
+SERVER_TIMING   = os.environ.get('SERVER_TIMING', '0') == '1'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS    = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+# ── Metric types ──────────────────────────────────────────────────────────────
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name   = name
+        self.help   = help
+        self.labels = tuple(labels)
+
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock   = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_labels(self.labels, labels)} {value:g}'
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name    = name
+        self.help    = help
+        self.labels  = tuple(labels)
+        self.buckets = tuple(buckets)
+
+        # labels → [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock    = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1]    += value
+            series[2]    += 1
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                yield f'{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labels, labels)} {total:.6f}'
+            yield f'{self.name}_count{_labels(self.labels, labels)} {count}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return '\n'.join(line for m in self._metrics for line in m.render()) + '\n'
+
+
+# Per process: behind several workers, scrape each one (or aggregate them).
+registry = Registry()
+
+http_requests = registry.add(Histogram(
+    'bfxapp_http_request_duration_seconds', 'Time spent handling a request.',
+    ('route', 'method', 'status')))
+http_response_size = registry.add(Histogram(
+    'bfxapp_http_response_size_bytes', 'Response body size, after compression.',
+    ('route',), SIZE_BUCKETS))
+upstream_requests = registry.add(Histogram(
+    'bfxapp_upstream_request_duration_seconds', 'Bitfinex REST call latency, per attempt.',
+    ('endpoint', 'method', 'status')))
+upstream_events = registry.add(Counter(
+    'bfxapp_upstream_events_total', 'Gateway decisions: coalesced, retried, rate_limited.',
+    ('event',)))
+cache_requests = registry.add(Counter(
+    'bfxapp_cache_requests_total', 'Cache lookups by cache and result.',
+    ('cache', 'result')))
+db_queries = registry.add(Histogram(
+    'bfxapp_db_query_duration_seconds', 'Database statement latency.',
+    ('operation',)))
+order_stages = registry.add(Histogram(
+    'bfxapp_order_stage_duration_seconds', 'Order pipeline stage latency.',
+    ('stage',)))
+
+
+# ── Helpers for call sites ────────────────────────────────────────────────────
+_SYMBOL = re.compile(r'(?<=[/:])[tf][A-Z0-9]{3,}(?::[A-Z0-9]+)?')
+
+
+def endpoint_of(url: str) -> str:
+    """'https://…/v2/ticker/tBTCUSD' → 'ticker/{symbol}', so labels stay low-cardinality."""
+    path = urlsplit(url).path
+    return _SYMBOL.sub('{symbol}', path.split('/v2/', 1)[-1])
+
+
+def cache(name: str, hit: bool) -> None:
+    cache_requests.inc(name, 'hit' if hit else 'miss')
+
+
+# ── Per-request timing breakdown ──────────────────────────────────────────────
+class _RequestTimings:
+    """Accumulated time per component for one request, across fan-out threads."""
+
+    def __init__(self):
+        self.components: Dict[str, List[float]] = {}   # name → [seconds, count]
+        self.lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self.lock:
+            entry = self.components.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+
+# Set per request; services.fanout copies the context into its workers so
+# upstream calls made there still count towards the request that caused them.
+_current: contextvars.ContextVar[Optional[_RequestTimings]] = contextvars.ContextVar(
+    'request_timings', default=None)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add `seconds` to component `name` of the current request's Server-Timing, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def _server_timing(total: float, timings: _RequestTimings) -> str:
+    parts = [f'app;dur={total * 1000:.1f}']
+    with timings.lock:
+        components = sorted(timings.components.items())
+    for name, (seconds, count) in components:
+        parts.append(f'{name};dur={seconds * 1000:.1f};desc="{count}x"')
+    return ', '.join(parts)
+
+
+# ── Flask / SQLAlchemy hooks ──────────────────────────────────────────────────
+def _before_request() -> None:
+    g.metrics_started = time.perf_counter()
+    g.metrics_token   = _current.set(_RequestTimings())
+
+
+def _after_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route   = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    http_requests.observe(elapsed, route, request.method, str(response.status_code))
+    if not response.is_streamed and response.content_length is not None:
+        http_response_size.observe(response.content_length, route)
+
+    timings = _current.get()
+    if timings is not None and (SERVER_TIMING or request.headers.get('X-Server-Timing') == '1'):
+        response.headers['Server-Timing']      = _server_timing(elapsed, timings)
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+
+def _teardown_request(_exc) -> None:
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        try:
+            _current.reset(token)
+        except ValueError:
+            _current.set(None)   # torn down in a different context than it was set in
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany):
+    stack = conn.info.get('metrics_started')
+    if not stack:
+        return
+    elapsed   = time.perf_counter() - stack.pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+    db_queries.observe(elapsed, operation)
+    record('db', elapsed)
+
+
+def init_app(app: Flask) -> None:
+    """Time every request and DB statement (call after database.init_app)."""
+    if not METRICS_ENABLED:
+        return
+    from extensions import db
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from flask import Flask
+from sqlalchemy import update
+
+from extensions import db
+from models.user_keys import UserKeys
+from services import clients, credentials
+from services.wallet_sessions import wallet_sessions
+from utils.background import PeriodicTask
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Key pairs checked against Bitfinex at once; saves beyond that queue up.
+KEY_VALIDATION_WORKERS        = int(os.environ.get('KEY_VALIDATION_WORKERS', 4))
+# Results kept per process by key fingerprint, and for how long: a re-submitted
+# pair is answered from here without asking Bitfinex again.
+KEY_VALIDATION_CACHE_SIZE     = int(os.environ.get('KEY_VALIDATION_CACHE_SIZE', 10000))
+KEY_VALIDATION_VALID_TTL      = float(os.environ.get('KEY_VALIDATION_VALID_TTL', 24 * 60 * 60))
+KEY_VALIDATION_INVALID_TTL    = float(os.environ.get('KEY_VALIDATION_INVALID_TTL', 10 * 60))
+# Keys still pending (Bitfinex unreachable, or a restart mid-check) are retried
+# after this long, doubling per inconclusive attempt up to the cap.  They stay
+# pending until Bitfinex answers: only a credentials error rejects a pair.
+KEY_VALIDATION_RETRY_INTERVAL = float(os.environ.get('KEY_VALIDATION_RETRY_INTERVAL', 60))
+KEY_VALIDATION_MAX_BACKOFF    = float(os.environ.get('KEY_VALIDATION_MAX_BACKOFF', 60 * 60))
+
+PENDING, VALID, INVALID = 'pending', 'valid', 'invalid'
+
+# Fingerprints only mean something inside this process, so the secret half of
+# a pair cannot be recovered or matched from a fingerprint seen anywhere else.
+_FINGERPRINT_KEY = os.urandom(32)
+
+
+def fingerprint(api_key: str, api_secret: str) -> str:
+    return hashlib.blake2b(f'{api_key}\0{api_secret}'.encode('utf-8'), key=_FINGERPRINT_KEY,
+                           digest_size=16).hexdigest()
+
+
+class KeyValidator:
+    """
+    Checks saved API keys against Bitfinex off the request path.
+
+    POST /auth/keys stores a new pair as `pending` and returns at once; a
+    small bounded pool asks Bitfinex (get_user_info) and flips the row to
+    `valid` or `invalid`.  Outcomes are cached by key fingerprint, so saving
+    the same pair again - another device, a retried request - is answered
+    without a round trip, and one pair is never checked twice concurrently:
+    every user waiting on it gets the one outcome.
+    """
+
+    def __init__(self, workers: int, cache_size: int, valid_ttl: float, invalid_ttl: float,
+                 retry_interval: float, max_backoff: float):
+        self.cache_size     = cache_size
+        self.valid_ttl      = valid_ttl
+        self.invalid_ttl    = invalid_ttl
+        self.retry_interval = retry_interval
+        self.max_backoff    = max_backoff
+
+        self._app: Optional[Flask] = None
+        self._results: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()   # fingerprint → (status, expiry)
+        self._waiting:  Dict[str, Set[str]] = {}               # fingerprint → users whose pair is being checked
+        self._retry_at: Dict[str, Tuple[int, float]] = {}      # fingerprint → (inconclusive attempts, next try)
+        self._lock    = threading.Lock()
+        self._pool    = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='key-validation')
+        self._sweeper = PeriodicTask('key-validation', retry_interval, self._sweep,
+                                     run_immediately=True)
+
+    def init_app(self, app: Flask) -> None:
+        """Results are written back to the DB, which needs the app; pending rows are resumed."""
+        self._app = app
+        app.before_request(self._sweeper.start)
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def cached(self, api_key: str, api_secret: str) -> Optional[str]:
+        """`valid` or `invalid` when this pair was checked recently, else None."""
+        fp  = fingerprint(api_key, api_secret)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(fp)
+            if entry is None or entry[1] <= now:
+                return None
+            self._results.move_to_end(fp)
+            return entry[0]
+
+    def submit(self, user_id: str, api_key: str, api_secret: str) -> None:
+        """Queue a check of the user's pending pair, or wait on the one already queued for it."""
+        fp = fingerprint(api_key, api_secret)
+        with self._lock:
+            waiting = self._waiting.get(fp)
+            if waiting is not None:
+                waiting.add(user_id)
+                return
+            self._waiting[fp] = {user_id}
+        self._pool.submit(self._validate, user_id, api_key, api_secret, fp)
+
+    # ── Worker ────────────────────────────────────────────────────────────────
+    def _validate(self, user_id: str, api_key: str, api_secret: str, fp: str) -> None:
+        try:
+            status = self._check(user_id, api_key, api_secret)
+        except Exception:
+            log.exception('Key validation for %s failed', user_id)
+            status = None
+        users = self._finish(fp, status)
+        if status is None:
+            return
+        for waiting_user in users:
+            try:
+                self._record(waiting_user, api_key, api_secret, status)
+            except Exception:
+                log.exception('Storing key validation for %s failed', waiting_user)
+
+    def _finish(self, fp: str, status: Optional[str]) -> Set[str]:
+        """Cache a verdict, or schedule the next attempt; returns the users that were waiting."""
+        now = time.monotonic()
+        with self._lock:
+            users = self._waiting.pop(fp, set())
+            if status is None:
+                attempts = self._retry_at.get(fp, (0, 0.0))[0] + 1
+                delay    = min(self.retry_interval * 2 ** (attempts - 1), self.max_backoff)
+                self._retry_at[fp] = (attempts, now + delay)
+                log.warning('Key validation inconclusive (attempt %d), retrying in %.0fs', attempts, delay)
+                return users
+            self._retry_at.pop(fp, None)
+            ttl = self.valid_ttl if status == VALID else self.invalid_ttl
+            self._results[fp] = (status, now + ttl)
+            self._results.move_to_end(fp)
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return users
+
+    def _check(self, user_id: str, api_key: str, api_secret: str) -> Optional[str]:
+        """VALID, INVALID (credentials rejected), or None when Bitfinex gave no answer."""
+        from bfxapi.exceptions import InvalidCredentialError
+        try:
+            # Goes through the registry so a valid pair leaves a warm client behind
+            clients.auth_client(user_id, api_key, api_secret).rest.auth.get_user_info()
+            return VALID
+        except InvalidCredentialError as e:
+            log.warning('Key validation for %s failed: %s', user_id, e)
+            return INVALID
+        except Exception as e:
+            # Outages, timeouts, rate limits: say nothing about the keys
+            log.warning('Key validation for %s inconclusive: %s', user_id, e)
+            return None
+
+    def _record(self, user_id: str, api_key: str, api_secret: str, status: str) -> None:
+        """Store the outcome, unless the user has saved other keys in the meantime."""
+        with self._app.app_context():
+            result = db.session.execute(
+                update(UserKeys)
+                .where(UserKeys.user_id == user_id, UserKeys.api_key == api_key,
+                       UserKeys.api_secret == api_secret, UserKeys.status == PENDING)
+                .values(status=status, validated_at=datetime.utcnow()))
+            db.session.commit()
+        if not result.rowcount:
+            return
+        credentials.invalidate(user_id)
+        if status == INVALID:
+            clients.invalidate(user_id)
+            wallet_sessions.close(user_id)
+        log.info('API keys of %s are %s', user_id, status)
+
+    def _sweep(self) -> None:
+        """Re-queue pending rows nobody is checking (after a restart) or whose retry is due."""
+        with self._app.app_context():
+            rows = (UserKeys.query.with_entities(UserKeys.user_id, UserKeys.api_key, UserKeys.api_secret)
+                    .filter(UserKeys.status == PENDING).all())
+        pending = [(fingerprint(row.api_key, row.api_secret), row) for row in rows]
+        now     = time.monotonic()
+        with self._lock:
+            # Pairs no longer pending anywhere (replaced or deleted) need no retry
+            live = {fp for fp, _ in pending}
+            for fp in [fp for fp in self._retry_at if fp not in live]:
+                del self._retry_at[fp]
+            due = [row for fp, row in pending if self._retry_at.get(fp, (0, 0.0))[1] <= now]
+        for user_id, api_key, api_secret in due:
+            self.submit(user_id, api_key, api_secret)
+
+
+key_validator = KeyValidator(KEY_VALIDATION_WORKERS, KEY_VALIDATION_CACHE_SIZE,
+                             KEY_VALIDATION_VALID_TTL, KEY_VALIDATION_INVALID_TTL,
+                             KEY_VALIDATION_RETRY_INTERVAL, KEY_VALIDATION_MAX_BACKOFF)
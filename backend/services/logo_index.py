@@ -0,0 +1,279 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.coingecko_index import coingecko_index
+from utils.disk_cache import BASE_DIR, cache_path
+
+log = logging.getLogger(__name__)
+
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+LOGO_DIR         = os.path.join(BASE_DIR, 'logos')
+LOGO_VARIANT_DIR = cache_path('logos')
+LOGO_SIZES       = tuple(int(s) for s in os.environ.get('LOGO_SIZES', '32,64,128').split(','))
+# Generate every size/format variant on a background thread at startup
+# instead of on first request.
+LOGO_PREGENERATE = os.environ.get('LOGO_PREGENERATE', '1') == '1'
+
+VARIANT_FORMATS = ('webp', 'png')
+
+# Ticker base currency → the symbol its logo file is named after
+ALIASES = {'BORG': 'CHSB'}
+
+MIMETYPES = {'png': 'image/png', 'svg': 'image/svg+xml', 'webp': 'image/webp'}
+
+# Original path → content hash.  Two threads hashing the same file at once
+# both get the same answer, so filling it needs no lock.
+_digests: Dict[str, str] = {}
+
+_Image = False   # PIL.Image once imported, None when Pillow is missing
+
+
+def _pillow():
+    """PIL.Image, imported on first use; without Pillow every size is served from the original file."""
+    global _Image
+    if _Image is False:
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+        _Image = Image
+    return _Image
+
+
+@dataclass(frozen=True)
+class Logo:
+    symbol:   str
+    filename: str
+
+    @property
+    def digest(self) -> str:
+        """Content hash of the original, used in immutable URLs; read once per file."""
+        digest = _digests.get(self.path)
+        if digest is None:
+            digest = _digests[self.path] = _digest(self.path)
+        return digest
+
+    @property
+    def ext(self) -> str:
+        return self.filename.rsplit('.', 1)[1].lower()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(LOGO_DIR, self.filename)
+
+    @property
+    def slug(self) -> Optional[str]:
+        """'curve-dao-token' for 'curve-dao-token-crv-logo.png'; None for bare `<SYMBOL>.png` files."""
+        stem = self.filename.rsplit('.', 1)[0]
+        if not stem.endswith('-logo'):
+            return None
+        return stem.rsplit('-', 2)[0]
+
+    @property
+    def resizable(self) -> bool:
+        return self.ext == 'png' and _pillow() is not None
+
+
+def _symbol_of(filename: str) -> Optional[str]:
+    """'0x-zrx-logo.png' → 'ZRX', 'CHSB.png' → 'CHSB'; None for anything else."""
+    stem, _, ext = filename.rpartition('.')
+    if ext.lower() not in ('png', 'svg'):
+        return None
+    if stem.endswith('-logo'):
+        parts = stem.split('-')
+        return parts[-2].upper() if len(parts) >= 3 else None
+    return stem.upper() if stem.isupper() or stem.isdigit() else None
+
+
+def _rank(filename: str) -> int:
+    """Preferred original when several files carry the same symbol (lower wins)."""
+    if filename.endswith('-logo.png'):
+        return 0
+    return 1 if filename.endswith('.png') else 2
+
+
+def _digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class LogoIndex:
+    """
+    Symbol → logo file, built with one scan of the logos directory, plus
+    resized variants (LOGO_SIZES × webp/png) cached on disk under their
+    content hash so their URLs never change meaning and can be cached forever.
+
+    Files are named `<slug>-<symbol>-logo.<ext>`, where the slug is usually
+    the coin's CoinGecko id or name.  When several coins share a symbol
+    (AMP, DAI, CRV, ...) or a currency has no file under its own symbol, the
+    CoinGecko index picks the file for the coin Bitfinex actually lists.
+
+    The scan only reads file names.  Hashing every original (about 100 MB)
+    is left to `warm()` on the warm-up thread; until it gets there, a request
+    hashes just the logos it serves.
+    """
+
+    def __init__(self, logo_dir: str, variant_dir: str, sizes: Tuple[int, ...]):
+        self.logo_dir    = logo_dir
+        self.variant_dir = variant_dir
+        self.sizes       = sizes
+
+        self._by_symbol: Optional[Dict[str, Logo]] = None
+        self._by_file:   Dict[str, Logo] = {}
+        self._by_slug:   Dict[str, Logo] = {}
+        self._shared:    Dict[str, List[Logo]] = {}   # symbol → every candidate, when > 1
+        self._rendering: Dict[str, threading.Lock] = {}   # variant path → its render, one at a time
+        self._lock       = threading.Lock()
+
+    def _build(self) -> Dict[str, Logo]:
+        by_symbol: Dict[str, Logo] = {}
+        by_file:   Dict[str, Logo] = {}
+        by_slug:   Dict[str, Logo] = {}
+        all_for:   Dict[str, List[Logo]] = {}
+        with os.scandir(self.logo_dir) as entries:
+            files = sorted(e.name for e in entries if e.is_file())
+        for filename in files:
+            symbol = _symbol_of(filename)
+            if symbol is None:
+                continue
+            logo = Logo(symbol, filename)
+            by_file[filename] = logo
+            current = by_symbol.get(symbol)
+            if current is None or _rank(filename) < _rank(current.filename):
+                by_symbol[symbol] = logo
+            if logo.slug:
+                current = by_slug.get(logo.slug)
+                if current is None or _rank(filename) < _rank(current.filename):
+                    by_slug[logo.slug] = logo
+                # One entry per coin: keep the preferred file of each slug
+                same = [l for l in all_for.setdefault(symbol, []) if l.slug == logo.slug]
+                if not same:
+                    all_for[symbol].append(logo)
+                elif _rank(filename) < _rank(same[0].filename):
+                    all_for[symbol][all_for[symbol].index(same[0])] = logo
+        self._by_file = by_file
+        self._by_slug = by_slug
+        self._shared  = {symbol: logos for symbol, logos in all_for.items() if len(logos) > 1}
+        log.info('Logo index built: %d symbols from %d files', len(by_symbol), len(by_file))
+        return by_symbol
+
+    def _index(self) -> Dict[str, Logo]:
+        index = self._by_symbol
+        if index is None:
+            with self._lock:
+                if self._by_symbol is None:
+                    self._by_symbol = self._build()
+                    if LOGO_PREGENERATE and _pillow() is not None:
+                        threading.Thread(target=self.pregenerate, name='logo-variants',
+                                         daemon=True).start()
+                index = self._by_symbol
+        return index
+
+    def warm(self) -> None:
+        """Scan, then hash every original, so no request has to."""
+        self._index()
+        hashed = sum(1 for logo in list(self._by_file.values()) if logo.digest)
+        log.info('Logo digests ready: %d', hashed)
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+    def find(self, symbol: str) -> Optional[Logo]:
+        symbol = symbol.upper()
+        key    = ALIASES.get(symbol, symbol)
+        logo   = self._index().get(key)
+        if logo is not None and key not in self._shared:
+            return logo
+        coin = coingecko_index.coin(symbol)
+        if coin is None:
+            return logo
+        if logo is None:
+            logo = next(filter(None, map(self._by_slug.get, coin.slugs)), None)
+            # Served under the symbol asked for, so its variant URLs resolve back here
+            return replace(logo, symbol=key) if logo is not None else None
+        return next((l for l in self._shared[key] if l.slug in coin.slugs), logo)
+
+    def find_file(self, filename: str) -> Optional[Logo]:
+        """Exact filename hit, else the symbol parsed from a legacy `<name>-<sym>-logo.png` URL."""
+        self._index()
+        logo = self._by_file.get(filename)
+        if logo is None:
+            symbol = _symbol_of(filename)
+            logo   = self.find(symbol) if symbol else None
+        return logo
+
+    def many(self, symbols: Iterable[str]) -> Dict[str, Logo]:
+        found = {}
+        for symbol in symbols:
+            logo = self.find(symbol)
+            if logo is not None:
+                found[symbol] = logo
+        return found
+
+    # ── Variants ──────────────────────────────────────────────────────────────
+    def variant_name(self, logo: Logo, size: Optional[int], fmt: str) -> str:
+        """File name served for a logo: the original, or `<SYMBOL>-<size>.<fmt>`."""
+        if size is None or not logo.resizable:
+            return f'{logo.symbol}.{logo.ext}'
+        return f'{logo.symbol}-{size}.{fmt}'
+
+    def variant_path(self, logo: Logo, size: Optional[int], fmt: str) -> str:
+        """Path of the requested variant on disk, rendering it first if needed."""
+        if size is None or not logo.resizable:
+            return logo.path
+        path = os.path.join(self.variant_dir, f'{logo.digest}-{size}.{fmt}')
+        if not os.path.exists(path):
+            # Single flight per variant: one render, other requests for it wait;
+            # requests for other variants go ahead in parallel
+            with self._lock:
+                rendering = self._rendering.setdefault(path, threading.Lock())
+            try:
+                with rendering:
+                    if not os.path.exists(path):
+                        self._render(logo, size, fmt, path)
+            finally:
+                with self._lock:
+                    self._rendering.pop(path, None)
+        return path
+
+    def _render(self, logo: Logo, size: int, fmt: str, path: str) -> None:
+        os.makedirs(self.variant_dir, exist_ok=True)
+        Image = _pillow()
+        with Image.open(logo.path) as img:
+            img = img.convert('RGBA')
+            img.thumbnail((size, size), Image.LANCZOS)
+            fd, tmp = tempfile.mkstemp(dir=self.variant_dir, prefix='.logo.')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    if fmt == 'webp':
+                        img.save(f, 'WEBP', quality=85, method=4)
+                    else:
+                        img.save(f, 'PNG', optimize=True)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def pregenerate(self) -> None:
+        done = 0
+        for logo in list(self._index().values()):
+            if not logo.resizable:
+                continue
+            for size in self.sizes:
+                for fmt in VARIANT_FORMATS:
+                    try:
+                        self.variant_path(logo, size, fmt)
+                        done += 1
+                    except Exception as e:
+                        log.warning('Could not render %s at %dpx: %s', logo.filename, size, e)
+        log.info('Logo variants ready: %d', done)
+
+
+logo_index = LogoIndex(LOGO_DIR, LOGO_VARIANT_DIR, LOGO_SIZES)
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from services import instrumentation
+from services.clients import public_client
+from services.pair_index import pair_index
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+MARKET_DATA_ENABLED  = os.environ.get('MARKET_DATA_ENABLED', '1') == '1'
+MARKET_DATA_WSS_HOST = os.environ.get('MARKET_DATA_WSS_HOST', 'wss://api-pub.bitfinex.com/ws/2')
+# A websocket price older than this is considered stale and re-fetched over REST.
+PRICE_MAX_AGE        = float(os.environ.get('MARKET_DATA_PRICE_MAX_AGE', 30))
+
+# Quote currencies we stream: USD and UST (Bitfinex's internal name for USDT)
+STREAMED_QUOTES = ('USD', 'UST')
+
+_BACKOFF_MIN = 1.0
+_BACKOFF_MAX = 60.0
+
+
+@dataclass(frozen=True)
+class PriceEntry:
+    price:      float
+    updated_at: float
+    source:     str    # 'ws' or 'rest'
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+
+class MarketDataEngine:
+    """
+    Long-lived last-price table fed by the Bitfinex public websocket.
+
+    A daemon thread runs its own asyncio loop with a bfxapi websocket client
+    subscribed to the ticker channel of every USD/UST exchange pair.  bfxapi
+    recovers subscriptions on transient drops; anything fatal tears the client
+    down and the supervisor reconnects with exponential backoff, subscribing
+    to the full pair list again.
+
+    Readers call `get_price`, which answers from the table when the entry is
+    fresher than `max_age` and otherwise falls back to one REST ticker call.
+    """
+
+    def __init__(self, wss_host: str, max_age: float, enabled: bool = True):
+        self.wss_host = wss_host
+        self.max_age  = max_age
+        self.enabled  = enabled
+
+        self._prices: Dict[str, PriceEntry] = {}
+        self._symbols: Set[str] = set()
+        self._thread = None
+        self._lock   = threading.Lock()
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._supervise()),
+                                            name='market-data', daemon=True)
+            self._thread.start()
+
+    async def _supervise(self) -> None:
+        delay = _BACKOFF_MIN
+        while True:
+            started = time.time()
+            try:
+                await self._run_once()
+                log.warning('Market data websocket closed; reconnecting')
+            except Exception as e:
+                log.warning('Market data websocket failed: %s', e)
+
+            # A connection that stayed up for a while resets the backoff
+            if time.time() - started > _BACKOFF_MAX:
+                delay = _BACKOFF_MIN
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _BACKOFF_MAX)
+
+    async def _run_once(self) -> None:
+        from bfxapi import Client
+        symbols = await asyncio.to_thread(self._load_symbols)
+        bfx = Client(wss_host=self.wss_host)
+
+        @bfx.wss.on('open')
+        async def on_open():
+            log.info('Market data websocket open; subscribing to %d tickers', len(symbols))
+            for symbol in sorted(symbols):
+                await bfx.wss.subscribe('ticker', symbol=symbol)
+
+        @bfx.wss.on('t_ticker_update')
+        def on_t_ticker_update(subscription, ticker):
+            self.update(subscription['symbol'], ticker.last_price, source='ws')
+
+        await bfx.wss.start()
+
+    def _load_symbols(self) -> Set[str]:
+        """Every USD/UST exchange pair as a t-prefixed symbol."""
+        symbols = pair_index.symbols_quoted_in(STREAMED_QUOTES)
+        if not symbols:
+            raise RuntimeError('pair index is empty')
+        self._symbols = symbols
+        return symbols
+
+    # ── Price table ───────────────────────────────────────────────────────────
+    def update(self, symbol: str, price: Optional[float], source: str = 'ws') -> None:
+        if price is None:
+            return
+        self._prices[symbol] = PriceEntry(float(price), time.time(), source)
+
+    def last_price(self, symbol: str) -> Optional[PriceEntry]:
+        """Table entry for `symbol` regardless of age; never calls upstream."""
+        return self._prices.get(symbol)
+
+    def get_price(self, symbol: str, max_age: Optional[float] = None,
+                  allow_stale: bool = True) -> Optional[float]:
+        """
+        Latest price for a t-prefixed symbol, or None when it cannot be priced.
+        With `allow_stale` a stale table entry is returned if the REST fallback
+        fails too; order sizing passes False so it never trades on an old price.
+        """
+        self.start()
+
+        max_age = self.max_age if max_age is None else max_age
+        entry   = self._prices.get(symbol)
+        if entry is not None and entry.age <= max_age:
+            instrumentation.cache('prices', True)
+            return entry.price
+
+        instrumentation.cache('prices', False)
+        # Known universe and symbol not in it — don't spend a round trip guessing
+        if self._symbols and symbol not in self._symbols:
+            return None
+
+        try:
+            ticker = public_client().rest.public.get_t_ticker(symbol)
+            self.update(symbol, ticker.last_price, source='rest')
+            return float(ticker.last_price)
+        except Exception as e:
+            log.debug('REST price fallback failed for %s: %s', symbol, e)
+
+        if allow_stale and entry is not None:
+            return entry.price
+        return None
+
+
+market_data = MarketDataEngine(MARKET_DATA_WSS_HOST, PRICE_MAX_AGE, enabled=MARKET_DATA_ENABLED)
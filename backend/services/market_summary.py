@@ -0,0 +1,97 @@
+import hashlib
+import heapq
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from services.ticker_snapshot import TickerSnapshot, ticker_store
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Rows kept per ranking; /market/summary?n= can ask for fewer, never more.
+MARKET_SUMMARY_TOP_N = int(os.environ.get('MARKET_SUMMARY_TOP_N', 20))
+
+
+@dataclass(frozen=True)
+class MarketSummary:
+    """Rankings derived from one ticker snapshot, plus the encoded full-size body."""
+    doc:        dict
+    body:       bytes
+    etag:       str
+    fetched_at: float
+
+
+def _row(ticker: dict) -> Optional[dict]:
+    """A /get-tickers row plus the usdVolume / absPercMove fields the app used to derive."""
+    if ticker['ticker'].startswith('tTEST'):
+        return None
+    data   = ticker['tickerData']
+    change = data.get('daily_change_relative') or 0.0
+    return {
+        **ticker,
+        'usdVolume':   round((data.get('volume') or 0.0) * (data.get('last_price') or 0.0), 2),
+        'absPercMove': round(abs(change) * 100, 3),
+    }
+
+
+def build_summary(snapshot: TickerSnapshot, n: int) -> MarketSummary:
+    """Top-n gainers, losers, movers and volume leaders in one O(rows · log n) pass each."""
+    rows = [r for r in map(_row, snapshot.data) if r is not None]
+
+    def change(r):
+        return r['tickerData'].get('daily_change_relative') or 0.0
+
+    doc = {
+        'fetchedAt':      snapshot.fetched_at,
+        'count':          len(rows),
+        'totalUsdVolume': round(sum(r['usdVolume'] for r in rows), 2),
+        'gainers':        heapq.nlargest(n, rows, key=change),
+        'losers':         heapq.nsmallest(n, rows, key=change),
+        'movers':         heapq.nlargest(n, rows, key=lambda r: r['absPercMove']),
+        'volume':         heapq.nlargest(n, rows, key=lambda r: r['usdVolume']),
+    }
+    body = json.dumps(doc, separators=(',', ':')).encode('utf-8')
+    return MarketSummary(doc=doc, body=body, etag=snapshot.etag, fetched_at=snapshot.fetched_at)
+
+
+class MarketSummaryStore:
+    """
+    Holds the summary for the current ticker snapshot.
+
+    Rebuilt by a ticker-store listener right after each refresh, so the
+    rankings are sorted once per refresh rather than once per client.
+    """
+
+    RANKINGS = ('gainers', 'losers', 'movers', 'volume')
+
+    def __init__(self, top_n: int):
+        self.top_n = top_n
+        self._summary: Optional[MarketSummary] = None
+
+    def on_snapshot(self, snapshot: TickerSnapshot) -> None:
+        self._summary = build_summary(snapshot, self.top_n)
+
+    def get(self) -> Optional[MarketSummary]:
+        """Summary for the current servable snapshot, or None when there is none."""
+        snapshot = ticker_store.get()
+        if snapshot is None:
+            return None
+        summary = self._summary
+        if summary is None or summary.etag != snapshot.etag:
+            # Snapshot predates the listener (or its build failed): build inline once
+            summary = self._summary = build_summary(snapshot, self.top_n)
+        return summary
+
+    def truncated(self, summary: MarketSummary, n: int) -> dict:
+        """The summary document with each ranking cut to its first n rows."""
+        doc = dict(summary.doc)
+        for key in self.RANKINGS:
+            doc[key] = doc[key][:n]
+        return doc
+
+
+market_summary = MarketSummaryStore(MARKET_SUMMARY_TOP_N)
+ticker_store.add_listener(market_summary.on_snapshot)
@@ -0,0 +1,212 @@
+import bisect
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from services import instrumentation, upstream
+from services.clients import BFX_PUB_REST_HOST
+from utils.background import PeriodicTask
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Seconds between polls of posts/hist, shared by every client.
+NEWS_REFRESH_INTERVAL = float(os.environ.get('NEWS_REFRESH_INTERVAL', 5 * 60))
+# Posts requested per poll, and posts kept in memory (oldest dropped first).
+NEWS_FETCH_LIMIT      = int(os.environ.get('NEWS_FETCH_LIMIT', 50))
+NEWS_MAX_POSTS        = int(os.environ.get('NEWS_MAX_POSTS', 200))
+# Length of the plain-text summary sent with each post in the list view.
+NEWS_SUMMARY_CHARS    = int(os.environ.get('NEWS_SUMMARY_CHARS', 200))
+
+# After a failed cold-start fetch, wait this long before trying upstream again
+_COLD_RETRY_DELAY = 30.0
+
+# posts/hist row layout: [ID, _, MTS, TITLE, CONTENT, ...]
+_ID, _MTS, _TITLE, _CONTENT = 0, 2, 3, 4
+
+
+# ── HTML → summary text ───────────────────────────────────────────────────────
+class _TextExtractor(HTMLParser):
+    _SKIP = {'script', 'style'}
+    _BREAK = {'p', 'br', 'div', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skipping += 1
+        elif tag in self._BREAK:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skipping:
+            self._skipping -= 1
+        elif tag in self._BREAK:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def summarize(html: str, max_chars: int) -> str:
+    """Plain text of `html`, whitespace collapsed, cut at a word boundary to max_chars."""
+    parser = _TextExtractor()
+    parser.feed(html or '')
+    parser.close()
+    text = _WHITESPACE.sub(' ', ''.join(parser.parts)).strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars + 1]
+    cut = cut.rsplit(' ', 1)[0] if ' ' in cut else cut[:max_chars]
+    return cut.rstrip(' ,.;:-') + '…'
+
+
+@dataclass(frozen=True)
+class Post:
+    id:      int
+    mts:     Optional[int]
+    title:   str
+    body:    str        # original HTML, for the detail view
+    summary: str        # stripped and truncated, for the list view
+    digest:  str        # changes whenever title or body does
+
+    def item(self) -> dict:
+        return {'id': self.id, 'mts': self.mts, 'title': self.title, 'summary': self.summary}
+
+    def detail(self) -> dict:
+        return {'id': self.id, 'mts': self.mts, 'title': self.title, 'body': self.body}
+
+
+def _digest(title: str, body: str) -> str:
+    return hashlib.blake2b(f'{title}\0{body}'.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def fetch_posts(limit: int) -> list:
+    """Raw posts/hist rows (type 1, Bitfinex news), newest first."""
+    response = upstream.gateway.get(f'{BFX_PUB_REST_HOST}/posts/hist',
+                                    params={'limit': limit, 'type': 1},
+                                    headers={'Accept': 'application/json'})
+    data = response.json()
+    if response.status_code != 200 or (isinstance(data, list) and data[:1] == ['error']):
+        raise RuntimeError(f'posts/hist failed: HTTP {response.status_code} {data!r:.200}')
+    return data
+
+
+class NewsStore:
+    """
+    Bitfinex news, polled once per `refresh_interval` for every client.
+
+    Posts are kept by id, at most `max_posts` of the newest, each with its
+    HTML stripped into a short summary once when it first arrives (or
+    changes), not per request.  The etag changes only when a post is added
+    or edited, so a client polling with If-None-Match gets a 304 until there
+    is something new, and `since_id` / `before_id` let it fetch just the
+    posts it has not seen.
+    """
+
+    def __init__(self, refresh_interval: float, fetch_limit: int, max_posts: int, summary_chars: int):
+        self.refresh_interval = refresh_interval
+        self.fetch_limit      = fetch_limit
+        self.max_posts        = max_posts
+        self.summary_chars    = summary_chars
+
+        self._posts: Dict[int, Post] = {}
+        self._ids: List[int] = []          # ascending; replaced whole, never mutated
+        self._etag       = None
+        self._fetched_at = 0.0
+        self._retry_at   = 0.0
+        self._lock       = threading.Lock()
+        self._load_lock  = threading.Lock()
+        self._worker     = PeriodicTask('news-feed', refresh_interval, self.refresh,
+                                        run_immediately=False)
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self._etag
+
+    @property
+    def fetched_at(self) -> float:
+        return self._fetched_at
+
+    def refresh(self) -> None:
+        rows = fetch_posts(self.fetch_limit)
+        with self._lock:
+            changed = False
+            for row in rows:
+                post = self._parse(row)
+                if post is not None and self._posts.get(post.id) != post:
+                    self._posts[post.id] = post
+                    changed = True
+            if changed or self._etag is None:
+                ids = sorted(self._posts)
+                for stale in ids[:-self.max_posts]:
+                    del self._posts[stale]
+                self._ids  = ids[-self.max_posts:]
+                self._etag = hashlib.blake2b(
+                    ','.join(f'{i}:{self._posts[i].digest}' for i in self._ids).encode(),
+                    digest_size=16).hexdigest()
+            self._fetched_at = time.time()
+
+    def _parse(self, row: list) -> Optional[Post]:
+        try:
+            post_id = int(row[_ID])
+            title   = row[_TITLE] or ''
+            body    = row[_CONTENT] or ''
+        except (IndexError, TypeError, ValueError):
+            log.warning('Skipping malformed post row: %r', row)
+            return None
+        digest  = _digest(title, body)
+        current = self._posts.get(post_id)
+        if current is not None and current.digest == digest:
+            return current     # unchanged: keep the summary already computed
+        mts = row[_MTS] if isinstance(row[_MTS], int) else None
+        return Post(id=post_id, mts=mts, title=title, body=body,
+                    summary=summarize(body, self.summary_chars), digest=digest)
+
+    def ensure(self) -> bool:
+        """Start polling; fetch synchronously on a cold start.  False while there is nothing to serve."""
+        self._worker.start()
+        warm = self._etag is not None
+        instrumentation.cache('news', warm)
+        if not warm:
+            with self._load_lock:
+                if self._etag is None and time.time() >= self._retry_at:
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        log.warning('News fetch failed: %s', e)
+                        self._retry_at = time.time() + _COLD_RETRY_DELAY
+        return self._etag is not None
+
+    def page(self, limit: int, before_id: Optional[int] = None,
+             since_id: Optional[int] = None) -> Tuple[List[Post], Optional[int]]:
+        """
+        Up to `limit` posts, newest first, with since_id < id < before_id;
+        plus the before_id for the next (older) page, or None when this is the last.
+        """
+        ids = self._ids
+        hi  = bisect.bisect_left(ids, before_id) if before_id is not None else len(ids)
+        lo  = bisect.bisect_right(ids, since_id) if since_id is not None else 0
+        start = max(lo, hi - limit)
+        # A refresh may drop the oldest ids meanwhile; skip rather than fail
+        posts = [p for p in map(self._posts.get, reversed(ids[start:hi])) if p is not None]
+        return posts, (ids[start] if start > lo else None)
+
+    def get(self, post_id: int) -> Optional[Post]:
+        return self._posts.get(post_id)
+
+
+news_store = NewsStore(NEWS_REFRESH_INTERVAL, NEWS_FETCH_LIMIT, NEWS_MAX_POSTS, NEWS_SUMMARY_CHARS)
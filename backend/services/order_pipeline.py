@@ -0,0 +1,237 @@
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from services.credentials import Credentials
+from services import instrumentation
+from services.market_data import market_data
+from services.wallet_sessions import Balance, wallet_sessions
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Time from receiving an order to handing it to Bitfinex.  Non-critical
+# checks that would start (or still be running) past it are skipped; the
+# exchange enforces them anyway.
+ORDER_LATENCY_BUDGET_MS = float(os.environ.get('ORDER_LATENCY_BUDGET_MS', 750))
+# Check inputs loading at once, across all orders.  Their own pool: a load
+# may call Bitfinex (REST wallets) and must not queue behind, or hold, the
+# shared upstream fan-out pool.
+ORDER_CHECK_MAX_CONCURRENCY = int(os.environ.get('ORDER_CHECK_MAX_CONCURRENCY', 8))
+
+# Stablecoins counted as USD buying power for a USD order
+USD_BUYING_POWER = ('USD', 'USDT', 'USDC', 'UST', 'TUSD', 'DAI')
+
+_check_executor = ThreadPoolExecutor(max_workers=ORDER_CHECK_MAX_CONCURRENCY,
+                                     thread_name_prefix='order-check')
+
+
+class CheckSkipped(Exception):
+    """A non-critical check could not reach a verdict (e.g. a balance not known yet)."""
+
+
+class OrderRejected(Exception):
+    """An order stopped before or at submission; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 422):
+        super().__init__(message)
+        self.message = message
+        self.status  = status
+
+
+@dataclass
+class OrderContext:
+    """One market order as it moves through the pipeline."""
+    creds:         Credentials
+    base:          str      # e.g. 'BTC'
+    side:          str      # 'buy' | 'sell'
+    amount_usd:    float
+    quote_display: str      # 'USD' | 'USDT'
+    bfx_symbol:    str      # e.g. 'tBTCUST'
+
+    price:       Optional[float] = None
+    base_amount: Optional[float] = None     # signed: positive buys, negative sells
+    started:     float = field(default_factory=time.monotonic)
+    timings:     Dict[str, float] = field(default_factory=dict)   # stage → ms
+    skipped:     List[str] = field(default_factory=list)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+
+@dataclass(frozen=True)
+class PreTradeCheck:
+    """
+    `load(ctx)` fetches what the check needs and starts as the order arrives,
+    alongside the price fetch, so it may only use the order's inputs (not
+    ctx.price).  `fn(ctx, loaded)` then decides, without I/O, and raises
+    OrderRejected to stop the order.  A critical check always runs and its
+    errors fail the order; a non-critical one runs only within the latency
+    budget and its errors are logged and ignored.
+    """
+    name:     str
+    fn:       Callable[[OrderContext, Any], None]
+    load:     Optional[Callable[[OrderContext], Any]] = None
+    critical: bool = False
+
+
+class OrderPipeline:
+    """
+    (price ‖ check inputs) → pre-trade checks → submit, each timed into `ctx.timings`.
+
+    Check inputs load concurrently with the price, so the slower of the two
+    sets the latency.  Both read cached state where they can (the live
+    price table, wallet sessions), so in the common case the only upstream
+    round trip on the order path is the submission itself.
+    """
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self._checks: List[PreTradeCheck] = []
+
+    def add_check(self, name: str, fn: Callable[[OrderContext, Any], None],
+                  load: Optional[Callable[[OrderContext], Any]] = None, critical: bool = False) -> None:
+        self._checks.append(PreTradeCheck(name, fn, load, critical))
+
+    def run(self, ctx: OrderContext):
+        """Submit the order described by `ctx`; returns the Bitfinex Order or raises OrderRejected."""
+        loads = {check.name: _check_executor.submit(contextvars.copy_context().run, check.load, ctx)
+                 for check in self._checks if check.load is not None}
+
+        with self._stage(ctx, 'price'):
+            ctx.price = market_data.get_price(ctx.bfx_symbol, allow_stale=False)
+            if ctx.price is None:
+                log.warning('Price fetch failed for %s', ctx.bfx_symbol)
+                raise OrderRejected(f'Could not fetch current price for {ctx.bfx_symbol}', 502)
+            # Bitfinex: positive amount → buy, negative amount → sell
+            ctx.base_amount = round(ctx.amount_usd / ctx.price, 8)
+            if ctx.side == 'sell':
+                ctx.base_amount = -ctx.base_amount
+
+        for check in self._checks:
+            self._run_check(ctx, check, loads.get(check.name))
+
+        with self._stage(ctx, 'submit'):
+            order = self._submit(ctx)
+
+        log.info('Order %s %s %s: %s', ctx.creds.user_id, ctx.side, ctx.bfx_symbol,
+                 ', '.join(f'{k}={v:.1f}ms' for k, v in ctx.timings.items()))
+        return order
+
+    def _run_check(self, ctx: OrderContext, check: PreTradeCheck, load: Optional[Future]) -> None:
+        if check.critical:
+            with self._stage(ctx, check.name):
+                check.fn(ctx, load.result() if load is not None else None)
+            return
+
+        remaining = self.budget_ms - ctx.elapsed_ms()
+        if remaining <= 0:
+            ctx.skipped.append(check.name)
+            return
+        with self._stage(ctx, check.name):
+            try:
+                # Abandoned (not failed) when its input would push the order past the budget
+                loaded = load.result(timeout=remaining / 1000) if load is not None else None
+                check.fn(ctx, loaded)
+                return
+            except OrderRejected:
+                raise
+            except FutureTimeout:
+                error = f'input not loaded within {remaining:.0f}ms'
+            except Exception as e:
+                error = e
+        log.warning('Pre-trade check %s skipped for user %s: %s', check.name, ctx.creds.user_id, error)
+        ctx.skipped.append(check.name)
+
+    @staticmethod
+    def _submit(ctx: OrderContext):
+        try:
+            result = ctx.creds.client().rest.auth.submit_order(
+                type='MARKET',
+                symbol=ctx.bfx_symbol,
+                amount=ctx.base_amount,
+                price=None,    # ignored for MARKET orders, but required by bfxapi v4
+            )
+        except Exception as e:
+            log.exception('Order submission failed for user %s', ctx.creds.user_id)
+            raise OrderRejected(f'Order failed: {str(e)}', 500)
+
+        # Notification[Order] — the inner Order lives in .data
+        if result.status and result.status.upper() == 'ERROR':
+            raise OrderRejected(f'Bitfinex rejected the order: {result.text}')
+
+        wallet_sessions.forget(ctx.creds.user_id)   # next balance read reflects the fill
+        return result.data
+
+    @staticmethod
+    @contextmanager
+    def _stage(ctx: OrderContext, name: str) -> Iterator[None]:
+        """Records the wall time of the block into ctx.timings, even when it raises."""
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - t0
+            ctx.timings[name] = round(elapsed * 1000, 1)
+            instrumentation.order_stages.observe(elapsed, name)
+            instrumentation.record(f'order.{name}', elapsed)
+
+
+# ── Checks ────────────────────────────────────────────────────────────────────
+def load_wallets(ctx: OrderContext) -> List[Balance]:
+    """The user's raw wallet rows: live session, else REST (briefly cached), never valued in USD."""
+    return wallet_sessions.rows(ctx.creds)
+
+
+def check_balance(ctx: OrderContext, wallets: List[Balance]) -> None:
+    """Enough free balance in the exchange wallet."""
+    exchange_balances: Dict[str, Optional[float]] = {}
+    for w in wallets:
+        if w.wallet_type == 'exchange':
+            exchange_balances[w.currency.upper()] = w.available_balance
+
+    def available(currencies) -> float:
+        amounts = [exchange_balances.get(c, 0.0) for c in currencies]
+        if any(a is None for a in amounts):
+            # Unknown is not zero: leave it to the exchange rather than reject
+            raise CheckSkipped(f'available balance of {"/".join(currencies)} not known yet')
+        return sum(amounts)
+
+    if ctx.side == 'buy':
+        if ctx.quote_display == 'USDT':
+            # Only count the USDT (UST) balance
+            available_quote = available(('UST',))
+            quote_name      = 'USDT'
+        else:
+            # Count all USD-pegged currencies for a USD order
+            available_quote = available(USD_BUYING_POWER)
+            quote_name      = 'USD'
+
+        if available_quote < ctx.amount_usd:
+            raise OrderRejected(
+                f'Insufficient {quote_name} balance. '
+                f'You need {ctx.amount_usd:,.2f} {quote_name} '
+                f'but only have {available_quote:,.2f} {quote_name} '
+                f'available in your exchange wallet.'
+            )
+
+    else:  # sell — need enough of the base asset
+        available_base = available((ctx.base,))
+        required_base  = abs(ctx.base_amount)
+        if available_base < required_base:
+            raise OrderRejected(
+                f'Insufficient {ctx.base} balance. '
+                f'You need {required_base:.8f} {ctx.base} '
+                f'(≈ {ctx.amount_usd:,.2f} {ctx.quote_display}) but only have '
+                f'{available_base:.8f} {ctx.base} available.'
+            )
+
+
+order_pipeline = OrderPipeline(ORDER_LATENCY_BUDGET_MS)
+# Non-critical: Bitfinex rejects an underfunded order itself
+order_pipeline.add_check('balance', check_balance, load=load_wallets)
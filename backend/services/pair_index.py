@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from services.clients import public_client
+from utils.background import PeriodicTask
+from utils.disk_cache import load_json, save_json
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+PAIR_INDEX_REFRESH_INTERVAL = float(os.environ.get('PAIR_INDEX_REFRESH_INTERVAL', 60 * 60))
+
+CACHE_FILE = 'pair_index.json'
+
+# Preferred pricing quotes, in order: tXXXUSD, then tXXXUST (Bitfinex's USDT)
+PRICING_QUOTES = ('USD', 'UST')
+
+
+def split_pair(pair: str) -> Tuple[str, str]:
+    """
+    'BTCUSD' → ('BTC', 'USD'), 'TESTBTC:TESTUSD' → ('TESTBTC', 'TESTUSD').
+
+    Bitfinex inserts ':' whenever either side is longer than three characters,
+    so anything without one is a 3 + 3 split.
+    """
+    if ':' in pair:
+        base, quote = pair.split(':', 1)
+        return base, quote
+    return pair[:-3], pair[-3:]
+
+
+class PairMetadata:
+    """Immutable view over the pair/currency conf data; every lookup is a dict hit."""
+
+    def __init__(self, pairs: List[str], labels: Dict[str, str], display: Dict[str, str],
+                 fetched_at: float):
+        self.pairs      = pairs
+        self.labels     = labels
+        self.display    = display      # bfx code → display symbol, e.g. UST → USDT
+        self.fetched_at = fetched_at
+
+        self.by_symbol: Dict[str, Tuple[str, str]] = {}
+        self.by_base_quote: Dict[Tuple[str, str], str] = {}
+        self.quotes: Dict[str, Set[str]] = {}
+        for pair in pairs:
+            base, quote = split_pair(pair)
+            symbol = f't{pair}'
+            self.by_symbol[symbol] = (base, quote)
+            self.by_base_quote[(base, quote)] = symbol
+            self.quotes.setdefault(base, set()).add(quote)
+
+        self.codes = {sym: code for code, sym in display.items()}   # USDT → UST
+        self.usd_pairs = {
+            base: self.by_base_quote[(base, next(q for q in PRICING_QUOTES if q in quotes))]
+            for base, quotes in self.quotes.items()
+            if any(q in quotes for q in PRICING_QUOTES)
+        }
+
+    def to_json(self) -> dict:
+        return {'pairs': self.pairs, 'labels': self.labels, 'display': self.display,
+                'fetched_at': self.fetched_at}
+
+    @classmethod
+    def from_json(cls, doc: dict) -> 'PairMetadata':
+        return cls(doc['pairs'], doc['labels'], doc['display'], doc['fetched_at'])
+
+
+_EMPTY = PairMetadata([], {}, {}, 0.0)
+
+# After a failed cold-start load, wait this long before trying upstream again
+_COLD_RETRY_DELAY = 30.0
+
+
+class PairIndex:
+    """
+    Trading-pair metadata built once from Bitfinex's conf endpoints
+    (pub:list:pair:exchange, pub:map:currency:label, pub:map:currency:sym),
+    persisted to disk for warm restarts and refreshed on a schedule.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+
+        self._meta: Optional[PairMetadata] = None
+        self._retry_at = 0.0
+        self._lock     = threading.Lock()
+        self._worker   = PeriodicTask('pair-index', refresh_interval, self.refresh,
+                                      run_immediately=False)
+
+    def refresh(self) -> PairMetadata:
+        pub     = public_client().rest.public
+        pairs   = pub.conf('pub:list:pair:exchange')
+        labels  = dict(pub.conf('pub:map:currency:label'))
+        display = dict(pub.conf('pub:map:currency:sym'))
+
+        meta = PairMetadata(pairs, labels, display, time.time())
+        self._meta = meta
+        try:
+            save_json(CACHE_FILE, meta.to_json())
+        except OSError as e:
+            log.warning('Could not persist pair index: %s', e)
+        return meta
+
+    def get(self) -> PairMetadata:
+        """Current metadata; loads from disk or upstream on first use."""
+        meta = self._meta
+        if meta is None:
+            with self._lock:
+                meta = self._meta or self._load()
+            self._worker.start()
+        return meta
+
+    def warm(self) -> None:
+        self.get()
+
+    def _load(self) -> PairMetadata:
+        doc = load_json(CACHE_FILE)
+        if doc is not None:
+            self._meta = PairMetadata.from_json(doc)
+            if time.time() - self._meta.fetched_at > self.refresh_interval:
+                self._worker.trigger()
+            return self._meta
+        if time.time() >= self._retry_at:
+            try:
+                return self.refresh()
+            except Exception as e:
+                log.warning('Pair index load failed: %s', e)
+                self._retry_at = time.time() + _COLD_RETRY_DELAY
+        # Cold start with no upstream: an empty index keeps callers on their fallbacks
+        return _EMPTY
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+    def split(self, symbol: str) -> Tuple[str, str]:
+        """(base, quote) for a t-prefixed symbol, even one the index has not seen yet."""
+        return self.get().by_symbol.get(symbol) or split_pair(symbol[1:])
+
+    def label(self, currency: str) -> str:
+        return self.get().labels.get(currency, currency)
+
+    def symbol_for(self, base: str, quote: str) -> Optional[str]:
+        """t-symbol trading `base` against the Bitfinex `quote` code, if listed."""
+        return self.get().by_base_quote.get((base, quote))
+
+    def usd_pair(self, currency: str) -> Optional[str]:
+        """The one symbol that prices `currency` in USD (tXXXUSD preferred, else tXXXUST)."""
+        return self.get().usd_pairs.get(currency)
+
+    def currency_code(self, symbol: str) -> str:
+        """Bitfinex code for a display symbol, e.g. USDT → UST; unknown symbols pass through."""
+        return self.get().codes.get(symbol, symbol)
+
+    def symbols_quoted_in(self, quotes: Iterable[str]) -> Set[str]:
+        quotes = set(quotes)
+        return {s for s, (_, q) in self.get().by_symbol.items() if q in quotes}
+
+
+pair_index = PairIndex(PAIR_INDEX_REFRESH_INTERVAL)
@@ -0,0 +1,455 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.portfolio import PortfolioCursor, PortfolioDaily, PortfolioPosition, PortfolioSnapshot
+from models.user_keys import UserKeys
+from services.credentials import Credentials, get_credentials
+from services.pair_index import pair_index
+from services.valuation import USD_PEGS, usd_prices
+from services.wallet_sessions import Balance, WalletValuation
+from utils.background import PeriodicTask
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+PORTFOLIO_ENABLED           = os.environ.get('PORTFOLIO_ENABLED', '1') == '1'
+# Seconds between worker batches, and keys served per batch.
+PORTFOLIO_TICK_INTERVAL     = float(os.environ.get('PORTFOLIO_TICK_INTERVAL', 30))
+PORTFOLIO_BATCH_SIZE        = int(os.environ.get('PORTFOLIO_BATCH_SIZE', 10))
+# Per-key rate limit: at most PORTFOLIO_KEY_REQUESTS Bitfinex calls every
+# PORTFOLIO_INGEST_INTERVAL seconds; a backfill continues on the next run.
+PORTFOLIO_INGEST_INTERVAL   = float(os.environ.get('PORTFOLIO_INGEST_INTERVAL', 5 * 60))
+PORTFOLIO_KEY_REQUESTS      = int(os.environ.get('PORTFOLIO_KEY_REQUESTS', 8))
+# Valuation snapshots: how often, and how long they are kept (1D/1W ranges);
+# longer ranges are served from the daily rollups, which are kept forever.
+PORTFOLIO_SNAPSHOT_INTERVAL = float(os.environ.get('PORTFOLIO_SNAPSHOT_INTERVAL', 15 * 60))
+PORTFOLIO_SNAPSHOT_DAYS     = int(os.environ.get('PORTFOLIO_SNAPSHOT_DAYS', 8))
+# How far back the first ingestion of a new key reads trades and ledgers.
+PORTFOLIO_BACKFILL_DAYS     = int(os.environ.get('PORTFOLIO_BACKFILL_DAYS', 365))
+
+_MINUTE = 60 * 1000
+_DAY    = 24 * 60 * _MINUTE
+
+# Bitfinex returns at most this many trades / ledger entries per call
+_PAGE_LIMIT = 2500
+# Ingestion windows adapt between these: halved when a call comes back full,
+# doubled when it comes back sparse.
+_MIN_WINDOW_MS     = _MINUTE
+_MAX_WINDOW_MS     = 90 * _DAY
+_INITIAL_WINDOW_MS = 30 * _DAY
+# Stay this far behind now, so entries still being written are not skipped
+_SETTLE_MS = _MINUTE
+# A run holds its key this long; another worker process may take over after
+_LEASE_MS  = 10 * _MINUTE
+
+# Ledger entries that move value in or out of the account ("Deposit (BITCOIN)
+# #123 on wallet Exchange", "Withdrawal #456 ..."); internal transfers such as
+# "Transfer of 1 BTC from wallet Exchange to Deposit" only name a wallet, and
+# fees are losses, not flows
+_FLOW     = re.compile(r'^\s*(deposit|withdrawal)\b', re.IGNORECASE)
+_TRANSFER = re.compile(r'^\s*transfer of\b', re.IGNORECASE)
+_FEE      = re.compile(r'\bfee\b', re.IGNORECASE)
+
+# range → (span in ms or None for everything, source)
+RANGES: Dict[str, Tuple[Optional[int], str]] = {
+    '1D':  (_DAY,       'snapshots'),
+    '1W':  (7 * _DAY,   'snapshots'),
+    '1M':  (30 * _DAY,  'daily'),
+    '3M':  (91 * _DAY,  'daily'),
+    '1Y':  (365 * _DAY, 'daily'),
+    'ALL': (None,       'daily'),
+}
+
+
+def _is_flow(description: str) -> bool:
+    return (bool(_FLOW.search(description)) and not _TRANSFER.search(description)
+            and not _FEE.search(description))
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class _Budget:
+    """Bitfinex calls left for one key in this run."""
+
+    def __init__(self, calls: int):
+        self.calls = calls
+
+    def spend(self) -> bool:
+        if self.calls <= 0:
+            return False
+        self.calls -= 1
+        return True
+
+
+class PortfolioEngine:
+    """
+    Portfolio history and P&L per user, kept up to date in the background.
+
+    A worker serves a batch of keys at a time, each at most once per ingest
+    interval and within a per-key call budget.  For each key it reads trades
+    and ledger entries from its cursors onwards (history is never downloaded
+    twice), folds trades into average-cost positions and deposits/withdrawals
+    into the running net flow, and records a valuation snapshot.  Snapshots
+    roll up into one row per day, so /wallet/history reads stored points and
+    does a constant amount of work per point.
+
+    USD prices for ingested entries are those at ingestion time: exact for
+    USD-quoted trades and for a key that keeps up, approximate for a backfill.
+    """
+
+    def __init__(self, enabled: bool, tick_interval: float, batch_size: int,
+                 ingest_interval: float, key_requests: int, snapshot_interval: float,
+                 snapshot_days: int, backfill_days: int):
+        self.enabled           = enabled
+        self.batch_size        = batch_size
+        self.ingest_interval   = ingest_interval
+        self.key_requests      = key_requests
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_days     = snapshot_days
+        self.backfill_days     = backfill_days
+
+        self._app: Optional[Flask] = None
+        self._observed: Dict[str, Tuple[int, float]] = {}   # user_id → (mts, total_usd) seen by a request
+        self._lock   = threading.Lock()
+        self._worker = PeriodicTask('portfolio', tick_interval, self._tick, run_immediately=False)
+
+    def init_app(self, app: Flask) -> None:
+        """Start the worker with the first request (it needs the app for DB access)."""
+        self._app = app
+        if self.enabled:
+            app.before_request(self._worker.start)
+
+    # ── Hooks for request handlers ────────────────────────────────────────────
+    def observe(self, user_id: str, total_usd: float) -> None:
+        """A valuation a request computed anyway; the next snapshot uses it instead of a fetch."""
+        with self._lock:
+            self._observed[user_id] = (_now_ms(), total_usd)
+
+    def reset(self, user_id: str) -> None:
+        """Forget everything recorded for the user (keys deleted or replaced by another account)."""
+        for model in (PortfolioCursor, PortfolioPosition, PortfolioSnapshot, PortfolioDaily):
+            model.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+        with self._lock:
+            self._observed.pop(user_id, None)
+
+    # ── Worker ────────────────────────────────────────────────────────────────
+    def _tick(self) -> None:
+        with self._app.app_context():
+            self._enroll()
+            for cursor_id in self._claim():
+                try:
+                    self._run(cursor_id)
+                except Exception as e:
+                    db.session.rollback()
+                    log.warning('Portfolio ingestion for cursor %d failed: %s', cursor_id, e)
+                finally:
+                    self._release(cursor_id)
+                    db.session.remove()
+
+    def _enroll(self) -> None:
+        """Start tracking validated keys that have no cursor yet, reading back `backfill_days`."""
+        tracked = select(PortfolioCursor.user_id)
+        new     = (UserKeys.query.with_entities(UserKeys.user_id)
+                   .filter(UserKeys.status == 'valid', UserKeys.user_id.notin_(tracked))
+                   .limit(self.batch_size).all())
+        start   = _now_ms() - self.backfill_days * _DAY
+        for (user_id,) in new:
+            db.session.add(PortfolioCursor(
+                user_id=user_id, trades_mts=start, trades_window_ms=_INITIAL_WINDOW_MS,
+                ledgers_mts=start, ledgers_window_ms=_INITIAL_WINDOW_MS,
+                cum_flow_usd=0.0, snapshot_mts=0, next_run_mts=0, lease_until_mts=0))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()   # another worker process enrolled them first
+
+    def _claim(self) -> List[int]:
+        """Lease up to `batch_size` due cursors; other worker processes skip leased ones."""
+        now = _now_ms()
+        due = (db.session.query(PortfolioCursor.id)
+               .filter(PortfolioCursor.next_run_mts <= now, PortfolioCursor.lease_until_mts < now)
+               .order_by(PortfolioCursor.next_run_mts).limit(self.batch_size).all())
+        claimed = []
+        for (cursor_id,) in due:
+            result = db.session.execute(
+                update(PortfolioCursor)
+                .where(PortfolioCursor.id == cursor_id, PortfolioCursor.lease_until_mts < now)
+                .values(lease_until_mts=now + _LEASE_MS))
+            if result.rowcount:
+                claimed.append(cursor_id)
+        db.session.commit()
+        return claimed
+
+    def _release(self, cursor_id: int) -> None:
+        db.session.execute(update(PortfolioCursor).where(PortfolioCursor.id == cursor_id)
+                           .values(lease_until_mts=0,
+                                   next_run_mts=_now_ms() + int(self.ingest_interval * 1000)))
+        db.session.commit()
+
+    def _run(self, cursor_id: int) -> None:
+        cursor = db.session.get(PortfolioCursor, cursor_id)
+        creds  = get_credentials(cursor.user_id)
+        if creds is None:
+            return
+        bfx    = creds.client()
+        budget = _Budget(self.key_requests)
+
+        self._snapshot(cursor, creds, budget)
+        # Trades are asked for oldest first; ledger entries always come newest first
+        self._ingest(cursor, 'trades', budget,
+                     lambda **kw: bfx.rest.auth.get_trades_history(sort=1, **kw), self._apply_trades,
+                     mts=lambda t: t.mts_create, newest_first=False)
+        self._ingest(cursor, 'ledgers', budget,
+                     lambda **kw: bfx.rest.auth.get_ledgers(**kw), self._apply_ledgers,
+                     mts=lambda e: e.mts, newest_first=True)
+        db.session.query(PortfolioSnapshot).filter(
+            PortfolioSnapshot.user_id == cursor.user_id,
+            PortfolioSnapshot.mts < _now_ms() - self.snapshot_days * _DAY).delete()
+        db.session.commit()
+
+    # ── Ingestion ─────────────────────────────────────────────────────────────
+    def _ingest(self, cursor: PortfolioCursor, stream: str, budget: _Budget,
+                fetch: Callable[..., list], apply: Callable[[PortfolioCursor, list], None],
+                mts: Callable[[object], int], newest_first: bool) -> None:
+        """
+        Read `stream` forwards from its cursor in time windows, one call each,
+        until caught up or out of budget.  A window that comes back full is
+        halved and read again; one that is still full at _MIN_WINDOW_MS is
+        paged through (see _page).  Each applied window commits together with
+        the cursor that covers it, so no entry is skipped or applied twice.
+        """
+        position = getattr(cursor, f'{stream}_mts')
+        window   = getattr(cursor, f'{stream}_window_ms')
+        until    = _now_ms() - _SETTLE_MS
+        while position < until and budget.spend():
+            end  = min(position + window, until)
+            rows = fetch(start=position + 1, end=end, limit=_PAGE_LIMIT)
+            if len(rows) >= _PAGE_LIMIT:
+                if end - position > _MIN_WINDOW_MS:
+                    window = max(_MIN_WINDOW_MS, (end - position) // 2)
+                    continue
+                rows = self._page(cursor, stream, budget, fetch, mts, newest_first,
+                                  rows, position + 1, end)
+                if rows is None:
+                    return   # out of budget: the window is read again on the next run
+            apply(cursor, rows)
+            position = end
+            if len(rows) < _PAGE_LIMIT // 4:
+                window = min(_MAX_WINDOW_MS, window * 2)
+            setattr(cursor, f'{stream}_mts', position)
+            setattr(cursor, f'{stream}_window_ms', window)
+            db.session.commit()
+
+    @staticmethod
+    def _page(cursor: PortfolioCursor, stream: str, budget: _Budget, fetch: Callable[..., list],
+              mts: Callable[[object], int], newest_first: bool, rows: list,
+              start: int, end: int) -> Optional[list]:
+        """
+        Every entry of a window too busy for one call: call again from the
+        last row's time (its millisecond may hold more entries) until a page
+        comes back short, dropping the rows seen twice by id.  None when the
+        budget runs out first.
+        """
+        seen = {row.id: row for row in rows}
+        while len(rows) >= _PAGE_LIMIT:
+            edge = mts(rows[-1])
+            if edge == (end if newest_first else start):
+                # A whole page within one millisecond: its time can't move the next call on
+                log.warning('Portfolio %s for %s: over %d entries at %d, some were skipped',
+                            stream, cursor.user_id, _PAGE_LIMIT, edge)
+                break
+            if not budget.spend():
+                return None
+            if newest_first:
+                end = edge
+            else:
+                start = edge
+            rows = fetch(start=start, end=end, limit=_PAGE_LIMIT)
+            for row in rows:
+                seen.setdefault(row.id, row)
+        return list(seen.values())
+
+    def _apply_trades(self, cursor: PortfolioCursor, trades: list) -> None:
+        """Each fill buys one currency with another: both legs, plus the fee, hit the positions."""
+        legs   = [(t, *pair_index.split(t.symbol)) for t in sorted(trades, key=lambda t: (t.mts_create, t.id))]
+        prices = usd_prices([quote for _, _, quote in legs])
+        positions = self._positions(cursor.user_id)
+        for t, base, quote in legs:
+            quote_usd = prices.get(quote)
+            if quote_usd is None:
+                log.debug('Portfolio: no USD price for %s, trade %d left out', quote, t.id)
+                continue
+            self._leg(positions, cursor.user_id, base, t.exec_amount, t.exec_price * quote_usd)
+            self._leg(positions, cursor.user_id, quote, -t.exec_amount * t.exec_price, quote_usd)
+            if t.fee and t.fee_currency:
+                self._leg(positions, cursor.user_id, t.fee_currency, t.fee, 0.0)
+
+    def _apply_ledgers(self, cursor: PortfolioCursor, entries: list) -> None:
+        """Deposits and withdrawals: the net flow (for P&L) and the cost basis they bring or take."""
+        flows  = [e for e in entries if e.amount and _is_flow(e.description or '')]
+        prices = usd_prices(e.currency for e in flows)
+        positions = self._positions(cursor.user_id)
+        for e in sorted(flows, key=lambda e: (e.mts, e.id)):
+            price = prices.get(e.currency)
+            if price is None:
+                continue
+            self._leg(positions, cursor.user_id, e.currency, e.amount, price if e.amount > 0 else None)
+            self._add_flow(cursor, e.mts, e.amount * price)
+
+    def _positions(self, user_id: str) -> Dict[str, PortfolioPosition]:
+        return {p.currency: p for p in PortfolioPosition.query.filter_by(user_id=user_id)}
+
+    @staticmethod
+    def _leg(positions: Dict[str, PortfolioPosition], user_id: str, currency: str,
+             amount: float, unit_usd: Optional[float]) -> None:
+        """
+        Apply `amount` of `currency` at `unit_usd` each, average-cost: a buy adds
+        to the cost, a sale realizes the difference to the average.  unit_usd
+        None moves units out at cost (a withdrawal realizes nothing).
+        """
+        if currency in USD_PEGS or not amount:
+            return
+        position = positions.get(currency)
+        if position is None:
+            position = positions[currency] = PortfolioPosition(
+                user_id=user_id, currency=currency, amount=0.0, cost_usd=0.0, realized_usd=0.0)
+            db.session.add(position)
+        if amount > 0:
+            position.amount   += amount
+            position.cost_usd += amount * (unit_usd or 0.0)
+            return
+        # Units bought before the backfill window have no known cost: only the tracked part counts
+        sold    = min(-amount, position.amount)
+        average = position.cost_usd / position.amount if position.amount > 0 else 0.0
+        if unit_usd is not None:
+            position.realized_usd += sold * (unit_usd - average)
+        position.cost_usd = max(0.0, position.cost_usd - sold * average)
+        position.amount   = max(0.0, position.amount + amount)
+
+    def _add_flow(self, cursor: PortfolioCursor, mts: int, usd: float) -> None:
+        """Book an external flow on its day, and into every later rollup and snapshot."""
+        day = self._day(cursor.user_id, mts // _DAY * _DAY)
+        day.net_flow_usd += usd
+        db.session.flush()
+        db.session.execute(update(PortfolioDaily)
+                           .where(PortfolioDaily.user_id == cursor.user_id,
+                                  PortfolioDaily.day_mts >= day.day_mts)
+                           .values(cum_flow_usd=PortfolioDaily.cum_flow_usd + usd))
+        db.session.execute(update(PortfolioSnapshot)
+                           .where(PortfolioSnapshot.user_id == cursor.user_id,
+                                  PortfolioSnapshot.mts >= mts)
+                           .values(cum_flow_usd=PortfolioSnapshot.cum_flow_usd + usd))
+        cursor.cum_flow_usd += usd
+
+    def _day(self, user_id: str, day_mts: int) -> PortfolioDaily:
+        """The rollup row for a day, created with the running flow total of the day before."""
+        row = PortfolioDaily.query.filter_by(user_id=user_id, day_mts=day_mts).first()
+        if row is None:
+            previous = (PortfolioDaily.query.filter(PortfolioDaily.user_id == user_id,
+                                                    PortfolioDaily.day_mts < day_mts)
+                        .order_by(PortfolioDaily.day_mts.desc()).first())
+            row = PortfolioDaily(user_id=user_id, day_mts=day_mts, net_flow_usd=0.0,
+                                 cum_flow_usd=previous.cum_flow_usd if previous else 0.0)
+            db.session.add(row)
+        return row
+
+    # ── Snapshots ─────────────────────────────────────────────────────────────
+    def _snapshot(self, cursor: PortfolioCursor, creds: Credentials, budget: _Budget) -> None:
+        now = _now_ms()
+        if now - cursor.snapshot_mts < self.snapshot_interval * 1000:
+            return
+        with self._lock:
+            observed = self._observed.pop(cursor.user_id, None)
+        if observed is not None and now - observed[0] < self.snapshot_interval * 1000:
+            mts, value = observed
+        elif budget.spend():
+            wallets = creds.client().rest.auth.get_wallets()
+            mts, value = now, WalletValuation().payload(Balance.of(w) for w in wallets)['total_usd']
+        else:
+            return
+
+        db.session.add(PortfolioSnapshot(user_id=cursor.user_id, mts=mts, value_usd=value,
+                                         cum_flow_usd=cursor.cum_flow_usd))
+        day = self._day(cursor.user_id, mts // _DAY * _DAY)
+        if day.open_usd is None:
+            day.open_usd = day.high_usd = day.low_usd = value
+        day.high_usd  = max(day.high_usd, value)
+        day.low_usd   = min(day.low_usd, value)
+        day.close_usd = value
+        cursor.snapshot_mts = mts
+        db.session.commit()
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+    def history(self, user_id: str, range_: str) -> dict:
+        """
+        Value and P&L points for one of RANGES, oldest first, from stored
+        snapshots (1D, 1W) or daily closes; no Bitfinex call.  P&L is the
+        value change since the first point minus the net flow since then.
+        """
+        span, source = RANGES[range_]
+        since = _now_ms() - span if span is not None else 0
+        if source == 'snapshots':
+            rows = (db.session.query(PortfolioSnapshot.mts, PortfolioSnapshot.value_usd,
+                                     PortfolioSnapshot.cum_flow_usd)
+                    .filter(PortfolioSnapshot.user_id == user_id, PortfolioSnapshot.mts >= since)
+                    .order_by(PortfolioSnapshot.mts).all())
+        else:
+            rows = (db.session.query(PortfolioDaily.day_mts, PortfolioDaily.close_usd,
+                                     PortfolioDaily.cum_flow_usd)
+                    .filter(PortfolioDaily.user_id == user_id, PortfolioDaily.day_mts >= since // _DAY * _DAY,
+                            PortfolioDaily.close_usd.isnot(None))
+                    .order_by(PortfolioDaily.day_mts).all())
+
+        points = []
+        if rows:
+            _, first_value, first_flow = rows[0]
+            points = [[mts, round(value, 2), round((value - first_value) - (flow - first_flow), 2)]
+                      for mts, value, flow in rows]
+        cursor = PortfolioCursor.query.filter_by(user_id=user_id).first()
+        return {
+            'range':        range_,
+            'resolution':   'snapshot' if source == 'snapshots' else '1D',
+            'points':       points,
+            'value_usd':    points[-1][1] if points else None,
+            'pnl_usd':      points[-1][2] if points else None,
+            'net_flow_usd': round(rows[-1][2] - rows[0][2], 2) if rows else None,
+            'assets':       self._assets(user_id),
+            'synced_to':    min(cursor.trades_mts, cursor.ledgers_mts) if cursor else None,
+        }
+
+    def _assets(self, user_id: str) -> List[dict]:
+        """Cost basis per tracked currency, with unrealized P&L at current prices."""
+        positions = PortfolioPosition.query.filter_by(user_id=user_id).all()
+        prices    = usd_prices(p.currency for p in positions if p.amount > 0)
+        assets = []
+        for p in positions:
+            price = prices.get(p.currency)
+            value = p.amount * price if price is not None and p.amount > 0 else None
+            assets.append({
+                'currency':       p.currency,
+                'amount':         round(p.amount, 8),
+                'cost_usd':       round(p.cost_usd, 2),
+                'avg_cost_usd':   round(p.cost_usd / p.amount, 8) if p.amount > 0 else None,
+                'value_usd':      round(value, 2) if value is not None else None,
+                'unrealized_usd': round(value - p.cost_usd, 2) if value is not None else None,
+                'realized_usd':   round(p.realized_usd, 2),
+            })
+        return sorted(assets, key=lambda a: -(a['value_usd'] or 0))
+
+
+portfolio = PortfolioEngine(PORTFOLIO_ENABLED, PORTFOLIO_TICK_INTERVAL, PORTFOLIO_BATCH_SIZE,
+                            PORTFOLIO_INGEST_INTERVAL, PORTFOLIO_KEY_REQUESTS,
+                            PORTFOLIO_SNAPSHOT_INTERVAL, PORTFOLIO_SNAPSHOT_DAYS,
+                            PORTFOLIO_BACKFILL_DAYS)
@@ -0,0 +1,151 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from flask import Flask
+
+import database
+from extensions import db
+from services.coingecko_index import coingecko_index
+from services.deposit_methods import deposit_methods
+from services.logo_index import logo_index
+from services.market_data import market_data
+from services.news_feed import news_store
+from services.pair_index import pair_index
+from services.ticker_snapshot import ticker_store
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Start the warm-up as soon as the ASGI app is imported rather than on the
+# first request (the dev server always waits for the first request).
+WARMUP_ON_START       = os.environ.get('WARMUP_ON_START', '1') == '1'
+# Seconds between attempts at a warm-up step that failed (e.g. Bitfinex down).
+WARMUP_RETRY_INTERVAL = float(os.environ.get('WARMUP_RETRY_INTERVAL', 5))
+
+
+class Readiness:
+    """
+    Warm-up steps run once on a background thread after the process starts.
+
+    Liveness (/healthz) only says the process answers; readiness (/readyz)
+    waits for every required step - schema at the latest migration, pair
+    index loaded, a ticker snapshot in memory - so the load balancer sends
+    no traffic to a worker that would answer its first requests cold.
+    Optional steps warm caches too but never hold readiness back.
+    """
+
+    def __init__(self, retry_interval: float):
+        self.retry_interval = retry_interval
+
+        self._steps: List[Tuple[str, Callable[[], None], bool]] = []
+        self._status: Dict[str, str] = {}
+        self._started_at = None
+        self._ready_at   = None
+        self._lock       = threading.Lock()
+
+    def add(self, name: str, fn: Callable[[], None], required: bool = True) -> None:
+        """`fn()` returns once the step is done and raises while it cannot be."""
+        self._steps.append((name, fn, required))
+        self._status[name] = 'pending'
+
+    def start(self, app: Flask) -> None:
+        """Begin the warm-up (idempotent)."""
+        if self._started_at is not None:
+            return
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.monotonic()
+        threading.Thread(target=self._run, args=(app,), name='warmup', daemon=True).start()
+
+    def init_app(self, app: Flask) -> None:
+        """Start warming up on the first request, whichever route it hits."""
+        app.before_request(lambda: self.start(app))
+
+    @property
+    def ready(self) -> bool:
+        return self._ready_at is not None
+
+    def report(self) -> dict:
+        return {
+            'ready':  self.ready,
+            'checks': {name: self._status[name] for name, _, _ in self._steps},
+            'warmup_seconds': round(self._ready_at - self._started_at, 3) if self.ready else None,
+        }
+
+    def _run(self, app: Flask) -> None:
+        pending = list(self._steps)
+        while pending:
+            failed = []
+            for name, fn, required in pending:
+                started = time.monotonic()
+                try:
+                    with app.app_context():
+                        fn()
+                except Exception as e:
+                    self._status[name] = f'failed: {e}'
+                    log.warning('Warm-up step %s failed: %s', name, e)
+                    if required:
+                        failed.append((name, fn, required))
+                    continue
+                self._status[name] = 'ok'
+                log.info('Warm-up step %s done in %.0fms', name, (time.monotonic() - started) * 1000)
+            if not any(required for _, _, required in failed):
+                self._ready_at = time.monotonic()
+                log.info('Ready after %.2fs', self._ready_at - self._started_at)
+            pending = failed
+            if pending:
+                time.sleep(self.retry_interval)
+
+
+# ── Steps ─────────────────────────────────────────────────────────────────────
+def check_schema() -> None:
+    with db.engine.connect() as conn:
+        current = database.current_version(conn)
+    if current < database.latest_version():
+        raise RuntimeError(f'schema at version {current}, expected {database.latest_version()}; '
+                           f'run `flask --app main init-db`')
+
+
+def warm_pairs() -> None:
+    pair_index.warm()
+
+
+def warm_tickers() -> None:
+    if ticker_store.get() is None:
+        raise RuntimeError('no ticker snapshot yet')
+
+
+def warm_deposit_methods() -> None:
+    deposit_methods.warm()
+
+
+def warm_logos() -> None:
+    logo_index.warm()
+
+
+def warm_market_data() -> None:
+    market_data.start()
+
+
+def warm_coingecko() -> None:
+    coingecko_index.get()
+
+
+def warm_news() -> None:
+    if not news_store.ensure():
+        raise RuntimeError('no news yet')
+
+
+readiness = Readiness(WARMUP_RETRY_INTERVAL)
+readiness.add('schema', check_schema)
+readiness.add('pairs', warm_pairs)
+readiness.add('tickers', warm_tickers)
+readiness.add('deposit_methods', warm_deposit_methods, required=False)
+readiness.add('logos', warm_logos, required=False)
+readiness.add('market_data', warm_market_data, required=False)
+readiness.add('news', warm_news, required=False)
+readiness.add('coingecko', warm_coingecko, required=False)
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from services.ticker_payloads import ticker_columns
+from services.ticker_snapshot import TickerSnapshot, ticker_store
+from utils.encoding import EncodedPayload
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Refreshes kept as diffs; clients further behind than this get a full snapshot.
+TICKER_FEED_HISTORY = int(os.environ.get('TICKER_FEED_HISTORY', 120))
+
+
+@dataclass(frozen=True)
+class TickerDelta:
+    """What changed between snapshot `seq - 1` and snapshot `seq`."""
+    seq:     int
+    changed: Dict[str, dict]   # ticker → full row, for added or modified pairs
+    removed: Tuple[str, ...]
+
+
+def _delta_columns(doc: dict) -> dict:
+    return {**doc, 'changed': ticker_columns(doc['changed'])}
+
+
+def _full_columns(doc: dict) -> dict:
+    return {**doc, 'tickers': ticker_columns(doc['tickers'])}
+
+
+def diff(old: List[dict], new: List[dict]) -> Tuple[Dict[str, dict], Tuple[str, ...]]:
+    """Rows in `new` that are absent from or differ from `old`, and tickers dropped from it."""
+    before  = {row['ticker']: row for row in old}
+    changed = {row['ticker']: row for row in new if before.get(row['ticker']) != row}
+    current = {row['ticker'] for row in new}
+    return changed, tuple(t for t in before if t not in current)
+
+
+class TickerFeed:
+    """
+    Versioned view of the ticker snapshot: a bounded ring buffer of per-refresh
+    diffs, so a client holding snapshot `seq` can catch up with only the pairs
+    that changed since.  Sequence numbers are per process; `epoch` identifies
+    the process so a client talking to a restarted (or different) worker is
+    sent a full snapshot rather than a diff against someone else's history.
+
+    Catch-ups are EncodedPayloads like the full list: every format and
+    content-encoding is built once per refresh, however many clients poll.
+    """
+
+    def __init__(self, history: int):
+        self.epoch = uuid.uuid4().hex[:12]
+
+        self._deltas: Deque[TickerDelta] = deque(maxlen=history)
+        self._snapshot: Optional[TickerSnapshot] = None
+        self._payloads: Dict[int, EncodedPayload] = {}   # since → catch-up for the current seq
+        self._full: Optional[EncodedPayload] = None
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        snapshot = self._snapshot
+        return snapshot.seq if snapshot is not None else 0
+
+    def on_snapshot(self, snapshot: TickerSnapshot) -> None:
+        with self._cond:
+            previous = self._snapshot
+            if previous is not None:
+                changed, removed = diff(previous.data, snapshot.data)
+                self._deltas.append(TickerDelta(snapshot.seq, changed, removed))
+            self._snapshot = snapshot
+            self._payloads = {}
+            self._cond.notify_all()
+
+    def catch_up(self, since: int, epoch: Optional[str] = None) -> Optional[Tuple[int, EncodedPayload]]:
+        """
+        (seq, {seq, epoch, full: false, changed, removed}) covering every
+        refresh after `since`, or None when the ring buffer no longer reaches
+        back that far (or `epoch` belongs to another process).
+        """
+        with self._cond:
+            snapshot = self._snapshot
+            if snapshot is None or (epoch is not None and epoch != self.epoch):
+                return None
+            payload = self._payloads.get(since)
+            if payload is not None:
+                return snapshot.seq, payload
+
+            deltas = [d for d in self._deltas if d.seq > since]
+            if since > snapshot.seq or (since < snapshot.seq
+                                        and (not deltas or deltas[0].seq != since + 1)):
+                return None
+
+            changed: Dict[str, dict] = {}
+            removed: Dict[str, None] = {}
+            for delta in deltas:
+                for ticker in delta.removed:
+                    changed.pop(ticker, None)
+                    removed[ticker] = None
+                for ticker, row in delta.changed.items():
+                    removed.pop(ticker, None)
+                    changed[ticker] = row
+
+            doc  = {'seq': snapshot.seq, 'epoch': self.epoch, 'full': False,
+                    'changed': list(changed.values()), 'removed': list(removed)}
+            body = json.dumps(doc, separators=(',', ':')).encode('utf-8')
+            payload = self._payloads[since] = EncodedPayload(
+                doc, _delta_columns, f'{snapshot.etag}-{since}-delta', json_body=body)
+            return snapshot.seq, payload
+
+    def full(self, snapshot: TickerSnapshot) -> EncodedPayload:
+        """{seq, epoch, full: true, tickers} for clients that cannot catch up."""
+        payload = self._full
+        if payload is None or payload.rows['seq'] != snapshot.seq:
+            body = (b'{"seq":%d,"epoch":"%s","full":true,"tickers":' % (snapshot.seq, self.epoch.encode())
+                    + snapshot.body + b'}')
+            doc  = {'seq': snapshot.seq, 'epoch': self.epoch, 'full': True, 'tickers': snapshot.data}
+            payload = self._full = EncodedPayload(doc, _full_columns, f'{snapshot.etag}-full',
+                                                  json_body=body)
+        return payload
+
+    def wait(self, seq: int, timeout: float) -> int:
+        """Block until a snapshot newer than `seq` exists (or timeout); returns the current seq."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > seq, timeout)
+            return self.seq
+
+
+ticker_feed = TickerFeed(TICKER_FEED_HISTORY)
+ticker_store.add_listener(ticker_feed.on_snapshot)
@@ -0,0 +1,200 @@
+import bisect
+import logging
+import os
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from services.ticker_snapshot import TickerSnapshot, ticker_store
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Bars kept per symbol at each resolution: 6 hours of minutes, a week of
+# hours and a year of days by default.
+TICKER_HISTORY_1M_BARS = int(os.environ.get('TICKER_HISTORY_1M_BARS', 6 * 60))
+TICKER_HISTORY_1H_BARS = int(os.environ.get('TICKER_HISTORY_1H_BARS', 7 * 24))
+TICKER_HISTORY_1D_BARS = int(os.environ.get('TICKER_HISTORY_1D_BARS', 365))
+# Symbols tracked at once; a new symbol beyond this evicts the least recently updated.
+TICKER_HISTORY_MAX_SYMBOLS = int(os.environ.get('TICKER_HISTORY_MAX_SYMBOLS', 5000))
+
+_MINUTE = 60 * 1000
+RESOLUTIONS: Dict[str, int] = {'1m': _MINUTE, '1h': 60 * _MINUTE, '1D': 24 * 60 * _MINUTE}
+
+# Same layout as services.candle_cache, so clients can chart either one.
+# `volume` is Bitfinex's rolling 24h volume as last seen in the bar, not the
+# volume traded within it.
+FIELDS = ('mts', 'open', 'close', 'high', 'low', 'volume')
+
+Bar = List[float]
+
+
+class _Series:
+    """
+    Bars of one symbol at one resolution, oldest first, in one array per field.
+
+    Columns are appended to and trimmed from the front in chunks of `slack`
+    bars, so storage stays contiguous (bisect and slicing work directly on
+    the arrays) and trimming costs O(1) amortised.  8 bytes per field per bar.
+    """
+
+    __slots__ = ('capacity', 'slack', 'mts', 'open', 'close', 'high', 'low', 'volume')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.slack    = max(1, capacity // 8)
+        self.mts      = array('q')
+        self.open     = array('d')
+        self.close    = array('d')
+        self.high     = array('d')
+        self.low      = array('d')
+        self.volume   = array('d')
+
+    def add(self, bucket_mts: int, price: float, volume: float) -> None:
+        """Fold one observation into the bar starting at bucket_mts (new or the newest)."""
+        if self.mts and self.mts[-1] == bucket_mts:
+            self.close[-1]  = price
+            self.volume[-1] = volume
+            if price > self.high[-1]:
+                self.high[-1] = price
+            if price < self.low[-1]:
+                self.low[-1] = price
+            return
+        if self.mts and bucket_mts < self.mts[-1]:
+            return   # out of order (clock step back); the series only moves forward
+        for column, value in zip(self._columns(), (bucket_mts, price, price, price, price, volume)):
+            column.append(value)
+        if len(self.mts) >= self.capacity + self.slack:
+            drop = len(self.mts) - self.capacity
+            for column in self._columns():
+                del column[:drop]
+
+    @property
+    def first(self) -> int:
+        """Index of the oldest bar exposed; the untrimmed slack before it is not."""
+        return max(0, len(self.mts) - self.capacity)
+
+    def range(self, start: Optional[int], end: Optional[int], limit: int) -> Tuple[int, int]:
+        """[lo, hi) indexes of the newest `limit` bars with start <= mts <= end."""
+        first = self.first
+        lo = bisect.bisect_left(self.mts, start, first) if start is not None else first
+        hi = bisect.bisect_right(self.mts, end, lo) if end is not None else len(self.mts)
+        return max(lo, hi - limit), hi
+
+    def rows(self, lo: int, hi: int) -> List[Bar]:
+        return list(map(list, zip(*(c[lo:hi].tolist() for c in self._columns()))))
+
+    def columns(self, lo: int, hi: int, fields: List[str]) -> Dict[str, list]:
+        return {f: getattr(self, f)[lo:hi].tolist() for f in fields}
+
+    def _columns(self) -> Tuple[array, ...]:
+        return self.mts, self.open, self.close, self.high, self.low, self.volume
+
+
+class TickerHistory:
+    """
+    Price history of every ticker, built from the snapshots the ticker store
+    already fetches: each refresh is folded into 1m, 1h and 1D bars per
+    symbol, each resolution a fixed number of bars deep.  Charts, sparklines
+    and 24h change can be served from here with no upstream call, and memory
+    is bounded by max_symbols × (sum of bars) × 48 bytes.
+
+    History starts when the process does; anything older is still only
+    available from /candles.
+    """
+
+    def __init__(self, capacities: Dict[str, int], max_symbols: int):
+        self.capacities  = capacities
+        self.max_symbols = max_symbols
+
+        self._series: Dict[str, Dict[str, _Series]] = {}   # symbol → resolution → series
+        self._updated: Dict[str, int] = {}                 # symbol → last observation mts
+        self._lock = threading.Lock()
+
+    def on_snapshot(self, snapshot: TickerSnapshot) -> None:
+        mts = int(snapshot.fetched_at * 1000)
+        with self._lock:
+            for ticker in snapshot.data:
+                data  = ticker['tickerData']
+                price = data.get('last_price')
+                if price is None:
+                    continue
+                self.add(ticker['ticker'], mts, float(price), float(data.get('volume') or 0.0))
+            self._evict()
+
+    def add(self, symbol: str, mts: int, price: float, volume: float) -> None:
+        """Record one observation (caller holds the lock)."""
+        resolutions = self._series.get(symbol)
+        if resolutions is None:
+            resolutions = self._series[symbol] = {tf: _Series(n) for tf, n in self.capacities.items()}
+        for tf, series in resolutions.items():
+            step = RESOLUTIONS[tf]
+            series.add(mts // step * step, price, volume)
+        self._updated[symbol] = mts
+
+    def _evict(self) -> None:
+        excess = len(self._series) - self.max_symbols
+        if excess > 0:
+            for symbol in sorted(self._updated, key=self._updated.get)[:excess]:
+                del self._series[symbol]
+                del self._updated[symbol]
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return sorted(self._series)
+
+    def query(self, symbols: List[str], tf: str, limit: int, start: Optional[int] = None,
+              end: Optional[int] = None, fields: Optional[List[str]] = None) -> Dict[str, object]:
+        """
+        Newest `limit` bars per symbol within [start, end] (ms), oldest first:
+        rows in the FIELDS layout, or one list per field when `fields` is given.
+        Symbols with no history are left out.
+        """
+        out = {}
+        with self._lock:
+            for symbol in symbols:
+                series = self._series.get(symbol, {}).get(tf)
+                if series is None:
+                    continue
+                lo, hi = series.range(start, end, limit)
+                out[symbol] = series.columns(lo, hi, fields) if fields else series.rows(lo, hi)
+        return out
+
+    def change(self, symbols: List[str], window_ms: int = 24 * 60 * _MINUTE) -> Dict[str, dict]:
+        """
+        Price change over the last `window_ms` per symbol, from the finest
+        resolution that reaches back that far; with less history than that,
+        from the first price observed.
+        """
+        out = {}
+        with self._lock:
+            for symbol in symbols:
+                resolutions = self._series.get(symbol)
+                if not resolutions:
+                    continue
+                since   = self._updated[symbol] - window_ms
+                ordered = [resolutions[tf] for tf in sorted(resolutions, key=RESOLUTIONS.get)]
+                series  = next((s for s in ordered if s.mts and s.mts[s.first] <= since), None)
+                if series is not None:
+                    i    = bisect.bisect_right(series.mts, since, series.first) - 1
+                    then = series.close[i]
+                else:
+                    series = ordered[0]
+                    if not series.mts:
+                        continue
+                    i    = series.first
+                    then = series.open[i]
+                last = series.close[-1]
+                out[symbol] = {
+                    'from_mts':        series.mts[i],
+                    'price':           last,
+                    'change':          last - then,
+                    'change_relative': (last - then) / then if then else None,
+                }
+        return out
+
+
+ticker_history = TickerHistory({'1m': TICKER_HISTORY_1M_BARS, '1h': TICKER_HISTORY_1H_BARS,
+                                '1D': TICKER_HISTORY_1D_BARS}, TICKER_HISTORY_MAX_SYMBOLS)
+ticker_store.add_listener(ticker_history.on_snapshot)
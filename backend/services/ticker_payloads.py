@@ -0,0 +1,50 @@
+import logging
+from typing import List, Optional
+
+from services.ticker_snapshot import TickerSnapshot, ticker_store
+from utils.encoding import EncodedPayload
+
+log = logging.getLogger(__name__)
+
+# Top-level row keys, in column order; tickerData fields follow them
+ROW_FIELDS = ('ticker', 'baseCurrency', 'quoteCurrency', 'verboseName', 'availableQuotes')
+
+
+def ticker_columns(rows: List[dict]) -> dict:
+    """
+    /get-tickers rows → one array per field, e.g.
+    {'ticker': [...], 'baseCurrency': [...], ..., 'last_price': [...], 'volume': [...]}.
+    """
+    doc    = {field: [row[field] for row in rows] for field in ROW_FIELDS}
+    fields = list(rows[0]['tickerData']) if rows else []
+    for field in fields:
+        doc[field] = [row['tickerData'].get(field) for row in rows]
+    return doc
+
+
+class TickerPayloads:
+    """
+    Every format/encoding of the current ticker snapshot, encoded and
+    compressed once per refresh by a ticker-store listener.
+    """
+
+    def __init__(self):
+        self._payload: Optional[EncodedPayload] = None
+
+    def on_snapshot(self, snapshot: TickerSnapshot) -> None:
+        self._payload = self._build(snapshot).prepare()
+
+    def get(self, snapshot: TickerSnapshot) -> EncodedPayload:
+        payload = self._payload
+        if payload is None or payload.etag != snapshot.etag:
+            # Snapshot predates the listener (or its build failed): variants fill in lazily
+            payload = self._payload = self._build(snapshot)
+        return payload
+
+    @staticmethod
+    def _build(snapshot: TickerSnapshot) -> EncodedPayload:
+        return EncodedPayload(snapshot.data, ticker_columns, snapshot.etag, json_body=snapshot.body)
+
+
+ticker_payloads = TickerPayloads()
+ticker_store.add_listener(ticker_payloads.on_snapshot)
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from services import instrumentation
+from services.bitfinex_service import fetch_tickers_data
+from utils.background import PeriodicTask
+from utils.helpers import transform_data
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Seconds between background refreshes of the shared ticker snapshot.
+REFRESH_INTERVAL       = float(os.environ.get('TICKER_REFRESH_INTERVAL', 15))
+# How long past its refresh interval a snapshot is still served instantly
+# while the worker fetches a new one.
+STALE_WHILE_REVALIDATE = float(os.environ.get('TICKER_STALE_WHILE_REVALIDATE', 30))
+# Hard ceiling: older snapshots are never served, even if Bitfinex is down.
+MAX_STALENESS          = float(os.environ.get('TICKER_MAX_STALENESS', 300))
+# After a failed refresh, requests stop asking Bitfinex for this long and
+# serve what they have; the background worker keeps its own schedule.
+FAILURE_BACKOFF        = float(os.environ.get('TICKER_FAILURE_BACKOFF', 5))
+
+
+@dataclass(frozen=True)
+class TickerSnapshot:
+    """One fully transformed /get-tickers payload, ready to send."""
+    data:       List[dict]
+    body:       bytes
+    etag:       str
+    fetched_at: float
+    seq:        int        # increases by one per refresh, per process
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class TickerSnapshotStore:
+    """
+    Process-wide store for the /get-tickers payload.
+
+    A background worker refreshes the snapshot every `refresh_interval`
+    seconds, so requests are answered from memory and upstream load does not
+    grow with the number of connected clients.  When the worker falls behind
+    (Bitfinex slow or down) the snapshot ages through three windows:
+
+        age <= interval + stale_while_revalidate   served as-is, worker kicked
+        age <= max_staleness                       sync refresh, stale on failure
+        age >  max_staleness                       sync refresh, None on failure
+
+    Only one request refreshes at a time: the others, and every request for
+    `failure_backoff` seconds after a failed refresh, answer at once with
+    the stale snapshot (or None) instead of queueing behind Bitfinex.
+    """
+
+    def __init__(self, refresh_interval: float, stale_while_revalidate: float,
+                 max_staleness: float, failure_backoff: float):
+        self.refresh_interval       = refresh_interval
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_staleness          = max_staleness
+        self.failure_backoff        = failure_backoff
+
+        self._snapshot      = None
+        self._failed_at     = 0.0        # time.time() of the last failed refresh
+        self._refresh_lock  = threading.Lock()
+        self._listeners: List[Callable[[TickerSnapshot], None]] = []
+        self._worker        = PeriodicTask('ticker-snapshot', refresh_interval,
+                                           self.refresh, run_immediately=False)
+
+    @property
+    def snapshot(self) -> Optional[TickerSnapshot]:
+        """The current snapshot without triggering any refresh."""
+        return self._snapshot
+
+    def add_listener(self, fn: Callable[[TickerSnapshot], None]) -> None:
+        """Call `fn(snapshot)` after every successful refresh, e.g. to precompute derived views."""
+        self._listeners.append(fn)
+
+    def refresh(self) -> TickerSnapshot:
+        """Fetch and transform the tickers now.  Concurrent callers share one fetch (or failure)."""
+        started = time.time()
+        with self._refresh_lock:
+            return self._refresh(started)
+
+    def _refresh(self, started: float) -> TickerSnapshot:
+        """Body of refresh(); the caller holds `_refresh_lock`."""
+        current = self._snapshot
+        if current is not None and current.fetched_at >= started:
+            return current   # another thread refreshed while we waited
+        if self._failed_at >= started:
+            raise RuntimeError('ticker refresh failed while waiting for it')
+
+        try:
+            tickers_data = fetch_tickers_data()
+            if not tickers_data:
+                raise RuntimeError('Bitfinex returned no tickers')
+        except Exception:
+            self._failed_at = time.time()
+            raise
+
+        data = transform_data(tickers_data)
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+        snapshot = TickerSnapshot(data=data, body=body, etag=etag, fetched_at=time.time(),
+                                  seq=current.seq + 1 if current is not None else 1)
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception:
+                log.exception('Ticker snapshot listener %r failed', listener)
+        return snapshot
+
+    def get(self) -> Optional[TickerSnapshot]:
+        """Return a servable snapshot, or None when nothing fresh enough exists."""
+        self._worker.start()
+
+        snapshot = self._snapshot
+        if snapshot is not None:
+            age = snapshot.age
+            if age <= self.refresh_interval:
+                instrumentation.cache('tickers', True)
+                return snapshot
+            if age <= self.refresh_interval + self.stale_while_revalidate:
+                instrumentation.cache_requests.inc('tickers', 'stale')
+                self._worker.trigger()
+                return snapshot
+
+        instrumentation.cache('tickers', False)
+        # Never wait: a refresh already running, or one that just failed,
+        # answers this request with what is already here
+        backing_off = time.time() - self._failed_at < self.failure_backoff
+        if not backing_off and self._refresh_lock.acquire(blocking=False):
+            try:
+                return self._refresh(time.time())
+            except Exception as e:
+                log.warning('Ticker snapshot refresh failed: %s', e)
+            finally:
+                self._refresh_lock.release()
+
+        if snapshot is not None and snapshot.age <= self.max_staleness:
+            return snapshot
+        return None
+
+
+ticker_store = TickerSnapshotStore(REFRESH_INTERVAL, STALE_WHILE_REVALIDATE, MAX_STALENESS,
+                                   FAILURE_BACKOFF)
@@ -0,0 +1,279 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from services import instrumentation
+
+if TYPE_CHECKING:
+    import requests
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Number of distinct hosts to keep pools for, and keep-alive sockets per host.
+POOL_CONNECTIONS = int(os.environ.get('UPSTREAM_POOL_CONNECTIONS', 4))
+POOL_MAXSIZE     = int(os.environ.get('UPSTREAM_POOL_MAXSIZE', 32))
+CONNECT_TIMEOUT  = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT     = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 15))
+
+# Token buckets: sustained requests/second and burst size, shared by all
+# public calls, and separately per API key for authenticated ones (Bitfinex
+# limits public endpoints per IP and authenticated ones per key).  A rate
+# of 0 disables the limit.
+UPSTREAM_PUBLIC_RATE  = float(os.environ.get('UPSTREAM_PUBLIC_RATE', 5))
+UPSTREAM_PUBLIC_BURST = int(os.environ.get('UPSTREAM_PUBLIC_BURST', 30))
+UPSTREAM_AUTH_RATE    = float(os.environ.get('UPSTREAM_AUTH_RATE', 1.5))
+UPSTREAM_AUTH_BURST   = int(os.environ.get('UPSTREAM_AUTH_BURST', 10))
+# Longest a call queues for a token before failing with RateLimited.
+UPSTREAM_RATE_MAX_WAIT = float(os.environ.get('UPSTREAM_RATE_MAX_WAIT', 5))
+# Retries of public calls answered 429/5xx (or not answered at all), with
+# exponential backoff from UPSTREAM_RETRY_BACKOFF seconds.
+UPSTREAM_RETRIES       = int(os.environ.get('UPSTREAM_RETRIES', 2))
+UPSTREAM_RETRY_BACKOFF = float(os.environ.get('UPSTREAM_RETRY_BACKOFF', 0.25))
+
+_AUTH_BUCKETS_MAX = 10000
+
+
+def _build_session() -> 'requests.Session':
+    # requests (with urllib3 and certifi) loads on the first upstream call, not at startup
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                          pool_block=False)
+    s.mount('https://', adapter)
+    s.mount('http://',  adapter)
+    return s
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def session() -> 'requests.Session':
+    """Shared keep-alive session for every outbound HTTP call in the backend."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+class RateLimited(Exception):
+    """No upstream token became available within UPSTREAM_RATE_MAX_WAIT."""
+
+
+class TokenBucket:
+    """Classic token bucket; `pause()` empties it for a while after a 429."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate  = rate
+        self.burst = max(burst, 1)
+
+        self._tokens       = float(self.burst)
+        self._stamp        = time.monotonic()
+        self._paused_until = 0.0
+        self._lock         = threading.Lock()
+
+    def acquire(self, max_wait: float) -> None:
+        if self.rate <= 0:
+            return
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # Nothing accrues while paused: the bucket restarts empty after a 429
+                accrued_from = max(self._stamp, self._paused_until)
+                if now > accrued_from:
+                    self._tokens = min(self.burst, self._tokens + (now - accrued_from) * self.rate)
+                    self._stamp  = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, 0.0) + max(1 - self._tokens, 0.0) / self.rate
+            if now + wait > deadline:
+                raise RateLimited(f'upstream rate limit: no token within {max_wait:.1f}s')
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._tokens       = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class _Flight:
+    __slots__ = ('done', 'response', 'error')
+
+    def __init__(self):
+        self.done     = threading.Event()
+        self.response = None
+        self.error    = None
+
+
+class Gateway:
+    """
+    The one path from bfxapi's REST middleware to Bitfinex.
+
+    - Identical public GETs in flight at the same moment share one upstream
+      call (single flight): ten users opening the markets screen together
+      cost one get_t_tickers, not ten.
+    - Every call takes a token from the public bucket, or from its API key's
+      bucket when signed, so bursts queue here instead of tripping
+      Bitfinex's own limits.  A 429 pauses the bucket it came through.
+    - Public calls are retried on 429/5xx and connection errors with
+      exponential backoff (honouring Retry-After).  Signed calls are not:
+      their nonce is single-use, so a replay would be rejected anyway.
+    """
+
+    def __init__(self, public_rate: float, public_burst: int, auth_rate: float, auth_burst: int,
+                 max_wait: float, retries: int, backoff: float):
+        self.auth_rate  = auth_rate
+        self.auth_burst = auth_burst
+        self.max_wait   = max_wait
+        self.retries    = retries
+        self.backoff    = backoff
+
+        self._public  = TokenBucket(public_rate, public_burst)
+        self._auth:    'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._lock    = threading.Lock()
+
+    def get(self, url, params=None, headers=None):
+        api_key = (headers or {}).get('bfx-apikey')
+        if api_key:
+            return self._send(self._bucket(api_key), False, 'GET', url,
+                              lambda: session().get(url, params=params, headers=headers,
+                                                   timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)))
+
+        key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            instrumentation.upstream_events.inc('coalesced')
+            started = time.perf_counter()
+            flight.done.wait()
+            instrumentation.record('upstream', time.perf_counter() - started)
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self._send(self._public, True, 'GET', url,
+                                         lambda: session().get(url, params=params, headers=headers,
+                                                              timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)))
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def post(self, url, data=None, params=None, headers=None):
+        api_key = (headers or {}).get('bfx-apikey')
+        bucket  = self._bucket(api_key) if api_key else self._public
+        return self._send(bucket, not api_key, 'POST', url,
+                          lambda: session().post(url, data=data, params=params, headers=headers,
+                                                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)))
+
+    def _bucket(self, api_key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._auth.get(api_key)
+            if bucket is None:
+                bucket = self._auth[api_key] = TokenBucket(self.auth_rate, self.auth_burst)
+                if len(self._auth) > _AUTH_BUCKETS_MAX:
+                    self._auth.popitem(last=False)
+            self._auth.move_to_end(api_key)
+            return bucket
+
+    def _send(self, bucket: TokenBucket, retry: bool, method: str, url: str, call):
+        import requests
+        attempts = self.retries + 1 if retry else 1
+        endpoint = instrumentation.endpoint_of(url)
+        for attempt in range(attempts):
+            try:
+                bucket.acquire(self.max_wait)
+            except RateLimited:
+                instrumentation.upstream_events.inc('rate_limited')
+                raise
+            last    = attempt == attempts - 1
+            started = time.perf_counter()
+            try:
+                response = call()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._observe(endpoint, method, 'error', started)
+                if last:
+                    raise
+                delay, reason = self._backoff(attempt), type(e).__name__
+            else:
+                status = response.status_code
+                self._observe(endpoint, method, str(status), started)
+                if status == 429:
+                    delay = self._retry_after(response) or self._backoff(attempt)
+                    bucket.pause(delay)
+                elif status < 500:
+                    return response
+                else:
+                    delay = self._backoff(attempt)
+                if last:
+                    # Let the middleware turn the error body into an exception
+                    return response
+                reason = f'HTTP {status}'
+            instrumentation.upstream_events.inc('retried')
+            log.info('Upstream %s; retry %d/%d in %.2fs', reason, attempt + 1, attempts - 1, delay)
+            time.sleep(delay)
+
+    @staticmethod
+    def _observe(endpoint: str, method: str, status: str, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        instrumentation.upstream_requests.observe(elapsed, endpoint, method, status)
+        instrumentation.record('upstream', elapsed)
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff * (2 ** attempt) * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+
+gateway = Gateway(UPSTREAM_PUBLIC_RATE, UPSTREAM_PUBLIC_BURST, UPSTREAM_AUTH_RATE, UPSTREAM_AUTH_BURST,
+                  UPSTREAM_RATE_MAX_WAIT, UPSTREAM_RETRIES, UPSTREAM_RETRY_BACKOFF)
+
+
+class _PooledRequests:
+    """
+    Stand-in for the `requests` module inside bfxapi's REST middleware.
+
+    bfxapi calls the module-level `requests.get` / `requests.post`, which open
+    a fresh connection (and TLS handshake) per call.  Routing them through the
+    gateway reuses keep-alive sockets from the shared session, applies our own
+    timeouts, and rate-limits, coalesces and retries as described above.
+    """
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        return gateway.get(url, params=params, headers=headers)
+
+    def post(self, url, data=None, params=None, headers=None, timeout=None):
+        return gateway.post(url, data=data, params=params, headers=headers)
+
+
+def install() -> None:
+    """Point bfxapi's REST middleware at the gateway (idempotent)."""
+    import bfxapi.rest._interface.middleware as bfx_middleware
+    if not isinstance(bfx_middleware.requests, _PooledRequests):
+        bfx_middleware.requests = _PooledRequests()
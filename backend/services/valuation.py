@@ -0,0 +1,59 @@
+import logging
+from typing import Dict, Iterable, Optional
+
+from services.clients import public_client
+from services.market_data import market_data
+from services.pair_index import pair_index
+
+log = logging.getLogger(__name__)
+
+# Currencies treated as 1 USD each
+USD_PEGS = {'USD', 'USDT', 'USDC', 'USDT0', 'UST', 'TUSD', 'DAI', 'EURT', 'BUSD', 'LUSD'}
+
+
+def usd_prices(currencies: Iterable[str]) -> Dict[str, Optional[float]]:
+    """
+    USD price for every currency in `currencies` (None when unpriceable).
+
+    Fresh entries come from the live price table; everything else is resolved
+    with a single bulk get_t_tickers call rather than one call per currency.
+    """
+    market_data.start()
+
+    prices:  Dict[str, Optional[float]] = {}
+    missing: Dict[str, str] = {}   # t-symbol → currency
+
+    for currency in set(currencies):
+        if currency in USD_PEGS:
+            prices[currency] = 1.0
+            continue
+
+        symbol = pair_index.usd_pair(currency)
+        if symbol is None:
+            prices[currency] = None
+            continue
+
+        entry = market_data.last_price(symbol)
+        if entry is not None and entry.age <= market_data.max_age:
+            prices[currency] = entry.price
+        else:
+            missing[symbol] = currency
+
+    if missing:
+        try:
+            tickers = public_client().rest.public.get_t_tickers(symbols=list(missing))
+        except Exception as e:
+            log.warning('Bulk ticker fetch failed for %d symbols: %s', len(missing), e)
+            tickers = {}
+
+        for symbol, currency in missing.items():
+            ticker = tickers.get(symbol)
+            if ticker is not None:
+                market_data.update(symbol, ticker.last_price, source='rest')
+                prices[currency] = float(ticker.last_price)
+            else:
+                # Bulk call failed — fall back to whatever the table last saw
+                entry = market_data.last_price(symbol)
+                prices[currency] = entry.price if entry is not None else None
+
+    return prices
@@ -0,0 +1,390 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from services import instrumentation
+from services.credentials import Credentials
+from services.fanout import fan_out
+from services.pair_index import pair_index
+from services.valuation import usd_prices
+from utils.background import PeriodicTask
+
+log = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+# Off by default: each session is an authenticated websocket held per user,
+# so turn it on only where the API keys are allowed to open one.
+WALLET_SESSIONS_ENABLED      = os.environ.get('WALLET_SESSIONS_ENABLED', '0') == '1'
+WALLET_WSS_HOST              = os.environ.get('WALLET_WSS_HOST', 'wss://api.bitfinex.com/ws/2')
+# Live sessions per process; users beyond the cap are served over REST.
+WALLET_SESSION_MAX           = int(os.environ.get('WALLET_SESSION_MAX', 100))
+# A session nobody has read for this long is closed.
+WALLET_SESSION_IDLE_TTL      = float(os.environ.get('WALLET_SESSION_IDLE_TTL', 5 * 60))
+# How long the request that opens a session waits for the first wallet snapshot.
+WALLET_SESSION_READY_TIMEOUT = float(os.environ.get('WALLET_SESSION_READY_TIMEOUT', 2))
+# After a session fails (bad keys, no websocket permission) stay on REST this long.
+WALLET_SESSION_RETRY_AFTER   = float(os.environ.get('WALLET_SESSION_RETRY_AFTER', 5 * 60))
+# REST fallback: balances are reused for this long per user.
+WALLET_REST_CACHE_TTL        = float(os.environ.get('WALLET_REST_CACHE_TTL', 5))
+
+_REST_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class Balance:
+    """One wallet row, from either a websocket event or a REST get_wallets call."""
+    wallet_type:       str
+    currency:          str
+    balance:           float
+    available_balance: Optional[float]
+
+    @classmethod
+    def of(cls, wallet) -> 'Balance':
+        return cls(wallet.wallet_type, wallet.currency, wallet.balance or 0.0,
+                   wallet.available_balance)
+
+
+class WalletValuation:
+    """
+    USD valuation of a wallet table, kept between reads: a row is only
+    re-valued when its balance or its currency's price moved, and the total
+    is adjusted by the difference instead of re-summed.
+    """
+
+    def __init__(self):
+        self._rows:   Dict[Tuple[str, str], dict] = {}
+        self._inputs: Dict[Tuple[str, str], tuple] = {}
+        self._total   = 0.0
+
+    def payload(self, balances: Iterable[Balance]) -> dict:
+        balances = [b for b in balances if b.balance > 0]
+        # One price lookup for all distinct currencies, not one per wallet row
+        prices   = usd_prices(b.currency for b in balances)
+
+        seen = set()
+        for b in balances:
+            key   = (b.wallet_type, b.currency)
+            price = prices.get(b.currency)
+            seen.add(key)
+            if self._inputs.get(key) == (b.balance, b.available_balance, price):
+                continue
+
+            self._discard(key)
+            usd_value = round(b.balance * price, 2) if price is not None else None
+            if usd_value is not None:
+                self._total += usd_value
+            self._rows[key] = {
+                'wallet_type':       b.wallet_type,
+                'currency':          b.currency,
+                'balance':           round(b.balance, 8),
+                'available_balance': round(b.available_balance, 8) if b.available_balance is not None else None,
+                'usd_value':         usd_value,
+            }
+            self._inputs[key] = (b.balance, b.available_balance, price)
+
+        for key in [k for k in self._rows if k not in seen]:
+            self._discard(key)
+
+        # Sort: exchange wallets first, then by USD value descending
+        wallets = sorted(self._rows.values(),
+                         key=lambda x: (x['wallet_type'] != 'exchange', -(x['usd_value'] or 0)))
+        return {'wallets': wallets, 'total_usd': round(self._total, 2)}
+
+    def _discard(self, key: Tuple[str, str]) -> None:
+        row = self._rows.pop(key, None)
+        self._inputs.pop(key, None)
+        if row is not None and row['usd_value'] is not None:
+            self._total -= row['usd_value']
+
+
+class WalletSession:
+    """One user's authenticated websocket and the wallet table it maintains."""
+
+    def __init__(self, creds: Credentials):
+        self.creds     = creds
+        self.ready     = threading.Event()   # set once the snapshot and every available balance arrived
+        self.settled   = threading.Event()   # ready, or failed before getting there
+        self.closed    = False
+        self.future    = None
+        self.last_used = time.monotonic()
+
+        self._balances: Dict[Tuple[str, str], Balance] = {}
+        self._unknown:  Set[Tuple[str, str]] = set()   # rows still waiting for their available balance
+        self._valuation      = WalletValuation()
+        self._lock           = threading.Lock()   # also taken on the shared websocket loop: never block under it
+        self._valuation_lock = threading.Lock()
+
+    def matches(self, creds: Credentials) -> bool:
+        return (self.creds.api_key, self.creds.api_secret) == (creds.api_key, creds.api_secret)
+
+    def on_snapshot(self, wallets) -> List[Balance]:
+        with self._lock:
+            self._balances = {}
+            self._unknown  = set()
+            pending = [self._apply(Balance.of(w)) for w in wallets]
+            self._check_ready()
+        return [b for b in pending if b is not None]
+
+    def on_update(self, wallet) -> Optional[Balance]:
+        with self._lock:
+            pending = self._apply(Balance.of(wallet))
+            self._check_ready()
+            return pending
+
+    def _check_ready(self) -> None:
+        """
+        Live once the snapshot is in and every row's available balance is
+        known: snapshots carry none, so until the calc replies arrive the
+        session would report 0 available everywhere (caller holds the lock).
+        """
+        if not self._unknown and not self.ready.is_set():
+            self.ready.set()
+            self.settled.set()
+
+    def _apply(self, balance: Balance) -> Optional[Balance]:
+        """Store a row; returns it when its available balance still has to be calculated."""
+        key      = (balance.wallet_type, balance.currency)
+        previous = self._balances.get(key)
+        if balance.available_balance is None:
+            # Bitfinex omits available balance from most updates: carry the
+            # old one forward by the balance change until a calc arrives.
+            available = None
+            if previous is not None and previous.available_balance is not None:
+                available = previous.available_balance + (balance.balance - previous.balance)
+            self._balances[key] = Balance(balance.wallet_type, balance.currency,
+                                          balance.balance, available)
+            if available is None:
+                self._unknown.add(key)
+            return balance
+        self._balances[key] = balance
+        self._unknown.discard(key)
+        return None
+
+    @property
+    def live(self) -> bool:
+        # A row that appeared after the snapshot may still lack its available balance
+        return self.ready.is_set() and not self.closed and not self._unknown
+
+    def rows(self) -> List[Balance]:
+        self.last_used = time.monotonic()
+        with self._lock:
+            return list(self._balances.values())
+
+    def payload(self) -> dict:
+        balances = self.rows()
+        # Pricing may call Bitfinex: done outside the lock the websocket loop takes
+        with self._valuation_lock:
+            return self._valuation.payload(balances)
+
+
+class WalletSessions:
+    """
+    Per-user live wallet state from the Bitfinex authenticated websocket.
+
+    Every session shares one asyncio loop on a daemon thread.  A session
+    authenticates once, receives the wallet snapshot (`ws`) and applies
+    wallet updates (`wu`) in memory, so /wallet/balances needs no upstream
+    call.  When sessions are disabled or at their cap, or a session cannot
+    start, balances come from REST with a short per-user cache instead.
+    """
+
+    def __init__(self, wss_host: str, max_sessions: int, idle_ttl: float,
+                 ready_timeout: float, rest_ttl: float, enabled: bool = True):
+        self.wss_host      = wss_host
+        self.max_sessions  = max_sessions
+        self.idle_ttl      = idle_ttl
+        self.ready_timeout = ready_timeout
+        self.rest_ttl      = rest_ttl
+        self.enabled       = enabled
+
+        self._sessions: Dict[str, WalletSession] = {}
+        self._failed:   Dict[str, float] = {}      # user_id → time of last session failure
+        # user_id → (expiry, wallet rows, their valuation once someone asked for it)
+        self._rest: 'OrderedDict[str, Tuple[float, List[Balance], Optional[dict]]]' = OrderedDict()
+        self._loop   = None
+        self._lock   = threading.Lock()
+        self._janitor = PeriodicTask('wallet-sessions', 30, self._evict_idle,
+                                     run_immediately=False)
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def balances(self, creds: Credentials) -> dict:
+        """{'wallets': [...], 'total_usd': ...} for the user, live when possible."""
+        session, created = self._session_for(creds)
+        if session is not None:
+            if created:
+                session.settled.wait(self.ready_timeout)
+            if session.live:
+                instrumentation.cache_requests.inc('wallets', 'live')
+                return session.payload()
+        return self._rest_balances(creds)
+
+    def rows(self, creds: Credentials) -> List[Balance]:
+        """
+        The user's raw wallet rows, without USD valuation: for checks that
+        only compare balances.  Read from a live session when one is open
+        (never opened here), else from REST with the same short cache.
+        """
+        with self._lock:
+            session = self._sessions.get(creds.user_id)
+        if session is not None and session.live and session.matches(creds):
+            instrumentation.cache_requests.inc('wallets', 'live')
+            return session.rows()
+        return self._rest_rows(creds)
+
+    def forget(self, user_id: str) -> None:
+        """Drop the REST-cached balances, e.g. right after the user placed an order."""
+        with self._lock:
+            self._rest.pop(user_id, None)
+
+    def close(self, user_id: str) -> None:
+        """Close the user's session and forget cached balances (keys changed or deleted)."""
+        with self._lock:
+            session = self._sessions.pop(user_id, None)
+            self._rest.pop(user_id, None)
+            self._failed.pop(user_id, None)
+        if session is not None:
+            self._stop(session)
+
+    # ── Sessions ──────────────────────────────────────────────────────────────
+    def _session_for(self, creds: Credentials) -> Tuple[Optional[WalletSession], bool]:
+        if not self.enabled:
+            return None, False
+        user_id = creds.user_id
+        stale   = None
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None and (session.closed or not session.matches(creds)):
+                stale   = self._sessions.pop(user_id)
+                session = None
+
+            created = False
+            if session is None:
+                failed_at = self._failed.get(user_id)
+                if failed_at is not None and time.monotonic() - failed_at < WALLET_SESSION_RETRY_AFTER:
+                    return None, False
+                if len(self._sessions) >= self.max_sessions:
+                    return None, False
+                session = self._sessions[user_id] = WalletSession(creds)
+                created = True
+        if stale is not None:
+            self._stop(stale)
+        if created:
+            self._start(session)
+        session.last_used = time.monotonic()
+        return session, created
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='wallet-sessions-loop',
+                                     daemon=True).start()
+                    self._loop = loop
+        self._janitor.start()
+        return self._loop
+
+    def _start(self, session: WalletSession) -> None:
+        session.future = asyncio.run_coroutine_threadsafe(self._run(session), self._ensure_loop())
+
+    def _stop(self, session: WalletSession) -> None:
+        session.closed = True
+        if session.future is not None:
+            session.future.cancel()
+
+    async def _run(self, session: WalletSession) -> None:
+        from bfxapi import Client
+        creds = session.creds
+        bfx   = Client(api_key=creds.api_key, api_secret=creds.api_secret,
+                       wss_host=self.wss_host, filters=['wallet'])
+
+        async def calc(balances: List[Balance]) -> None:
+            if balances:
+                await bfx.wss.inputs.calc(*(f'wallet_{b.wallet_type}_{b.currency}' for b in balances))
+
+        @bfx.wss.on('wallet_snapshot')
+        async def on_wallet_snapshot(wallets):
+            await calc(session.on_snapshot(wallets))
+
+        @bfx.wss.on('wallet_update')
+        async def on_wallet_update(wallet):
+            pending = session.on_update(wallet)
+            await calc([pending] if pending is not None else [])
+
+        try:
+            await bfx.wss.start()
+            log.info('Wallet session for %s closed by server', creds.user_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning('Wallet session for %s failed: %s', creds.user_id, e)
+            with self._lock:
+                self._failed[creds.user_id] = time.monotonic()
+        finally:
+            session.closed = True
+            session.settled.set()
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            idle = [uid for uid, s in self._sessions.items()
+                    if s.closed or now - s.last_used > self.idle_ttl]
+            evicted = [self._sessions.pop(uid) for uid in idle]
+            for uid in [u for u, t in self._failed.items() if now - t > WALLET_SESSION_RETRY_AFTER]:
+                del self._failed[uid]
+        for session in evicted:
+            self._stop(session)
+        if evicted:
+            log.info('Closed %d idle wallet sessions; %d open', len(evicted), len(self._sessions))
+
+    # ── REST fallback ─────────────────────────────────────────────────────────
+    def _rest_balances(self, creds: Credentials) -> dict:
+        cached = self._rest_cached(creds.user_id)
+        if cached is not None and cached[2] is not None:
+            instrumentation.cache('wallets', True)
+            return cached[2]
+
+        instrumentation.cache('wallets', False)
+        if cached is not None:
+            expiry, rows = cached[0], cached[1]   # rows fetched for a balance check
+            pair_index.warm()
+        else:
+            bfx = creds.client()
+            # The pair index load (cold start / hourly) overlaps the wallet fetch
+            upstream = fan_out({'wallets': bfx.rest.auth.get_wallets, 'pairs': pair_index.warm})
+            expiry   = time.monotonic() + self.rest_ttl
+            rows     = [Balance.of(w) for w in upstream['wallets'].result()]
+        payload = WalletValuation().payload(rows)
+        self._rest_store(creds.user_id, (expiry, rows, payload))
+        return payload
+
+    def _rest_rows(self, creds: Credentials) -> List[Balance]:
+        cached = self._rest_cached(creds.user_id)
+        instrumentation.cache('wallets', cached is not None)
+        if cached is not None:
+            return cached[1]
+        rows = [Balance.of(w) for w in creds.client().rest.auth.get_wallets()]
+        self._rest_store(creds.user_id, (time.monotonic() + self.rest_ttl, rows, None))
+        return rows
+
+    def _rest_cached(self, user_id: str) -> Optional[Tuple[float, List[Balance], Optional[dict]]]:
+        with self._lock:
+            cached = self._rest.get(user_id)
+        return cached if cached is not None and cached[0] > time.monotonic() else None
+
+    def _rest_store(self, user_id: str, entry: Tuple[float, List[Balance], Optional[dict]]) -> None:
+        with self._lock:
+            self._rest[user_id] = entry
+            self._rest.move_to_end(user_id)
+            if len(self._rest) > _REST_CACHE_SIZE:
+                self._rest.popitem(last=False)
+
+
+wallet_sessions = WalletSessions(WALLET_WSS_HOST, WALLET_SESSION_MAX, WALLET_SESSION_IDLE_TTL,
+                                 WALLET_SESSION_READY_TIMEOUT, WALLET_REST_CACHE_TTL,
+                                 enabled=WALLET_SESSIONS_ENABLED)
@@ -0,0 +1,92 @@
+import msgpack
+import pytest
+from flask import Flask
+
+from routes import candles as candles_module
+from services.candle_cache import CandleCache
+from utils.encoding import MIMETYPES
+
+
+@pytest.fixture
+def cache(public_rest, monkeypatch):
+    cache = CandleCache(max_bars=500, max_series=100, min_refresh=30, max_fetches=10)
+    monkeypatch.setattr(candles_module, 'candle_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def client(cache):
+    app = Flask(__name__)
+    app.register_blueprint(candles_module.candles)
+    return app.test_client()
+
+
+def _upstream_calls(fake) -> int:
+    return sum(fake.take_calls().values())
+
+
+# ── Formats ───────────────────────────────────────────────────────────────────
+def test_json_rows_by_default(client):
+    response = client.get('/candles?symbols=tBTCUSD,tETHUSD&tf=1h&limit=24')
+    body     = response.get_json()
+
+    assert response.mimetype == MIMETYPES['json']
+    assert body['format'] == 'json'
+    assert set(body['candles']) == {'tBTCUSD', 'tETHUSD'}
+    rows = body['candles']['tBTCUSD']
+    assert len(rows) == 24 and all(len(row) == 6 for row in rows)
+    assert [row[0] for row in rows] == sorted(row[0] for row in rows)
+
+
+def test_columnar_with_a_subset_of_fields(client):
+    response = client.get('/candles?symbols=tBTCUSD&limit=5&format=columnar&fields=mts,close')
+    body     = response.get_json(force=True)
+
+    assert response.mimetype == MIMETYPES['columnar']
+    assert body['format'] == 'columnar'
+    assert list(body['candles']['tBTCUSD']) == ['mts', 'close']
+    assert len(body['candles']['tBTCUSD']['close']) == 5
+
+
+@pytest.mark.parametrize('query, headers', [
+    ('&format=msgpack', {}),
+    ('', {'Accept': 'application/msgpack'}),
+])
+def test_msgpack_by_query_or_accept_header(client, query, headers):
+    columnar = client.get('/candles?symbols=tBTCUSD&limit=5&format=columnar').get_json(force=True)
+    response = client.get(f'/candles?symbols=tBTCUSD&limit=5{query}', headers=headers)
+    body     = msgpack.unpackb(response.data)
+
+    assert response.mimetype == MIMETYPES['msgpack']
+    assert body['format'] == 'msgpack'
+    assert body['candles'] == columnar['candles']
+
+
+@pytest.mark.parametrize('fmt', ['rows', 'xml'])
+def test_unknown_format_is_not_acceptable(client, fmt):
+    response = client.get(f'/candles?symbols=tBTCUSD&format={fmt}')
+
+    assert response.status_code == 406
+    assert 'json, columnar, msgpack' in response.get_json()['error']
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+def test_fresh_series_is_served_from_memory(cache, public_rest):
+    first = cache.get('tBTCUSD', '1h', 24)
+
+    assert cache.get('tBTCUSD', '1h', 24) == first
+    assert _upstream_calls(public_rest) == 1
+
+
+def test_stale_series_merges_only_the_new_bars(cache, public_rest):
+    cache.get('tBTCUSD', '1h', 24)
+    series = cache._get_series(('tBTCUSD', '1h'))
+    series.bucket = -1   # as if the hour had rolled over
+    public_rest.take_calls()
+
+    bars = cache.get('tBTCUSD', '1h', 24)
+
+    assert _upstream_calls(public_rest) == 1
+    mts = [bar[0] for bar in bars]
+    assert mts == sorted(set(mts))   # the forming bar was replaced, not duplicated
+    assert len(series.bars) >= 24
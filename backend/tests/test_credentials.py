@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+
+from extensions import db
+from models.user_keys import UserKeys
+from services import credentials as credentials_module
+from services.credentials import EPOCH_FILE, CredentialCache
+from utils.disk_cache import cache_path
+
+
+@pytest.fixture
+def cache(app, monkeypatch):
+    """A cache in an app context, with the DB reads it makes counted."""
+    loads = []
+    load  = CredentialCache._load
+    monkeypatch.setattr(CredentialCache, '_load',
+                        staticmethod(lambda user_id: loads.append(user_id) or load(user_id)))
+    with app.app_context():
+        cache = CredentialCache(max_size=2, ttl=60)
+        cache.loads = loads
+        yield cache
+
+
+def _save(user_id: str, api_key: str = 'key', status: str = 'valid') -> None:
+    row = UserKeys.query.filter_by(user_id=user_id).first()
+    if row is None:
+        row = UserKeys(user_id=user_id, api_secret='secret')
+        db.session.add(row)
+    row.api_key, row.status = api_key, status
+    db.session.commit()
+
+
+def test_hits_do_not_read_the_db(cache):
+    _save('u1')
+
+    assert cache.get('u1').api_key == 'key'
+    assert cache.get('u1').api_key == 'key'
+    assert cache.loads == ['u1']
+
+
+def test_users_without_keys_are_cached_too(cache):
+    assert cache.get('nobody') is None
+    assert cache.get('nobody') is None
+    assert cache.loads == ['nobody']
+
+
+def test_entries_expire_after_the_ttl(cache):
+    _save('u1')
+    cache.ttl = 0.05
+    cache.get('u1')
+    time.sleep(0.1)
+    cache.get('u1')
+
+    assert cache.loads == ['u1', 'u1']
+
+
+def test_least_recently_used_entry_is_evicted_past_the_size(cache):
+    for user_id in ('u1', 'u2', 'u1', 'u3'):
+        cache.get(user_id)
+
+    assert list(cache._entries) == ['u1', 'u3']
+
+
+def test_invalidate_serves_the_saved_keys(cache):
+    _save('u1', 'old')
+    cache.get('u1')
+    _save('u1', 'new')
+    cache.invalidate('u1')
+
+    assert cache.get('u1').api_key == 'new'
+
+
+def test_another_process_bumping_the_epoch_clears_the_cache(cache):
+    _save('u1', 'old')
+    cache.get('u1')
+    _save('u1', 'new')
+    # What invalidate() in another worker does: a new mtime on the shared file
+    os.makedirs(os.path.dirname(cache_path(EPOCH_FILE)), exist_ok=True)
+    with open(cache_path(EPOCH_FILE), 'a'):
+        pass
+    os.utime(cache_path(EPOCH_FILE), ns=(time.time_ns(), time.time_ns() + 10**9))
+
+    assert cache.get('u1').api_key == 'new'
+
+
+def test_rejected_keys_are_not_handed_out(cache, monkeypatch):
+    monkeypatch.setattr(credentials_module, 'credential_cache', cache)
+    _save('u1', status='invalid')
+    _save('u2', status='pending')
+
+    assert credentials_module.get_credentials('u1') is None
+    assert credentials_module.get_credentials('u2') is not None
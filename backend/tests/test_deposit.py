@@ -0,0 +1,50 @@
+import pytest
+from flask import Flask
+
+from routes.deposit import deposit
+from services.deposit_methods import CURRENCY_TO_METHODS
+
+
+@pytest.fixture
+def client(public_rest):
+    app = Flask(__name__)
+    app.register_blueprint(deposit)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('currency', ['USDT', 'UST', 'usdt'])
+def test_methods_echo_the_currency_asked_for(client, currency):
+    response = client.get(f'/deposit/methods?currency={currency}')
+    body     = response.get_json()
+
+    assert response.status_code == 200
+    assert body['currency'] == currency.upper()
+    assert body['methods']
+
+
+def test_display_symbol_and_bitfinex_code_share_the_methods(client):
+    by_symbol = client.get('/deposit/methods?currency=USDT').get_json()['methods']
+    by_code   = client.get('/deposit/methods?currency=UST').get_json()['methods']
+
+    assert by_symbol == by_code
+
+
+def test_unknown_currency_is_named_as_asked(client):
+    response = client.get('/deposit/methods?currency=NOPE')
+
+    assert response.status_code == 404
+    assert 'NOPE' in response.get_json()['error']
+
+
+def test_static_fallback_lists_each_currency_once():
+    import ast
+    import inspect
+
+    from services import deposit_methods
+
+    source = inspect.getsource(deposit_methods)
+    node   = next(n.value for n in ast.walk(ast.parse(source))
+                  if isinstance(n, ast.Assign) and getattr(n.targets[0], 'id', None) == 'CURRENCY_TO_METHODS')
+    keys   = [k.value for k in node.keys]
+
+    assert len(keys) == len(set(keys)) == len(CURRENCY_TO_METHODS)
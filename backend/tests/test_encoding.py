@@ -0,0 +1,77 @@
+import gzip
+
+import msgpack
+import pytest
+from flask import Flask, request
+
+from utils import encoding
+from utils.encoding import MIMETYPES, EncodedPayload, negotiate
+
+ROWS = [{'ticker': f't{i:03d}USD', 'price': float(i)} for i in range(100)]
+
+
+def _columns(rows: list) -> dict:
+    return {'ticker': [r['ticker'] for r in rows], 'price': [r['price'] for r in rows]}
+
+
+@pytest.fixture
+def flask_app():
+    return Flask(__name__)
+
+
+def _negotiate(app, query: str = '', **headers):
+    with app.test_request_context(f'/?{query}', headers=headers):
+        return negotiate(request)
+
+
+# ── Negotiation ───────────────────────────────────────────────────────────────
+@pytest.mark.parametrize('query, headers, fmt', [
+    ('', {}, 'json'),
+    ('format=columnar', {}, 'columnar'),
+    ('format=MSGPACK', {}, 'msgpack'),
+    ('', {'Accept': 'application/msgpack'}, 'msgpack'),
+    ('', {'Accept': 'application/x-msgpack'}, 'msgpack'),
+    ('', {'Accept': MIMETYPES['columnar']}, 'columnar'),
+    ('', {'Accept': '*/*'}, 'json'),
+    ('format=json', {'Accept': 'application/msgpack'}, 'json'),   # the query wins
+    ('format=xml', {}, None),
+    ('', {'Accept': 'text/csv'}, None),
+])
+def test_format_from_query_or_accept(flask_app, query, headers, fmt):
+    assert _negotiate(flask_app, query, **headers) == fmt
+
+
+def test_msgpack_is_not_offered_without_the_codec(flask_app, monkeypatch):
+    monkeypatch.setattr(encoding, 'msgpack', None)
+
+    assert encoding.available_formats() == ['json', 'columnar']
+    assert _negotiate(flask_app, 'format=msgpack') is None
+
+
+# ── Encoded payloads ──────────────────────────────────────────────────────────
+def test_each_variant_is_encoded_once():
+    calls   = []
+    payload = EncodedPayload(ROWS, lambda rows: calls.append(1) or _columns(rows), 'v1')
+
+    assert payload.variants('columnar') is payload.variants('columnar')
+    assert msgpack.unpackb(payload.variants('msgpack')['identity']) == _columns(ROWS)
+    assert len(calls) == 2
+
+
+def test_response_is_precompressed_for_the_client(flask_app):
+    payload = EncodedPayload(ROWS, _columns, 'v1')
+    with flask_app.test_request_context('/', headers={'Accept-Encoding': 'gzip'}):
+        response = payload.respond(request, 'json')
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == payload.variants('json')['identity']
+    assert response.get_etag()[0] == 'v1-json-gzip'
+    assert {'Accept', 'Accept-Encoding'} <= set(response.vary)
+
+
+def test_small_bodies_are_sent_as_is(flask_app):
+    payload = EncodedPayload(ROWS[:1], _columns, 'v1')
+    with flask_app.test_request_context('/', headers={'Accept-Encoding': 'gzip, br'}):
+        response = payload.respond(request, 'json')
+
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from utils import helpers
+
+
+@pytest.fixture
+def cheap_bcrypt(monkeypatch):
+    monkeypatch.setattr(helpers, 'BCRYPT_ROUNDS', 4)   # bcrypt's minimum cost
+
+
+def test_password_round_trip(cheap_bcrypt):
+    hashed = helpers.hash_password('correct horse')
+
+    assert hashed.startswith('$2b$04$')
+    assert helpers.check_password('correct horse', hashed)
+    assert not helpers.check_password('wrong horse', hashed)
+
+
+def test_hashing_runs_on_the_crypto_pool(cheap_bcrypt, monkeypatch):
+    threads = []
+    hashpw  = helpers._hashpw
+    checkpw = helpers._checkpw
+    monkeypatch.setattr(helpers, '_hashpw',
+                        lambda *a: threads.append(threading.current_thread().name) or hashpw(*a))
+    monkeypatch.setattr(helpers, '_checkpw',
+                        lambda *a: threads.append(threading.current_thread().name) or checkpw(*a))
+
+    helpers.check_password('pw', helpers.hash_password('pw'))
+
+    assert len(threads) == 2
+    assert all(name.startswith('crypto') for name in threads)
+
+
+def test_concurrent_hashes_are_bounded_by_the_pool(monkeypatch):
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_hash(password: bytes) -> bytes:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return b'hash'
+
+    monkeypatch.setattr(helpers, '_hashpw', slow_hash)
+    callers = [threading.Thread(target=helpers.hash_password, args=('pw',))
+               for _ in range(helpers.CRYPTO_MAX_WORKERS + 4)]
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join()
+
+    assert peak[0] <= helpers.CRYPTO_MAX_WORKERS
+
+
+def test_bcrypt_is_not_imported_with_the_module():
+    import os
+    import subprocess
+    import sys
+
+    code = 'import sys, utils.helpers; print("bcrypt" in sys.modules)'
+    out  = subprocess.check_output([sys.executable, '-c', code], text=True,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.strip() == 'False'
@@ -0,0 +1,53 @@
+import msgpack
+import pytest
+from flask import Flask
+
+from routes import history as history_module
+from services.ticker_history import TickerHistory
+from utils.encoding import MIMETYPES
+
+_MINUTE = 60 * 1000
+START   = 1_700_000_000_000 // _MINUTE * _MINUTE
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Ten minutes of 1m bars for tBTCUSD, one observation per minute."""
+    history = TickerHistory({'1m': 60, '1h': 24}, max_symbols=10)
+    for i in range(10):
+        history.add('tBTCUSD', START + i * _MINUTE, 100.0 + i, 5.0)
+    monkeypatch.setattr(history_module, 'ticker_history', history)
+    app = Flask(__name__)
+    app.register_blueprint(history_module.history)
+    return app.test_client()
+
+
+def test_json_rows_by_default(client):
+    response = client.get('/tickers/history?tf=1m&limit=3')
+    body     = response.get_json()
+
+    assert response.mimetype == MIMETYPES['json']
+    assert body['format'] == 'json'
+    assert [row[0] for row in body['candles']['tBTCUSD']] == [START + i * _MINUTE for i in (7, 8, 9)]
+    assert body['candles']['tBTCUSD'][-1][2] == 109.0
+
+
+def test_columnar_with_a_subset_of_fields(client):
+    response = client.get('/tickers/history?tf=1m&limit=3&format=columnar&fields=close')
+
+    assert response.mimetype == MIMETYPES['columnar']
+    assert response.get_json(force=True)['candles'] == {'tBTCUSD': {'close': [107.0, 108.0, 109.0]}}
+
+
+def test_msgpack_by_accept_header(client):
+    response = client.get('/tickers/history?tf=1m&limit=3', headers={'Accept': 'application/msgpack'})
+    body     = msgpack.unpackb(response.data)
+
+    assert response.mimetype == MIMETYPES['msgpack']
+    assert body['format'] == 'msgpack'
+    assert body['candles']['tBTCUSD']['close'] == [107.0, 108.0, 109.0]
+    assert list(body['candles']['tBTCUSD']) == ['mts', 'open', 'close', 'high', 'low', 'volume']
+
+
+def test_same_format_names_as_candles(client):
+    assert client.get('/tickers/history?format=rows').status_code == 406
@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+from extensions import db
+from models.user_keys import UserKeys
+from services.key_validation import INVALID, PENDING, VALID, KeyValidator, fingerprint
+
+INVALID_KEY = (500, ['error', 10100, 'apikey: invalid'])
+
+
+@pytest.fixture
+def validator(app, auth_rest):
+    v = KeyValidator(workers=1, cache_size=100, valid_ttl=60, invalid_ttl=60,
+                     retry_interval=10, max_backoff=40)
+    v.init_app(app)
+    yield v
+    v._pool.shutdown(wait=True)
+
+
+def _save(app, user_id: str, api_key: str = 'key', api_secret: str = 'secret') -> None:
+    with app.app_context():
+        db.session.add(UserKeys(user_id=user_id, api_key=api_key, api_secret=api_secret, status=PENDING))
+        db.session.commit()
+
+
+def _status(app, user_id: str) -> str:
+    with app.app_context():
+        return UserKeys.query.filter_by(user_id=user_id).one().status
+
+
+def _settle(v: KeyValidator, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while v._waiting and time.monotonic() < deadline:
+        time.sleep(0.01)
+    v._pool.submit(lambda: None).result()   # one worker: runs after the in-flight _record
+
+
+def _info_calls(fake) -> int:
+    return fake.take_calls().get('POST auth/r/info/user', 0)
+
+
+def test_accepted_pair_is_stored_valid_and_cached(app, validator, auth_rest):
+    _save(app, 'u1')
+    validator.submit('u1', 'key', 'secret')
+    _settle(validator)
+
+    assert _status(app, 'u1') == VALID
+    assert validator.cached('key', 'secret') == VALID
+    assert _info_calls(auth_rest) == 1
+
+
+def test_rejected_credentials_are_stored_invalid(app, validator, auth_rest):
+    _save(app, 'u1')
+    auth_rest.answer_next(INVALID_KEY)
+    validator.submit('u1', 'key', 'secret')
+    _settle(validator)
+
+    assert _status(app, 'u1') == INVALID
+    assert validator.cached('key', 'secret') == INVALID
+
+
+@pytest.mark.parametrize('answer', [500, 429, (500, ['error', 10001, 'unexpected'])])
+def test_transient_errors_never_reject_the_pair(app, validator, auth_rest, answer):
+    _save(app, 'u1')
+    for _ in range(5):
+        auth_rest.answer_next(answer)
+        validator.submit('u1', 'key', 'secret')
+        _settle(validator)
+
+    assert _status(app, 'u1') == PENDING
+    assert validator.cached('key', 'secret') is None
+    assert validator._retry_at[fingerprint('key', 'secret')][0] == 5
+
+
+def test_inconclusive_attempts_back_off_exponentially_up_to_the_cap(validator):
+    fp     = fingerprint('key', 'secret')
+    delays = []
+    for _ in range(5):
+        before = time.monotonic()
+        validator._finish(fp, None)
+        delays.append(round(validator._retry_at[fp][1] - before))
+
+    assert delays == [10, 20, 40, 40, 40]
+
+
+def test_sweep_only_resubmits_pairs_whose_retry_is_due(app, validator, monkeypatch):
+    _save(app, 'due', 'k1', 's1')
+    _save(app, 'waiting', 'k2', 's2')
+    validator._retry_at[fingerprint('k1', 's1')] = (1, time.monotonic() - 1)
+    validator._retry_at[fingerprint('k2', 's2')] = (1, time.monotonic() + 60)
+    submitted = []
+    monkeypatch.setattr(validator, 'submit', lambda user_id, *_: submitted.append(user_id))
+
+    validator._sweep()
+
+    assert submitted == ['due']
+
+
+def test_sweep_forgets_retries_of_pairs_no_longer_pending(app, validator, monkeypatch):
+    validator._retry_at[fingerprint('gone', 'gone')] = (3, time.monotonic() + 60)
+    monkeypatch.setattr(validator, 'submit', lambda *_: None)
+
+    validator._sweep()
+
+    assert validator._retry_at == {}
+
+
+def test_users_sharing_a_pair_all_get_the_one_outcome(app, validator, auth_rest):
+    auth_rest.latency_ms = 200
+    for user_id in ('u1', 'u2', 'u3'):
+        _save(app, user_id)
+        validator.submit(user_id, 'key', 'secret')
+    _settle(validator)
+
+    assert [_status(app, u) for u in ('u1', 'u2', 'u3')] == [VALID] * 3
+    assert _info_calls(auth_rest) == 1
+
+
+def test_outcome_is_not_written_over_keys_saved_meanwhile(app, validator, auth_rest):
+    _save(app, 'u1', 'old', 'old')
+    auth_rest.latency_ms = 200
+    validator.submit('u1', 'old', 'old')
+    with app.app_context():
+        row = UserKeys.query.filter_by(user_id='u1').one()
+        row.api_key, row.api_secret = 'new', 'new'
+        db.session.commit()
+    _settle(validator)
+
+    assert _status(app, 'u1') == PENDING
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from services import logo_index as logo_module
+from services.logo_index import LogoIndex
+
+
+@pytest.fixture
+def logos(tmp_path, monkeypatch):
+    """An index over three small PNG logos, with the digests and renders it does counted."""
+    from PIL import Image
+
+    logo_dir = tmp_path / 'logos'
+    logo_dir.mkdir()
+    for i, name in enumerate(('bitcoin-btc-logo.png', 'ethereum-eth-logo.png', 'tether-usdt-logo.png')):
+        Image.new('RGBA', (256, 256), (i * 80, 0, 0, 255)).save(logo_dir / name)
+    monkeypatch.setattr(logo_module, 'LOGO_DIR', str(logo_dir))
+    monkeypatch.setattr(logo_module, 'LOGO_PREGENERATE', False)
+    monkeypatch.setattr(logo_module, '_digests', {})
+
+    hashed = Counter()
+    digest = logo_module._digest
+    monkeypatch.setattr(logo_module, '_digest', lambda path: hashed.update([path]) or digest(path))
+    index = LogoIndex(str(logo_dir), str(tmp_path / 'variants'), (32, 64))
+    index.hashed = hashed
+    return index
+
+
+def test_a_lookup_hashes_only_the_logo_it_serves(logos):
+    btc = logos.find('BTC')
+
+    assert btc.digest == logos.find('btc').digest
+    assert list(logos.hashed) == [btc.path]
+
+
+def test_warm_hashes_every_logo_once(logos):
+    logos.warm()
+    logos.warm()
+    logos.find('ETH').digest
+
+    assert sorted(logos.hashed.values()) == [1, 1, 1]
+
+
+def test_one_render_per_variant_and_none_in_series(logos, monkeypatch):
+    rendered = Counter()
+    render   = logos._render
+
+    def slow_render(logo, size, fmt, path):
+        rendered[(logo.symbol, size, fmt)] += 1
+        time.sleep(0.2)
+        render(logo, size, fmt, path)
+
+    monkeypatch.setattr(logos, '_render', slow_render)
+    btc, eth = logos.find('BTC'), logos.find('ETH')
+    requests = [(btc, 32)] * 4 + [(eth, 32), (btc, 64)]
+    threads  = [threading.Thread(target=logos.variant_path, args=(logo, size, 'webp'))
+                for logo, size in requests]
+
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert rendered == {('BTC', 32, 'webp'): 1, ('ETH', 32, 'webp'): 1, ('BTC', 64, 'webp'): 1}
+    # Three different variants render side by side, not one after another
+    assert time.monotonic() - started < 0.5
+    assert logos._rendering == {}
@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+from services import market_data as market_data_module
+from services.market_data import MarketDataEngine, PriceEntry
+from services.pair_index import pair_index
+
+STREAMED = {'tBTCUSD', 'tETHUSD', 'tETHUST'}
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _fixture_price(fake, symbol: str) -> float:
+    return next(t[7] for t in fake.fixtures['tickers'] if t[0] == symbol)
+
+
+@pytest.fixture
+def streamed_pairs(monkeypatch):
+    monkeypatch.setattr(pair_index, 'symbols_quoted_in', lambda quotes: set(STREAMED))
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(market_data_module, '_BACKOFF_MIN', 0.05)
+    monkeypatch.setattr(market_data_module, '_BACKOFF_MAX', 0.4)
+
+
+# ── REST fallback ─────────────────────────────────────────────────────────────
+def test_missing_price_is_fetched_over_rest(public_rest):
+    engine = MarketDataEngine('ws://unused', max_age=30, enabled=False)
+
+    price = engine.get_price('tBTCUSD')
+
+    assert price == _fixture_price(public_rest, 'tBTCUSD')
+    assert engine.last_price('tBTCUSD').source == 'rest'
+    assert public_rest.take_calls() == {'GET ticker/{symbol}': 1}
+
+
+def test_fresh_websocket_price_needs_no_upstream_call(public_rest):
+    engine = MarketDataEngine('ws://unused', max_age=30, enabled=False)
+    engine.update('tBTCUSD', 123.0, source='ws')
+
+    assert engine.get_price('tBTCUSD') == 123.0
+    assert public_rest.take_calls() == {}
+
+
+def test_stale_price_is_refreshed_over_rest(public_rest):
+    engine = MarketDataEngine('ws://unused', max_age=30, enabled=False)
+    engine._prices['tBTCUSD'] = PriceEntry(123.0, time.time() - 60, 'ws')
+
+    assert engine.get_price('tBTCUSD') == _fixture_price(public_rest, 'tBTCUSD')
+    assert engine.last_price('tBTCUSD').source == 'rest'
+
+
+def test_stale_price_is_served_only_when_allowed_and_rest_fails(public_rest):
+    engine = MarketDataEngine('ws://unused', max_age=30, enabled=False)
+    engine._prices['tBTCUSD'] = PriceEntry(123.0, time.time() - 60, 'ws')
+
+    public_rest.answer_next(*[500] * 10)
+    assert engine.get_price('tBTCUSD') == 123.0
+    assert engine.get_price('tBTCUSD', allow_stale=False) is None
+
+
+def test_symbol_outside_the_streamed_universe_skips_rest(public_rest):
+    engine = MarketDataEngine('ws://unused', max_age=30, enabled=False)
+    engine._symbols = set(STREAMED)
+
+    assert engine.get_price('tXYZUSD') is None
+    assert public_rest.take_calls() == {}
+
+
+# ── Websocket feed ────────────────────────────────────────────────────────────
+def test_websocket_fills_the_price_table(fake_bitfinex, streamed_pairs):
+    engine = MarketDataEngine(fake_bitfinex.wss_url, max_age=30)
+    engine.start()
+
+    assert _wait_for(lambda: all(engine.last_price(s) for s in STREAMED))
+    assert {engine.last_price(s).source for s in STREAMED} == {'ws'}
+    assert engine.last_price('tBTCUSD').price == _fixture_price(fake_bitfinex, 'tBTCUSD')
+
+
+def test_dropped_websocket_reconnects_and_resubscribes(fake_bitfinex, streamed_pairs, fast_backoff):
+    engine = MarketDataEngine(fake_bitfinex.wss_url, max_age=30)
+    engine.start()
+    assert _wait_for(lambda: all(engine.last_price(s) for s in STREAMED))
+    assert _wait_for(lambda: fake_bitfinex.calls['WS subscribe'] == len(STREAMED))
+    fake_bitfinex.take_calls()
+
+    engine._prices.clear()
+    fake_bitfinex.drop_websockets()
+
+    assert _wait_for(lambda: all(engine.last_price(s) for s in STREAMED))
+    calls = fake_bitfinex.take_calls()
+    assert calls.get('WS connect', 0) >= 1
+    assert calls['WS subscribe'] == len(STREAMED)
+
+
+def test_failed_connections_back_off_exponentially_up_to_the_cap(streamed_pairs, fast_backoff,
+                                                                 monkeypatch):
+    engine   = MarketDataEngine('ws://127.0.0.1:9/ws/2', max_age=30)   # nothing listens
+    attempts = []
+    run_once = engine._run_once
+
+    async def recording_run_once():
+        attempts.append(time.monotonic())
+        await run_once()
+
+    monkeypatch.setattr(engine, '_run_once', recording_run_once)
+    engine.start()
+
+    assert _wait_for(lambda: len(attempts) >= 6, timeout=10)
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])][:5]
+    # 0.05, 0.1, 0.2, 0.4, then capped at 0.4
+    for gap, expected in zip(gaps, (0.05, 0.1, 0.2, 0.4, 0.4)):
+        assert expected * 0.9 <= gap <= expected + 0.25
@@ -0,0 +1,145 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from services import order_pipeline as pipeline_module
+from services.credentials import Credentials
+from services.market_data import MarketDataEngine
+from services.order_pipeline import (CheckSkipped, OrderContext, OrderPipeline, OrderRejected,
+                                     check_balance, load_wallets)
+from services.wallet_sessions import Balance, WalletSessions
+
+CREDS = Credentials('u1', 'key', 'secret', datetime(2026, 1, 1))
+
+
+@pytest.fixture
+def upstream(public_rest, auth_rest, monkeypatch):
+    """Price and wallets from the fake: REST ticker fallback, REST wallets with no sessions."""
+    monkeypatch.setattr(pipeline_module, 'market_data', MarketDataEngine('ws://unused', 30, enabled=False))
+    monkeypatch.setattr(pipeline_module, 'wallet_sessions',
+                        WalletSessions('ws://unused', 0, 60, 1, 5, enabled=False))
+    return public_rest
+
+
+def _pipeline(budget_ms: float = 2000) -> OrderPipeline:
+    p = OrderPipeline(budget_ms)
+    p.add_check('balance', check_balance, load=load_wallets)
+    return p
+
+
+def _order(side: str = 'buy', amount_usd: float = 100.0, quote: str = 'USD', base: str = 'BTC'):
+    symbol = f"t{base}{'UST' if quote == 'USDT' else 'USD'}"
+    return OrderContext(CREDS, base, side, amount_usd, quote, symbol)
+
+
+def _wallets(*rows) -> list:
+    return [Balance('exchange', currency, balance, available) for currency, balance, available in rows]
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+def test_order_is_priced_checked_and_submitted(upstream):
+    ctx   = _order(amount_usd=100)
+    order = _pipeline().run(ctx)
+
+    assert order is not None
+    assert ctx.price == 67250.0
+    assert ctx.base_amount == round(100 / 67250.0, 8)
+    assert ctx.skipped == []
+    assert set(ctx.timings) == {'price', 'balance', 'submit'}
+    # No bulk ticker call for a USD valuation: only what the order needs
+    assert upstream.take_calls() == {'GET ticker/{symbol}': 1, 'POST auth/r/wallets': 1,
+                                     'POST auth/w/order/submit': 1}
+
+
+def test_wallets_load_while_the_price_is_fetched(upstream):
+    upstream.latency_ms = 300
+    ctx = _order()
+    _pipeline().run(ctx)
+
+    # Price and wallets take 300ms each; together they must not add up
+    assert ctx.timings['price'] >= 280
+    assert ctx.timings['balance'] < 150
+
+
+def test_underfunded_order_is_rejected_before_submission(upstream):
+    ctx = _order(amount_usd=1_000_000)
+
+    with pytest.raises(OrderRejected) as e:
+        _pipeline().run(ctx)
+
+    assert e.value.status == 422
+    assert 'Insufficient USD balance' in e.value.message
+    assert 'POST auth/w/order/submit' not in upstream.take_calls()
+
+
+def test_missing_price_rejects_the_order(upstream):
+    upstream.answer_next(*[500] * 10)   # every retry of the price, and the wallets
+
+    with pytest.raises(OrderRejected) as e:
+        _pipeline().run(_order())
+
+    assert e.value.status == 502
+
+
+def test_slow_wallets_skip_the_check_within_the_budget(upstream):
+    p = OrderPipeline(budget_ms=100)
+    p.add_check('balance', check_balance, load=lambda ctx: time.sleep(0.5) or [])
+    ctx = _order(amount_usd=1_000_000)
+
+    assert p.run(ctx) is not None
+    assert ctx.skipped == ['balance']
+    assert ctx.timings['balance'] < 200
+
+
+def test_failing_wallet_read_skips_the_check(upstream):
+    p = OrderPipeline(budget_ms=2000)
+    p.add_check('balance', check_balance, load=lambda ctx: 1 / 0)
+    ctx = _order()
+
+    assert p.run(ctx) is not None
+    assert ctx.skipped == ['balance']
+
+
+# ── check_balance ─────────────────────────────────────────────────────────────
+def test_usd_buying_power_counts_the_usd_stablecoins():
+    ctx = _order(amount_usd=300)
+    check_balance(ctx, _wallets(('USD', 100, 100), ('UST', 100, 100), ('DAI', 100, 100)))
+
+
+def test_usd_buying_power_ignores_other_pegs():
+    ctx = _order(amount_usd=300)
+    with pytest.raises(OrderRejected):
+        check_balance(ctx, _wallets(('USD', 100, 100), ('EURT', 1e6, 1e6), ('BUSD', 1e6, 1e6),
+                                    ('LUSD', 1e6, 1e6), ('USDT0', 1e6, 1e6)))
+
+
+def test_usdt_order_only_counts_ust():
+    ctx = _order(amount_usd=150, quote='USDT')
+    with pytest.raises(OrderRejected, match='Insufficient USDT'):
+        check_balance(ctx, _wallets(('USD', 1000, 1000), ('UST', 100, 100)))
+
+
+def test_sell_needs_the_base_asset():
+    ctx = _order(side='sell')
+    ctx.base_amount = -0.5
+    with pytest.raises(OrderRejected, match='Insufficient BTC'):
+        check_balance(ctx, _wallets(('BTC', 1.0, 0.2)))
+    check_balance(ctx, _wallets(('BTC', 1.0, 0.6)))
+
+
+def test_non_exchange_wallets_do_not_count():
+    ctx = _order(amount_usd=100)
+    with pytest.raises(OrderRejected):
+        check_balance(ctx, [Balance('margin', 'USD', 1000, 1000), Balance('funding', 'USD', 1000, 1000)])
+
+
+def test_unknown_available_balance_skips_instead_of_reading_as_zero():
+    ctx = _order(amount_usd=100)
+    with pytest.raises(CheckSkipped):
+        check_balance(ctx, _wallets(('USD', 1000, None)))
+
+
+def test_unknown_balance_of_an_unrelated_currency_does_not_matter():
+    ctx = _order(amount_usd=100)
+    check_balance(ctx, _wallets(('USD', 1000, 1000), ('ETH', 1, None)))
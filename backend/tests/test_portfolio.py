@@ -0,0 +1,112 @@
+from collections import Counter, namedtuple
+
+import pytest
+
+from extensions import db
+from models.portfolio import PortfolioCursor
+from services import portfolio as portfolio_module
+from services.portfolio import _MINUTE, _SETTLE_MS, PortfolioEngine, _Budget, _is_flow, _now_ms
+
+Row = namedtuple('Row', 'id mts')
+
+PAGE = 5
+
+
+@pytest.fixture
+def engine(app, monkeypatch):
+    monkeypatch.setattr(portfolio_module, '_PAGE_LIMIT', PAGE)
+    with app.app_context():
+        yield PortfolioEngine(False, 30, 10, 300, 8, 900, 8, 365)
+
+
+@pytest.fixture
+def cursor(engine):
+    """Trades and ledgers read up to ten minutes ago, a minute at a time."""
+    start  = _now_ms() - _SETTLE_MS - 10 * _MINUTE
+    cursor = PortfolioCursor(user_id='u1', trades_mts=start, trades_window_ms=_MINUTE,
+                             ledgers_mts=start, ledgers_window_ms=_MINUTE, cum_flow_usd=0.0,
+                             snapshot_mts=0, next_run_mts=0, lease_until_mts=0)
+    db.session.add(cursor)
+    db.session.commit()
+    return cursor
+
+
+class History:
+    """Bitfinex's history endpoints over `rows`: start/end inclusive, at most `limit` per call."""
+
+    def __init__(self, rows, newest_first: bool):
+        self.rows         = rows
+        self.newest_first = newest_first
+        self.calls        = 0
+
+    def __call__(self, start: int, end: int, limit: int) -> list:
+        self.calls += 1
+        hits = sorted((r for r in self.rows if start <= r.mts <= end),
+                      key=lambda r: (r.mts, r.id), reverse=self.newest_first)
+        return hits[:limit]
+
+
+def _ingest(engine, cursor, history, budget: int = 100) -> Counter:
+    applied = Counter()
+    engine._ingest(cursor, 'trades', _Budget(budget), history,
+                   lambda _, rows: applied.update(r.id for r in rows),
+                   mts=lambda r: r.mts, newest_first=history.newest_first)
+    return applied
+
+
+def _busy_minute(cursor, count: int = 12, per_ms: int = 2) -> list:
+    """`count` entries within the cursor's next minute, `per_ms` to a millisecond."""
+    first = cursor.trades_mts + 1000
+    return [Row(i, first + i // per_ms) for i in range(count)]
+
+
+# ── Ingestion ─────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize('newest_first', [False, True])
+def test_a_full_page_at_the_smallest_window_is_paged_through(engine, cursor, newest_first):
+    rows    = _busy_minute(cursor)
+    applied = _ingest(engine, cursor, History(rows, newest_first))
+
+    # Every entry exactly once, though pages overlap on the millisecond they meet at
+    assert applied == Counter(r.id for r in rows)
+    assert cursor.trades_mts >= _now_ms() - _SETTLE_MS - 1000
+
+
+def test_cursor_stays_put_when_the_budget_ends_mid_window(engine, cursor):
+    before  = cursor.trades_mts
+    history = History(_busy_minute(cursor), newest_first=False)
+
+    assert _ingest(engine, cursor, history, budget=2) == Counter()
+    assert cursor.trades_mts == before
+    assert history.calls == 2
+
+    # The next run reads the whole window again
+    assert len(_ingest(engine, cursor, history)) == 12
+
+
+def test_sparse_windows_grow(engine, cursor):
+    history = History([], newest_first=False)
+    _ingest(engine, cursor, history)
+
+    assert cursor.trades_window_ms > _MINUTE
+    assert history.calls < 10
+
+
+def test_a_page_within_one_millisecond_does_not_loop(engine, cursor):
+    rows = _busy_minute(cursor, count=PAGE + 3, per_ms=PAGE + 3)
+
+    applied = _ingest(engine, cursor, History(rows, newest_first=False))
+
+    assert len(applied) == PAGE
+    assert cursor.trades_mts >= _now_ms() - _SETTLE_MS - 1000
+
+
+# ── Flows ─────────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize('description, flow', [
+    ('Deposit (BITCOIN) #123 on wallet Exchange', True),
+    ('Withdrawal #456 on wallet Exchange', True),
+    ('Transfer of 1 BTC from wallet Exchange to Deposit', False),
+    ('Deposit Fee (BITCOIN) on wallet Exchange', False),
+    ('Exchange 0.1 BTC for USD @ 60000', False),
+])
+def test_only_deposits_and_withdrawals_are_flows(description, flow):
+    assert _is_flow(description) == flow
@@ -0,0 +1,119 @@
+import gzip
+import json
+
+import msgpack
+import pytest
+from flask import Flask
+
+from routes import bitfinex as bitfinex_module
+from services.ticker_feed import TickerFeed
+from services.ticker_payloads import TickerPayloads
+from services.ticker_snapshot import TickerSnapshot
+from utils.encoding import MIMETYPES
+
+
+def _row(ticker: str, price: float) -> dict:
+    return {'ticker': ticker, 'baseCurrency': ticker[1:4], 'quoteCurrency': ticker[4:],
+            'verboseName': ticker, 'availableQuotes': [ticker[4:]],
+            'tickerData': {'last_price': price, 'volume': 10.0}}
+
+
+def _snapshot(seq: int, rows: list) -> TickerSnapshot:
+    body = json.dumps(rows, separators=(',', ':')).encode()
+    return TickerSnapshot(rows, body, f'etag{seq}', 0.0, seq)
+
+
+class Market:
+    """A feed and its snapshots, pushed one refresh at a time."""
+
+    def __init__(self):
+        self.feed     = TickerFeed(history=5)
+        self.payloads = TickerPayloads()
+        self.current  = None
+
+    def refresh(self, *rows) -> TickerSnapshot:
+        seq = self.current.seq + 1 if self.current else 1
+        self.current = _snapshot(seq, list(rows))
+        self.feed.on_snapshot(self.current)
+        self.payloads.on_snapshot(self.current)
+        return self.current
+
+
+@pytest.fixture
+def market(monkeypatch):
+    market = Market()
+    market.refresh(_row('tBTCUSD', 100.0), _row('tETHUSD', 10.0), _row('tXRPUSD', 1.0))
+    monkeypatch.setattr(bitfinex_module, 'ticker_feed', market.feed)
+    monkeypatch.setattr(bitfinex_module, 'ticker_payloads', market.payloads)
+    monkeypatch.setattr(bitfinex_module.ticker_store, 'get', lambda: market.current)
+    return market
+
+
+@pytest.fixture
+def client(market):
+    app = Flask(__name__)
+    app.register_blueprint(bitfinex_module.bitfinex)
+    return app.test_client()
+
+
+# ── Feed ──────────────────────────────────────────────────────────────────────
+def test_catch_up_folds_every_refresh_since(market):
+    market.refresh(_row('tBTCUSD', 101.0), _row('tETHUSD', 10.0), _row('tXRPUSD', 1.0))
+    market.refresh(_row('tBTCUSD', 102.0), _row('tETHUSD', 10.0))
+
+    seq, payload = market.feed.catch_up(1)
+    doc = json.loads(payload.json_body)
+
+    assert seq == 3
+    assert [row['tickerData']['last_price'] for row in doc['changed']] == [102.0]
+    assert doc['removed'] == ['tXRPUSD']
+    assert doc['full'] is False
+
+
+def test_catch_up_is_none_beyond_the_history_or_for_another_epoch(market):
+    for price in range(10):
+        market.refresh(_row('tBTCUSD', float(price)))
+
+    assert market.feed.catch_up(1) is None
+    assert market.feed.catch_up(market.current.seq - 1, epoch='other') is None
+
+
+def test_pollers_at_the_same_seq_share_one_payload(market):
+    market.refresh(_row('tBTCUSD', 101.0))
+
+    assert market.feed.catch_up(1)[1] is market.feed.catch_up(1)[1]
+
+
+# ── /get-tickers?since= ───────────────────────────────────────────────────────
+def test_delta_is_negotiated_like_the_full_list(client, market):
+    market.refresh(_row('tBTCUSD', 101.0), _row('tETHUSD', 10.0), _row('tXRPUSD', 1.0))
+
+    response = client.get('/get-tickers?since=1&format=msgpack')
+    doc      = msgpack.unpackb(response.data)
+
+    assert response.mimetype == MIMETYPES['msgpack']
+    assert doc['full'] is False
+    assert doc['changed']['ticker'] == ['tBTCUSD']
+    assert doc['changed']['last_price'] == [101.0]
+
+
+def test_delta_is_served_precompressed(client, market):
+    market.refresh(*[_row(f't{i:03d}USD', float(i)) for i in range(50)])
+
+    response = client.get('/get-tickers?since=1', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(response.data))['changed']) == 50
+
+
+def test_client_too_far_behind_gets_the_full_list_in_its_format(client, market):
+    response = client.get('/get-tickers?since=1&epoch=other&format=columnar')
+    doc      = response.get_json(force=True)
+
+    assert response.mimetype == MIMETYPES['columnar']
+    assert doc['full'] is True
+    assert doc['tickers']['ticker'] == ['tBTCUSD', 'tETHUSD', 'tXRPUSD']
+
+
+def test_unsupported_delta_format_is_not_acceptable(client):
+    assert client.get('/get-tickers?since=1&format=xml').status_code == 406
@@ -0,0 +1,201 @@
+import threading
+import time
+
+import pytest
+
+from services.upstream import Gateway, RateLimited, TokenBucket
+
+
+def _gateway(public_rate=0.0, public_burst=1, auth_rate=0.0, auth_burst=1, max_wait=5.0,
+             retries=2, backoff=0.01) -> Gateway:
+    return Gateway(public_rate, public_burst, auth_rate, auth_burst, max_wait, retries, backoff)
+
+
+def _calls(fake) -> int:
+    return sum(fake.take_calls().values())
+
+
+# ── Single flight ─────────────────────────────────────────────────────────────
+def test_identical_public_gets_share_one_upstream_call(fake_bitfinex):
+    fake_bitfinex.latency_ms = 200
+    gateway = _gateway()
+    url     = f'{fake_bitfinex.rest_url}/tickers'
+    results = []
+
+    def call():
+        results.append(gateway.get(url, params={'symbols': 'ALL'}))
+
+    threads = [threading.Thread(target=call) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert _calls(fake_bitfinex) == 1
+    assert [r.status_code for r in results] == [200] * 10
+    assert len({id(r) for r in results}) == 1
+
+
+def test_followers_get_the_leaders_error(fake_bitfinex):
+    fake_bitfinex.latency_ms = 200
+    gateway = _gateway(retries=0)
+    url     = f'{fake_bitfinex.rest_url}/tickers'
+    fake_bitfinex.answer_next(500)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(gateway.get(url).status_code))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert _calls(fake_bitfinex) == 1
+    assert results == [500] * 5
+
+
+def test_different_params_and_signed_gets_are_not_coalesced(fake_bitfinex):
+    fake_bitfinex.latency_ms = 100
+    gateway = _gateway()
+    url     = f'{fake_bitfinex.rest_url}/tickers'
+    calls   = [lambda: gateway.get(url, params={'symbols': 'tBTCUSD'}),
+               lambda: gateway.get(url, params={'symbols': 'tETHUSD'}),
+               lambda: gateway.get(url, headers={'bfx-apikey': 'a'}),
+               lambda: gateway.get(url, headers={'bfx-apikey': 'a'})]
+
+    threads = [threading.Thread(target=fn) for fn in calls]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert _calls(fake_bitfinex) == 4
+
+
+def test_later_identical_get_calls_upstream_again(fake_bitfinex):
+    gateway = _gateway()
+    url     = f'{fake_bitfinex.rest_url}/tickers'
+    gateway.get(url)
+    gateway.get(url)
+    assert _calls(fake_bitfinex) == 2
+
+
+# ── Retries ───────────────────────────────────────────────────────────────────
+def test_public_get_is_retried_on_5xx(fake_bitfinex):
+    gateway = _gateway(retries=2)
+    fake_bitfinex.answer_next(500, 502)
+
+    response = gateway.get(f'{fake_bitfinex.rest_url}/tickers')
+
+    assert response.status_code == 200
+    assert _calls(fake_bitfinex) == 3
+
+
+def test_last_error_response_is_returned_when_retries_run_out(fake_bitfinex):
+    gateway = _gateway(retries=2)
+    fake_bitfinex.answer_next(500, 500, 500, 500)
+
+    response = gateway.get(f'{fake_bitfinex.rest_url}/tickers')
+
+    assert response.status_code == 500
+    assert response.json()[0] == 'error'
+    assert _calls(fake_bitfinex) == 3
+
+
+def test_client_errors_are_not_retried(fake_bitfinex):
+    gateway = _gateway(retries=2)
+
+    response = gateway.get(f'{fake_bitfinex.rest_url}/no-such-endpoint')
+
+    assert response.status_code == 404
+    assert _calls(fake_bitfinex) == 1
+
+
+def test_signed_calls_are_never_retried(fake_bitfinex):
+    gateway = _gateway(retries=2)
+    fake_bitfinex.answer_next(500)
+
+    response = gateway.post(f'{fake_bitfinex.rest_url}/auth/r/wallets', data='{}',
+                            headers={'bfx-apikey': 'a'})
+
+    assert response.status_code == 500
+    assert _calls(fake_bitfinex) == 1
+
+
+def test_429_waits_for_retry_after_and_pauses_the_bucket(fake_bitfinex):
+    fake_bitfinex.retry_after = 0.3
+    gateway = _gateway(public_rate=100, public_burst=10, retries=1, backoff=0.01)
+    fake_bitfinex.answer_next(429)
+
+    started  = time.monotonic()
+    response = gateway.get(f'{fake_bitfinex.rest_url}/tickers')
+    elapsed  = time.monotonic() - started
+
+    assert response.status_code == 200
+    assert _calls(fake_bitfinex) == 2
+    assert elapsed >= 0.3
+    # The pause emptied the bucket: the next call waits for a fresh token
+    assert gateway._public._tokens < 2
+
+
+def test_connection_errors_are_retried_then_raised():
+    import requests
+
+    gateway = _gateway(retries=1)
+    with pytest.raises(requests.ConnectionError):
+        gateway.get('http://127.0.0.1:9/v2/tickers')   # discard port: nothing listens
+
+
+# ── Token buckets ─────────────────────────────────────────────────────────────
+def test_token_bucket_allows_the_burst_then_the_rate():
+    bucket = TokenBucket(rate=20, burst=3)
+
+    started = time.monotonic()
+    for _ in range(3):
+        bucket.acquire(max_wait=1)
+    assert time.monotonic() - started < 0.04
+
+    bucket.acquire(max_wait=1)
+    assert time.monotonic() - started >= 0.04
+
+
+def test_token_bucket_raises_instead_of_waiting_past_max_wait():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.acquire(max_wait=0)
+    with pytest.raises(RateLimited):
+        bucket.acquire(max_wait=0.1)
+
+
+def test_paused_bucket_hands_out_nothing_until_the_pause_ends():
+    bucket = TokenBucket(rate=1000, burst=10)
+    bucket.pause(0.2)
+
+    with pytest.raises(RateLimited):
+        bucket.acquire(max_wait=0.1)
+    started = time.monotonic()
+    bucket.acquire(max_wait=1)
+    assert time.monotonic() - started > 0.05
+
+
+def test_public_calls_beyond_the_bucket_fail_without_reaching_bitfinex(fake_bitfinex):
+    gateway = _gateway(public_rate=0.5, public_burst=2, max_wait=0.1)
+    url     = f'{fake_bitfinex.rest_url}/tickers'
+
+    gateway.get(url, params={'n': 1})
+    gateway.get(url, params={'n': 2})
+    with pytest.raises(RateLimited):
+        gateway.get(url, params={'n': 3})
+
+    assert _calls(fake_bitfinex) == 2
+
+
+def test_each_api_key_has_its_own_bucket(fake_bitfinex):
+    gateway = _gateway(auth_rate=0.5, auth_burst=1, max_wait=0.1)
+    url     = f'{fake_bitfinex.rest_url}/auth/r/wallets'
+
+    gateway.post(url, data='{}', headers={'bfx-apikey': 'a'})
+    gateway.post(url, data='{}', headers={'bfx-apikey': 'b'})
+    with pytest.raises(RateLimited):
+        gateway.post(url, data='{}', headers={'bfx-apikey': 'a'})
+
+    assert _calls(fake_bitfinex) == 2
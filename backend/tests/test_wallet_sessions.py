@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+from services.credentials import Credentials
+from services.wallet_sessions import WalletSessions
+
+CREDS = Credentials('u1', 'key', 'secret', datetime(2026, 1, 1))
+
+
+def test_sessions_are_off_unless_enabled():
+    env  = {k: v for k, v in os.environ.items() if k != 'WALLET_SESSIONS_ENABLED'}
+    code = 'import services.wallet_sessions as w; print(w.WALLET_SESSIONS_ENABLED, w.wallet_sessions.enabled)'
+    out  = subprocess.check_output([sys.executable, '-c', code], text=True, env=env,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.split() == ['False', 'False']
+
+
+def test_disabled_sessions_read_wallets_over_rest_with_a_short_ttl(auth_rest):
+    sessions = WalletSessions('ws://unused', 0, 60, 1, 5, enabled=False)
+
+    first = sessions.rows(CREDS)
+    again = sessions.rows(CREDS)
+
+    assert [w.currency for w in first] == [w.currency for w in again]
+    assert auth_rest.take_calls() == {'POST auth/r/wallets': 1}
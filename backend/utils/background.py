@@ -0,0 +1,57 @@
+import logging
+import threading
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Runs `fn` every `interval` seconds on a daemon thread.
+
+    The thread is started lazily by `start()` (safe to call repeatedly), so
+    importing a module that owns a task never spawns threads on its own —
+    this keeps the Flask reloader parent process quiet.
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], None],
+                 run_immediately: bool = True):
+        self.name             = name
+        self.interval         = interval
+        self._fn              = fn
+        self._run_immediately = run_immediately
+        self._thread          = None
+        self._lock            = threading.Lock()
+        self._wake            = threading.Event()
+        self._stop            = threading.Event()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def trigger(self) -> None:
+        """Wake the worker now instead of waiting for the next tick."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        if not self._run_immediately:
+            self._sleep()
+        while not self._stop.is_set():
+            try:
+                self._fn()
+            except Exception:
+                log.exception('Background task %s failed', self.name)
+            self._sleep()
+
+    def _sleep(self) -> None:
+        self._wake.wait(self.interval)
+        self._wake.clear()
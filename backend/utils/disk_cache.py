@@ -0,0 +1,40 @@
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Optional
+
+log = logging.getLogger(__name__)
+
+# Warm-restart state lives next to main.py unless overridden
+BASE_DIR  = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'cache'))
+
+
+def cache_path(name: str) -> str:
+    return os.path.join(CACHE_DIR, name)
+
+
+def load_json(name: str) -> Optional[Any]:
+    """Read a cached JSON document, or None when it is missing or unreadable."""
+    try:
+        with open(cache_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning('Ignoring unreadable cache file %s: %s', name, e)
+        return None
+
+
+def save_json(name: str, data: Any) -> None:
+    """Atomically replace a cached JSON document (write to temp file, then rename)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=f'.{name}.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, cache_path(name))
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,143 @@
+import gzip
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Request, Response, jsonify
+
+log = logging.getLogger(__name__)
+
+# Optional codecs: the formats/encodings they back are simply not offered when missing
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ── Formats ───────────────────────────────────────────────────────────────────
+# json     – the row layout every endpoint has always returned
+# columnar – one array per field, JSON
+# msgpack  – the columnar layout as MessagePack
+MIMETYPES = {
+    'json':     'application/json',
+    'columnar': 'application/vnd.bfxapp.columnar+json',
+    'msgpack':  'application/msgpack',
+}
+_BY_MIMETYPE = {mime: fmt for fmt, mime in MIMETYPES.items()}
+_BY_MIMETYPE['application/x-msgpack'] = 'msgpack'
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+def available_formats() -> List[str]:
+    return [f for f in MIMETYPES if f != 'msgpack' or msgpack is not None]
+
+
+def negotiate(request: Request) -> Optional[str]:
+    """
+    Response format from ?format= (which wins) or the Accept header; json by
+    default.  None means the client asked only for something we cannot
+    produce, i.e. 406.
+    """
+    fmt = request.args.get('format', '').strip().lower()
+    if fmt:
+        return fmt if fmt in available_formats() else None
+    if not request.accept_mimetypes:
+        return 'json'
+    offered = [MIMETYPES[f] for f in available_formats()]
+    offered += ['application/x-msgpack'] if msgpack is not None else []
+    best = request.accept_mimetypes.best_match(offered)
+    return _BY_MIMETYPE.get(best) if best else None
+
+
+def not_acceptable() -> Tuple[Response, int]:
+    return jsonify({'error': f'Unsupported format, available: {", ".join(available_formats())}'}), 406
+
+
+def encode(fmt: str, rows: Any, columns: Callable[[Any], dict]) -> bytes:
+    """`rows` in the requested format; `columns` turns them into the columnar document."""
+    if fmt == 'json':
+        return json.dumps(rows, separators=(',', ':')).encode('utf-8')
+    if fmt == 'columnar':
+        return json.dumps(columns(rows), separators=(',', ':')).encode('utf-8')
+    if fmt == 'msgpack' and msgpack is not None:
+        return msgpack.packb(columns(rows), use_bin_type=True)
+    raise ValueError(f'Unsupported format {fmt!r}')
+
+
+def compress(body: bytes) -> Dict[str, bytes]:
+    """Content-Encoding → body, always including identity."""
+    variants = {'identity': body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        variants['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+        if brotli is not None:
+            variants['br'] = brotli.compress(body, quality=5)
+    return variants
+
+
+def _pick_encoding(request: Request, variants: Dict[str, bytes]) -> str:
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and accepted[encoding]:
+            return encoding
+    return 'identity'
+
+
+class EncodedPayload:
+    """
+    Every format × content-encoding variant of one payload version, encoded
+    once and then served as-is.  `prepare()` builds them all up front (e.g.
+    from a refresh listener); otherwise each is built on first request.
+    """
+
+    def __init__(self, rows: Any, columns: Callable[[Any], dict], etag: str,
+                 json_body: Optional[bytes] = None):
+        self.rows      = rows
+        self.columns   = columns
+        self.etag      = etag
+        self.json_body = json_body   # already-encoded json, used as is when given
+
+        self._variants: Dict[str, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def prepare(self) -> 'EncodedPayload':
+        for fmt in available_formats():
+            self.variants(fmt)
+        return self
+
+    def variants(self, fmt: str) -> Dict[str, bytes]:
+        found = self._variants.get(fmt)
+        if found is None:
+            with self._lock:
+                found = self._variants.get(fmt)
+                if found is None:
+                    body = self.json_body if fmt == 'json' else None
+                    if body is None:
+                        body = encode(fmt, self.rows, self.columns)
+                    found = self._variants[fmt] = compress(body)
+        return found
+
+    def respond(self, request: Request, fmt: str) -> Response:
+        """Response for the negotiated format, pre-compressed to the client's best encoding."""
+        variants = self.variants(fmt)
+        encoding = _pick_encoding(request, variants)
+
+        response = Response(variants[encoding], mimetype=MIMETYPES[fmt])
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.vary.update(('Accept', 'Accept-Encoding'))
+        response.set_etag(f'{self.etag}-{fmt}-{encoding}')
+        return response
+
+
+def respond(fmt: str, rows: Any, columns: Callable[[Any], dict]) -> Response:
+    """One-off (uncached, uncompressed) response for per-user payloads."""
+    response = Response(encode(fmt, rows, columns), mimetype=MIMETYPES[fmt])
+    response.vary.add('Accept')
+    return response
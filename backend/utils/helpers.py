@@ -1,14 +1,5 @@
-import bcrypt
-from typing import List
-
-
-def TradingPairSlicer(string: str) -> List[str]:
-    """Splits a trading pair string into its components ['BASE', 'QUOTE']."""
-    if len(string) > 6:
-        return string.split(':')
-    else:
-        p = 3
-        return [string[z - p:z] for z in range(p, len(string) + p, p)]
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 
 def transform_data(tickers_dict):
@@ -28,11 +19,32 @@ def transform_data(tickers_dict):
     return transformed_data
 
 
+# ── Password hashing ──────────────────────────────────────────────────────────
+# bcrypt cost factor (2^rounds iterations; 12 is bcrypt's own default).
+BCRYPT_ROUNDS      = int(os.environ.get('BCRYPT_ROUNDS', 12))
+# Hashes computed at once.  bcrypt releases the GIL while it works, so these
+# run in parallel; callers beyond the pool wait their turn instead of every
+# request thread burning a core at the same time.
+CRYPTO_MAX_WORKERS = int(os.environ.get('CRYPTO_MAX_WORKERS', os.cpu_count() or 2))
+
+_crypto_pool = ThreadPoolExecutor(max_workers=CRYPTO_MAX_WORKERS, thread_name_prefix='crypto')
+
+
+# bcrypt is imported on first use; nothing on the request path needs it at startup
+def _hashpw(password: bytes) -> bytes:
+    import bcrypt
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+
+
+def _checkpw(password: bytes, hashed_password: bytes) -> bool:
+    import bcrypt
+    return bcrypt.checkpw(password, hashed_password)
+
+
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    return _crypto_pool.submit(_hashpw, password.encode('utf-8')).result().decode('utf-8')
 
 
 def check_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return _crypto_pool.submit(_checkpw, password.encode('utf-8'),
+                               hashed_password.encode('utf-8')).result()
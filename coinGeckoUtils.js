@@ -1,32 +1,36 @@
 import AsyncStorage from '@react-native-async-storage/async-storage';
+import { BACKEND_URL } from './constants';
 
-const COINGECKO_DB_KEY = 'CoinGeckoDB';
+const COINGECKO_INDEX_KEY = 'CoinGeckoIndex';
 
+// The backend owns the CoinGecko mapping: a small, versioned index of just the
+// currencies we list ({ version, coins: { BTC: ['bitcoin', 'Bitcoin'], … } }),
+// instead of the full /coins/list downloaded and scanned on every device.
 export const fetchCoinGeckoData = async () => {
-    const storedData = await AsyncStorage.getItem(COINGECKO_DB_KEY);
+    const stored = JSON.parse(await AsyncStorage.getItem(COINGECKO_INDEX_KEY) || 'null');
 
-    if (storedData) {
-        return JSON.parse(storedData);
-    }
-
-    const response = await fetch("https://api.coingecko.com/api/v3/coins/list?include_platform=false");
-    if (response.ok) {
-        const data = await response.json();
-        await AsyncStorage.setItem(COINGECKO_DB_KEY, JSON.stringify(data));
-        return data;
-    } else {
-        console.error("Failed to fetch data from CoinGecko");
-        return null;
+    try {
+        const response = await fetch(`${BACKEND_URL}/coins/index`, {
+            headers: stored ? { 'If-None-Match': `"${stored.version}"` } : {},
+        });
+        if (response.status === 304) {
+            return stored;
+        }
+        if (response.ok) {
+            const index = await response.json();
+            await AsyncStorage.setItem(COINGECKO_INDEX_KEY, JSON.stringify(index));
+            return index;
+        }
+        console.error("Failed to fetch the CoinGecko index");
+    } catch (e) {
+        console.error("Failed to fetch the CoinGecko index", e);
     }
+    return stored;
 };
 
+// `symbol` is a ticker's baseCurrency (Bitfinex code, e.g. BTC, UST)
 const getTokenIdFromSymbol = async (symbol) => {
-    const data = await fetchCoinGeckoData();
-    if (data) {
-        const token = data.find(token => token.symbol === symbol);
-        if (token) {
-            return token.id;
-        }
-    }
-    return null;
+    const index = await fetchCoinGeckoData();
+    const coin = index?.coins[symbol.toUpperCase()];
+    return coin ? coin[0] : null;
 };
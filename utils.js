@@ -15,6 +15,11 @@ function generateUUID() {
 // ── User identity ─────────────────────────────────────────────────────────────
 
 const USER_ID_KEY = 'bfx_user_id';
+// Matches the backend's TICKER_REFRESH_INTERVAL; polls only fetch changed pairs
+const TICKER_POLL_MS = 15000;
+// Saved keys are checked by the backend in the background; wait this long for the verdict
+const KEY_CHECK_POLL_MS = 500;
+const KEY_CHECK_POLLS   = 20;
 
 /**
  * Returns the persistent user UUID, creating and storing it on first call.
@@ -108,25 +113,50 @@ export const TickersProvider = ({ children }) => {
     }, []);
 
     // ── Tickers ─────────────────────────────────────────────────────────────
+    // One full download, then only the pairs that changed since our last
+    // sequence number (/get-tickers?since=); the backend falls back to a full
+    // list (full: true) when we are too far behind or it has restarted.
     useEffect(() => {
+        const decorate = rows => rows
+            .filter(t => !t.ticker.startsWith('tTEST') && !t.ticker.startsWith('f'))
+            .map(t => ({
+                ...t,
+                isFavorite: false,
+                usdVolume:  parseFloat(t.tickerData.volume * t.tickerData.last_price).toFixed(2),
+                absPercMove: parseFloat(Math.abs(t.tickerData.daily_change_relative) * 100).toFixed(3),
+            }));
+
+        const cursor = { seq: 0, epoch: '' };
         const fetchTickers = async () => {
             try {
-                const response = await fetch(`${BACKEND_URL}/get-tickers`);
+                const response = await fetch(
+                    `${BACKEND_URL}/get-tickers?since=${cursor.seq}&epoch=${cursor.epoch}`);
                 const data     = await response.json();
 
-                if (Array.isArray(data)) {
-                    const filtered = data
-                        .filter(t => !t.ticker.startsWith('tTEST') && !t.ticker.startsWith('f'))
-                        .map(t => ({
-                            ...t,
-                            isFavorite: false,
-                            usdVolume:  parseFloat(t.tickerData.volume * t.tickerData.last_price).toFixed(2),
-                            absPercMove: parseFloat(Math.abs(t.tickerData.daily_change_relative) * 100).toFixed(3),
-                        }));
-                    setTickers(filtered);
+                if (data && Array.isArray(data.tickers)) {
+                    setTickers(decorate(data.tickers));
+                } else if (data && Array.isArray(data.changed)) {
+                    const changed = new Map(decorate(data.changed).map(t => [t.ticker, t]));
+                    const removed = new Set(data.removed);
+                    if (changed.size || removed.size) {
+                        setTickers(prev => {
+                            const next = prev
+                                .filter(t => !removed.has(t.ticker))
+                                .map(t => {
+                                    const row = changed.get(t.ticker);
+                                    if (!row) return t;
+                                    changed.delete(t.ticker);
+                                    return { ...row, isFavorite: t.isFavorite };
+                                });
+                            return next.concat([...changed.values()]);
+                        });
+                    }
                 } else {
                     console.error('Invalid API response:', data);
+                    return;
                 }
+                cursor.seq   = data.seq;
+                cursor.epoch = data.epoch;
             } catch (e) {
                 console.error('Error fetching tickers:', e);
             } finally {
@@ -134,14 +164,14 @@ export const TickersProvider = ({ children }) => {
             }
         };
         fetchTickers();
+        const timer = setInterval(fetchTickers, TICKER_POLL_MS);
+        return () => clearInterval(timer);
     }, []);
 
     // ── Logo URL ─────────────────────────────────────────────────────────────
-    const getLogoFilename = useCallback((ticker) => {
-        const base        = ticker.baseCurrency.toLowerCase();
-        const verboseName = ticker.verboseName.toLowerCase().replace(/\s+/g, '-');
-        return `${BACKEND_URL}/backend/logos/${verboseName}-${base}-logo.png`;
-    }, []);
+    // Redirects to a content-hashed 64px WebP that can be cached forever
+    const getLogoFilename = useCallback((ticker) =>
+        `${BACKEND_URL}/logos/${ticker.baseCurrency}?size=64`, []);
 
     // ── Save API keys ────────────────────────────────────────────────────────
     const saveKeys = useCallback(async (apiKey, apiSecret) => {
@@ -153,6 +183,13 @@ export const TickersProvider = ({ children }) => {
         });
         const data = await res.json();
         if (!res.ok) throw new Error(data.error || 'Failed to save keys');
+        // 202: the backend checks the pair with Bitfinex in the background
+        for (let i = 0; data.status === 'pending' && i < KEY_CHECK_POLLS; i++) {
+            await new Promise(resolve => setTimeout(resolve, KEY_CHECK_POLL_MS));
+            const status = await (await fetch(`${BACKEND_URL}/auth/status?user_id=${userId}`)).json();
+            if (status.status === 'invalid') throw new Error('Invalid API keys — Bitfinex rejected the credentials');
+            data.status = status.status;
+        }
         setHasKeys(true);
         return data;
     }, [userId]);